@@ -1,44 +1,227 @@
-from fastapi import APIRouter, HTTPException, Query
-from datetime import datetime, timedelta
+import asyncio
+import hmac
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+import numpy as np
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from ..services.traffic_predictor import predictor_service
-from ..services.signal_optimizer import optimize_signal_timing, SAMPLE_INTERSECTIONS
-from ..services.economic_calculator import calculate_infrastructure_roi, analyze_new_project
-from ..services.data_collector import get_current_status, get_traffic_health_score, get_alternative_routes
+from ..services.forecast_store import forecast_table, horizon_buckets, hour_bucket, refresh_forecasts
+from ..services.signal_optimizer import (optimize_signal_timing, simulated_improvement, webster_batch,
+                                        INTERSECTIONS_BY_ID, SAT_FLOW, LOST_TIME)
+from ..services.signal_network import plan_network
+from ..services.spatial_index import get_intersection_index
+from ..services.economic_calculator import calculate_infrastructure_roi, analyze_new_project, analyze_scenarios
+from ..services.data_collector import get_current_status, get_traffic_health_score, get_alternative_routes, ROUTES
+from ..services.live_feed import live_feed
+from ..utils.cache import cached
+from ..utils.encoding import aencode_response, encode_response
+from ..utils.executor import run_cpu
+from ..utils.metrics import profiler
+from ..utils.schemas import BatchPredictionRequest, BatchSignalRequest, ScenarioAnalysisRequest
 
 router = APIRouter()
 
+MAX_SIMULATED_ROWS = 2000  # intersections x timesteps a batch may simulate
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")  # model reload and the profiler are refused while unset
+
+
+def _require_admin(authorization: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN")
+    if not hmac.compare_digest(authorization or "", f"Bearer {ADMIN_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid admin token", headers={"WWW-Authenticate": "Bearer"})
+
+
+def _forecast_version():
+    # forecasts change when the table is rebuilt and when the horizon moves on an hour
+    generated_at = forecast_table.generated_at
+    return (generated_at.isoformat(), hour_bucket(datetime.utcnow()).isoformat()) if generated_at else None
+
+
+@cached(ttl=60)
+async def _forecasts(route_ids: tuple, hours_ahead: int, version):
+    generated_at = forecast_table.generated_at
+    return {
+        "predictions": await forecast_table.alookup(route_ids, horizon_buckets(hours_ahead)),
+        "generated_at": generated_at.isoformat() if generated_at else None
+    }
+
+
+def _require_routes(route_ids: Sequence[str], known: Sequence[str]):
+    unknown = [r for r in route_ids if r not in known]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Unknown route(s): {', '.join(unknown)}")
+
+
+def _utc_naive(ts: Optional[datetime]) -> Optional[datetime]:
+    # snapshots are stored as naive UTC
+    return ts.astimezone(timezone.utc).replace(tzinfo=None) if ts is not None and ts.tzinfo else ts
+
+
+async def _forecast_response(request: Request, route_ids: Sequence[str], hours_ahead: int):
+    _require_routes(route_ids, predictor_service.routes)
+    route_ids, version = tuple(route_ids), _forecast_version()
+    return await aencode_response(request, lambda: _forecasts(route_ids, hours_ahead, version),
+                                  key=("forecasts", route_ids, hours_ahead), version=version)
+
+
+@router.post("/traffic/predict/batch")
+async def predict_batch(req: BatchPredictionRequest, request: Request):
+    return await _forecast_response(request, req.route_ids or predictor_service.routes, req.hours_ahead)
+
 
 @router.get("/traffic/predict/{route_id}")
-def predict_route(route_id: str, hours_ahead: int = Query(4, ge=1, le=6)):
-    predictions = []
-    now = datetime.utcnow()
-    for h in range(1, hours_ahead + 1):
-        target = now + timedelta(hours=h)
-        level, confidence = predictor_service.predict_congestion(route_id, target)
-        predictions.append({
-            "route_id": route_id,
-            "target_time": target.isoformat(),
-            "congestion_level": level,
-            "confidence": confidence
-        })
-    return {"predictions": predictions}
+async def predict_route(request: Request, route_id: str, hours_ahead: int = Query(4, ge=1, le=6)):
+    return await _forecast_response(request, [route_id], hours_ahead)
+
+
+def _status_version(status: List[dict]) -> Optional[str]:
+    # every row of a snapshot carries its tick's timestamp
+    return status[0]["timestamp"] if status else None
 
 
 @router.get("/traffic/current-status")
-def current_status():
-    return {"status": get_current_status()}
+def current_status(request: Request):
+    status = get_current_status()
+    return encode_response(request, lambda: {"status": status}, version=_status_version(status))
+
+
+@router.get("/traffic/live")
+async def live_status(request: Request):
+    """Server-sent events: a full ``snapshot`` first, then a ``diff`` per collection tick."""
+    queue = live_feed.subscribe()
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+        finally:
+            live_feed.unsubscribe(queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+def _history_response(route_ids: List[str], start: Optional[datetime], end: Optional[datetime], resolution: str):
+    # SQLAlchemy is only imported once history is first requested
+    from ..services.snapshot_store import iter_history
+    from ..models.db_models import ROLLUP_RESOLUTIONS
+    if resolution not in ROLLUP_RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"resolution must be one of {sorted(ROLLUP_RESOLUTIONS)}")
+    _require_routes(route_ids, ROUTES)
+    end = _utc_naive(end) or datetime.utcnow()
+    start = _utc_naive(start) or end - timedelta(days=1)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="'from' must be earlier than 'to'")
+
+    def body():
+        yield json.dumps({"resolution": resolution, "from": start.isoformat(), "to": end.isoformat()})[:-1]
+        yield ', "points": ['
+        first = True
+        for batch in iter_history(route_ids, start, end, resolution):
+            chunk = json.dumps(batch)[1:-1]
+            if chunk:
+                yield chunk if first else "," + chunk
+                first = False
+        yield "]}"
+
+    return StreamingResponse(body(), media_type="application/json")
+
+
+@router.get("/traffic/history")
+def route_history_multi(route_ids: Optional[List[str]] = Query(None),
+                        start: Optional[datetime] = Query(None, alias="from"),
+                        end: Optional[datetime] = Query(None, alias="to"), resolution: str = "1h"):
+    return _history_response(route_ids or ROUTES, start, end, resolution)
+
+
+@router.get("/traffic/history/{route_id}")
+def route_history(route_id: str, start: Optional[datetime] = Query(None, alias="from"),
+                  end: Optional[datetime] = Query(None, alias="to"), resolution: str = "1h"):
+    return _history_response([route_id], start, end, resolution)
+
+
+@router.post("/signals/optimization/batch")
+async def optimize_signals_batch(req: BatchSignalRequest):
+    """Webster timing for every intersection x timestep in one pass, returned column-wise."""
+    try:
+        flows = np.array(req.flows, dtype=float)
+    except ValueError:
+        raise HTTPException(status_code=400,
+                            detail="flows must be a rectangular intersections x timesteps x approaches array")
+    if flows.ndim != 3 or flows.shape[2] != len(req.approaches):
+        raise HTTPException(status_code=400, detail="flows must be intersections x timesteps x approaches, "
+                                                    f"with {len(req.approaches)} approaches")
+    if (flows < 0).any():
+        raise HTTPException(status_code=400, detail="flows must be non-negative")
+    ids = req.intersection_ids or [f"intersection_{i}" for i in range(flows.shape[0])]
+    if len(ids) != flows.shape[0]:
+        raise HTTPException(status_code=400, detail="intersection_ids must match the first dimension of flows")
+    if req.simulate and flows.shape[0] * flows.shape[1] > MAX_SIMULATED_ROWS:
+        raise HTTPException(status_code=422, detail=f"simulate allows at most {MAX_SIMULATED_ROWS} "
+                                                    "intersections x timesteps per request")
+    plan = await run_cpu(webster_batch, flows)
+    improvement = None
+    if req.simulate:
+        improvement = await run_cpu(simulated_improvement, flows, plan["cycle_time"], plan["green_splits"])
+    splits = np.round(plan["green_splits"], 1)
+    timesteps = None
+    if req.start:
+        step = timedelta(minutes=req.interval_minutes)
+        timesteps = [(req.start + i * step).isoformat() for i in range(flows.shape[1])]
+    return {
+        "intersection_ids": ids,
+        "approaches": req.approaches,
+        "timesteps": timesteps,
+        "interval_minutes": req.interval_minutes,
+        "cycle_time": np.round(plan["cycle_time"], 1).tolist(),
+        "green_splits_seconds": {a: splits[:, :, j].tolist() for j, a in enumerate(req.approaches)},
+        "Y": np.round(plan["Y"], 3).tolist(),
+        "saturated": plan["saturated"].tolist(),
+        "expected_flow_improvement_pct": np.round(improvement * 100, 1).tolist() if improvement is not None else None,
+        "assumptions": {"saturation_flow_per_lane": SAT_FLOW, "lost_time_seconds": LOST_TIME},
+    }
 
 
 @router.get("/signals/optimization/{intersection_id}")
-def optimize_signal(intersection_id: str):
-    intersection = next((i for i in SAMPLE_INTERSECTIONS if i["id"] == intersection_id), None)
+async def optimize_signal(intersection_id: str):
+    intersection = INTERSECTIONS_BY_ID.get(intersection_id)
     if not intersection:
         raise HTTPException(status_code=404, detail="Intersection not found")
-    result = optimize_signal_timing(intersection)
-    return result
+    return await run_cpu(optimize_signal_timing, intersection)
+
+
+@router.get("/intersections/nearest")
+def nearest_intersections(lat: float = Query(..., ge=-90, le=90), lng: float = Query(..., ge=-180, le=180),
+                          k: int = Query(5, ge=1, le=100)):
+    return {"intersections": get_intersection_index().nearest(lat, lng, k)}
+
+
+@router.get("/intersections/bbox")
+def intersections_in_view(request: Request,
+                          min_lat: float = Query(..., ge=-90, le=90), min_lng: float = Query(..., ge=-180, le=180),
+                          max_lat: float = Query(..., ge=-90, le=90), max_lng: float = Query(..., ge=-180, le=180),
+                          limit: int = Query(1000, ge=1, le=10000)):
+    if min_lat > max_lat or min_lng > max_lng:
+        raise HTTPException(status_code=400, detail="min_lat/min_lng must not exceed max_lat/max_lng")
+    items, total = get_intersection_index().within(min_lat, min_lng, max_lat, max_lng, limit)
+    return encode_response(request, lambda: {"intersections": items, "count": total, "truncated": total > len(items)})
+
+
+@router.get("/signals/network-plan")
+@cached(ttl=900)
+async def network_signal_plan(progression_speed_kmh: float = Query(30, gt=5, le=80)):
+    # a thread, not run_cpu: plan_network fans its cycle search out over the CPU pool itself
+    return await asyncio.to_thread(plan_network, speed_kmh=progression_speed_kmh)
 
 
 @router.get("/infrastructure/roi-calculator")
+@cached(ttl=3600)
 def roi_calculator(project_cost: float, delay_hours: float = 1000, productivity_cost_per_hour: float = 1500,
                    expected_improvement: float = 0.15):
     return calculate_infrastructure_roi(project_cost, delay_hours, productivity_cost_per_hour, expected_improvement)
@@ -49,11 +232,69 @@ def new_project_analysis(payload: dict):
     return analyze_new_project(payload)
 
 
+@router.post("/infrastructure/scenario-analysis")
+async def scenario_analysis(req: ScenarioAnalysisRequest):
+    """Rank a portfolio of projects under swept and sampled cost / delay / improvement inputs."""
+    projects = [{k: v.dict() if hasattr(v, "dict") else v for k, v in p} for p in req.projects]
+    try:
+        return await run_cpu(analyze_scenarios, projects, req.samples, req.seed)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@cached(ttl=900)
+def _health_score(version: Optional[str]):
+    return {"traffic_health_score": get_traffic_health_score()}
+
+
 @router.get("/analytics/traffic-health-score")
 def traffic_health():
-    return {"traffic_health_score": get_traffic_health_score()}
+    # keyed on the tick, so the score changes together with the live feed
+    return _health_score(_status_version(get_current_status()))
 
 
 @router.get("/routes/alternative-suggestions/{origin}/{destination}")
-def alternative_suggestions(origin: str, destination: str):
-    return {"origin": origin, "destination": destination, "alternatives": get_alternative_routes(origin, destination)}
+@cached(ttl=60)
+def alternative_suggestions(origin: str, destination: str, k: int = Query(3, ge=1, le=5)):
+    try:
+        alternatives = get_alternative_routes(origin, destination, k)
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    return {"origin": origin, "destination": destination, "alternatives": alternatives}
+
+
+@router.get("/admin/model")
+def model_info():
+    return predictor_service.info()
+
+
+@router.post("/admin/model/reload", dependencies=[Depends(_require_admin)])
+def reload_model():
+    """Swap in the CURRENT model artifact and rebuild the forecast table from it."""
+    info = predictor_service.reload()
+    refresh_forecasts()
+    return info
+
+
+@router.get("/admin/profiler", dependencies=[Depends(_require_admin)])
+def profiler_status():
+    return profiler.status()
+
+
+@router.post("/admin/profiler/start", dependencies=[Depends(_require_admin)])
+def start_profiler(interval_ms: float = Query(10, ge=1, le=1000), duration_s: float = Query(60, gt=0, le=300)):
+    """Sample every thread's stack until stopped or ``duration_s`` elapses."""
+    profiler.start(interval_ms / 1000, duration_s)
+    return profiler.status()
+
+
+@router.post("/admin/profiler/stop", dependencies=[Depends(_require_admin)])
+def stop_profiler():
+    profiler.stop()
+    return profiler.status()
+
+
+@router.get("/admin/profiler/stacks", response_class=PlainTextResponse, dependencies=[Depends(_require_admin)])
+def profiler_stacks():
+    """Collapsed stacks (``frame;frame;frame count``) for flamegraph.pl or speedscope."""
+    return profiler.collapsed()
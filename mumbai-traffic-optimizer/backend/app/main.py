@@ -1,12 +1,74 @@
-from fastapi import FastAPI, Depends
+"""Application factory: this API under ``/api`` and the TrafficIQ Mumbai MVP under ``/mvp``."""
+import importlib.util
+import logging
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Optional
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from .api.routes import router as api_router
-from .utils.db import init_db, get_session
-from .services.data_collector import start_scheduler
+from .services.data_collector import start_scheduler, stop_scheduler
+from .utils.executor import shutdown_cpu_pool, warm_cpu_pool
+from .utils.metrics import CONTENT_TYPE, MetricsMiddleware, registry
 
+logger = logging.getLogger(__name__)
 
-def create_app() -> FastAPI:
+MVP_PREFIX = "/mvp"
+
+
+def _default_mvp_dir() -> Optional[Path]:
+    # the MVP checkout next to this repo; a shallow install such as /app/app/main.py has none
+    parents = Path(__file__).resolve().parents
+    return parents[3] / "trafficiq-mumbai" / "backend" if len(parents) > 3 else None
+
+
+MVP_DIR = Path(os.environ["MVP_BACKEND_DIR"]) if os.getenv("MVP_BACKEND_DIR") else _default_mvp_dir()
+
+
+class _LazyApp:
+    """ASGI app that builds its target on the first request it receives."""
+
+    def __init__(self, load):
+        self._load = load
+        self._app = None
+        self._lock = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if self._app is None:
+            with self._lock:
+                if self._app is None:
+                    self._app = self._load()
+        await self._app(scope, receive, send)
+
+
+def _load_mvp() -> FastAPI:
+    # the MVP's main.py imports its sibling ``models`` as a top-level module
+    if str(MVP_DIR) not in sys.path:
+        sys.path.append(str(MVP_DIR))
+    spec = importlib.util.spec_from_file_location("trafficiq_mvp", MVP_DIR / "main.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+
+def _warm_up(app: FastAPI):
+    from .utils.db import init_db
+    try:
+        init_db()
+        start_scheduler()
+        warm_cpu_pool()
+    except Exception:
+        logger.exception("Background start-up failed")
+        return
+    app.state.ready = True
+
+
+def create_app(mount_mvp: bool = True) -> FastAPI:
     app = FastAPI(title="TrafficIQ - Mumbai Traffic Optimization Engine", version="0.1.0")
+    app.state.ready = False
 
     origins = [
         "http://localhost",
@@ -22,13 +84,29 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    app.add_middleware(MetricsMiddleware)
 
     @app.on_event("startup")
     async def startup_event():
-        init_db()
-        start_scheduler(app)
+        threading.Thread(target=_warm_up, args=(app,), name="warm-up", daemon=True).start()
+
+    @app.on_event("shutdown")
+    async def shutdown_event():  # pragma: no cover
+        stop_scheduler()
+        shutdown_cpu_pool()
+
+    @app.get("/api/health")
+    def health():
+        """Liveness; ``ready`` turns true once the database and scheduler are up."""
+        return {"status": "ok", "ready": app.state.ready}
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
 
     app.include_router(api_router, prefix="/api")
+    if mount_mvp and MVP_DIR is not None and (MVP_DIR / "main.py").exists():
+        app.mount(MVP_PREFIX, _LazyApp(_load_mvp))
     return app
 
 
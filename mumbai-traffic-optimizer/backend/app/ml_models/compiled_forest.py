@@ -0,0 +1,127 @@
+"""Flat, array-based RandomForestRegressor inference over memory-mapped, versioned artifacts."""
+from __future__ import annotations
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+import json
+import os
+import shutil
+import numpy as np
+
+ARTIFACT_FORMAT = 1
+ARRAY_NAMES = ("feature", "threshold", "left", "right", "value", "roots")
+CURRENT_FILE = "CURRENT"
+
+
+class CompiledForest:
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray, right: np.ndarray,
+                 value: np.ndarray, roots: np.ndarray, max_depth: int, n_features: int):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.metadata: Dict = {}
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Return the global leaf index reached by each row in each tree, shape (n_rows, n_trees)."""
+        # sklearn compares float32 inputs against float64 thresholds; match it for parity
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])[:, None]
+        idx = np.broadcast_to(self.roots, (X.shape[0], self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[idx]] <= self.threshold[idx]
+            idx = np.where(go_left, self.left[idx], self.right[idx])
+        return idx
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.value[self.apply(X)].mean(axis=1)
+
+    def save_artifact(self, root: Path, metadata: Optional[Dict] = None, version: Optional[str] = None) -> str:
+        """Write a new artifact version under ``root`` and make it CURRENT; returns the version."""
+        root = Path(root)
+        version = version or datetime.utcnow().strftime("%Y%m%dT%H%M%S%fZ")
+        tmp = root / f".tmp-{version}"
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        tmp.mkdir(parents=True)
+        for name in ARRAY_NAMES:
+            np.save(tmp / f"{name}.npy", np.ascontiguousarray(getattr(self, name)))
+        meta = dict(metadata or {})
+        meta.update({
+            "format": ARTIFACT_FORMAT, "version": version, "created_at": datetime.utcnow().isoformat(),
+            "n_trees": self.n_trees, "n_nodes": int(len(self.feature)), "max_depth": self.max_depth,
+            "n_features": self.n_features,
+        })
+        (tmp / "metadata.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        os.replace(tmp, root / version)
+        pointer = root / f".{CURRENT_FILE}.tmp"
+        pointer.write_text(version, encoding="utf-8")
+        os.replace(pointer, root / CURRENT_FILE)
+        return version
+
+    @classmethod
+    def load_artifact(cls, path: Path, mmap: bool = True) -> "CompiledForest":
+        path = Path(path)
+        meta = read_metadata(path)
+        if meta.get("format") != ARTIFACT_FORMAT:
+            raise ValueError(f"Unsupported model artifact format {meta.get('format')!r} in {path}")
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode="r" if mmap else None) for name in ARRAY_NAMES}
+        forest = cls(max_depth=meta["max_depth"], n_features=meta["n_features"], **arrays)
+        forest.metadata = meta
+        return forest
+
+
+def read_metadata(path: Path) -> Dict:
+    return json.loads((Path(path) / "metadata.json").read_text(encoding="utf-8"))
+
+
+def current_version(root: Path) -> Optional[str]:
+    try:
+        return (Path(root) / CURRENT_FILE).read_text(encoding="utf-8").strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def compile_forest(model) -> CompiledForest:
+    """Flatten a fitted single-output RandomForestRegressor into a CompiledForest."""
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for est in model.estimators_:
+        tree = est.tree_
+        n = tree.node_count
+        node_ids = np.arange(offset, offset + n, dtype=np.int64)
+        is_leaf = tree.children_left == -1
+        # leaves point to themselves, so every row can take exactly max_depth steps
+        left = np.where(is_leaf, node_ids, tree.children_left + offset)
+        right = np.where(is_leaf, node_ids, tree.children_right + offset)
+        features.append(np.where(is_leaf, 0, tree.feature).astype(np.int64))
+        thresholds.append(tree.threshold.astype(np.float64))
+        lefts.append(left.astype(np.int64))
+        rights.append(right.astype(np.int64))
+        values.append(tree.value[:, 0, 0].astype(np.float64))
+        roots.append(offset)
+        offset += n
+        max_depth = max(max_depth, tree.max_depth)
+    return CompiledForest(
+        np.concatenate(features), np.concatenate(thresholds), np.concatenate(lefts), np.concatenate(rights),
+        np.concatenate(values), np.array(roots, dtype=np.int64), max_depth, model.n_features_in_
+    )
+
+
+def check_parity(model, forest: CompiledForest, X, atol: float = 1e-9) -> float:
+    """Assert the compiled forest reproduces ``model.predict`` on X; return the max abs error."""
+    expected = np.asarray(model.predict(X), dtype=np.float64)
+    actual = forest.predict(np.asarray(X, dtype=np.float64))
+    err = float(np.max(np.abs(expected - actual))) if len(expected) else 0.0
+    if err > atol:
+        raise AssertionError(f"Compiled forest diverges from model.predict (max abs error {err:.3g})")
+    return err
@@ -0,0 +1,113 @@
+"""Running route x hour x weather congestion statistics (Welford), updated in O(rows) per tick."""
+from __future__ import annotations
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+import os
+import numpy as np
+
+# same order as the predictor's sampled weather index (0 Clear, 1 Rain, 2 Clouds)
+WEATHERS = ("Clear", "Rain", "Clouds")
+WEATHER_INDEX = {w: i for i, w in enumerate(WEATHERS)}
+
+
+class OnlineModel:
+    def __init__(self, route_ids: Sequence[str]):
+        self.route_ids = list(route_ids)
+        self.route_index = {r: i for i, r in enumerate(self.route_ids)}
+        shape = (len(self.route_ids), 24, len(WEATHERS))
+        self.count = np.zeros(shape, dtype=np.int64)
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+        # exponentially weighted mean absolute error of the online and the batch forecasts
+        self.online_mae: Optional[float] = None
+        self.batch_mae: Optional[float] = None
+        self.evaluated_ticks = 0
+        self.active = False
+        self.last_tick: Optional[str] = None
+
+    def cells(self, route_ids: Sequence[str], hours: Sequence[int], weathers: Sequence[int]) -> np.ndarray:
+        """Flat cell index per row; -1 for routes this model does not track and weathers of -1."""
+        r = np.array([self.route_index.get(route_id, -1) for route_id in route_ids], dtype=np.int64)
+        w = np.asarray(weathers, dtype=np.int64)
+        flat = np.ravel_multi_index((np.maximum(r, 0), np.asarray(hours, dtype=np.int64), np.maximum(w, 0)),
+                                    self.count.shape)
+        return np.where((r >= 0) & (w >= 0), flat, -1)
+
+    def update(self, cells: np.ndarray, values: np.ndarray):
+        """Fold one batch of observations into the running statistics."""
+        keep = cells >= 0
+        cells, values = cells[keep], np.asarray(values, dtype=float)[keep]
+        if not len(cells):
+            return
+        touched, inverse = np.unique(cells, return_inverse=True)
+        n_b = np.bincount(inverse).astype(float)
+        mean_b = np.bincount(inverse, weights=values) / n_b
+        m2_b = np.bincount(inverse, weights=(values - mean_b[inverse]) ** 2)
+
+        count, mean, m2 = self.count.reshape(-1), self.mean.reshape(-1), self.m2.reshape(-1)
+        n_a = count[touched].astype(float)
+        n = n_a + n_b
+        delta = mean_b - mean[touched]
+        mean[touched] += delta * n_b / n
+        m2[touched] += m2_b + delta ** 2 * n_a * n_b / n
+        count[touched] = n.astype(np.int64)
+
+    def predict(self, cells: np.ndarray, min_count: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(mean, sample variance, covered) per row; rows with fewer than ``min_count`` observations are not covered."""
+        safe = np.maximum(cells, 0)
+        count = self.count.reshape(-1)[safe]
+        covered = (cells >= 0) & (count >= max(min_count, 2))
+        mean = self.mean.reshape(-1)[safe]
+        variance = self.m2.reshape(-1)[safe] / np.maximum(count - 1, 1)
+        return mean, variance, covered
+
+    def track_error(self, online_err: float, batch_err: float, alpha: float):
+        if self.online_mae is None:
+            self.online_mae, self.batch_mae = online_err, batch_err
+        else:
+            self.online_mae += alpha * (online_err - self.online_mae)
+            self.batch_mae += alpha * (batch_err - self.batch_mae)
+        self.evaluated_ticks += 1
+
+    def stats(self):
+        return {
+            "active": self.active,
+            "observations": int(self.count.sum()),
+            "cells_observed": int((self.count > 0).sum()),
+            "cells": int(self.count.size),
+            "evaluated_ticks": self.evaluated_ticks,
+            "online_mae": None if self.online_mae is None else round(self.online_mae, 4),
+            "batch_mae": None if self.batch_mae is None else round(self.batch_mae, 4),
+            "last_tick": self.last_tick,
+        }
+
+    def save(self, path: Path):
+        """Write the state atomically, so a starting worker never loads a half-written file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, route_ids=np.array(self.route_ids), count=self.count, mean=self.mean, m2=self.m2,
+                     errors=np.array([np.nan if self.online_mae is None else self.online_mae,
+                                      np.nan if self.batch_mae is None else self.batch_mae,
+                                      self.evaluated_ticks, self.active], dtype=float),
+                     last_tick=np.array(self.last_tick or ""))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path, route_ids: Sequence[str]) -> "OnlineModel":
+        """Saved state for ``route_ids``; routes the file does not know start empty."""
+        model = cls(route_ids)
+        with np.load(Path(path)) as data:
+            saved = {r: i for i, r in enumerate(data["route_ids"].tolist())}
+            shared = [(model.route_index[r], saved[r]) for r in model.route_ids if r in saved]
+            if shared:
+                dst, src = map(list, zip(*shared))
+                for name in ("count", "mean", "m2"):
+                    getattr(model, name)[dst] = data[name][src]
+            online_mae, batch_mae, evaluated, active = data["errors"].tolist()
+            if not np.isnan(online_mae):
+                model.online_mae, model.batch_mae = online_mae, batch_mae
+            model.evaluated_ticks, model.active = int(evaluated), bool(active)
+            model.last_tick = str(data["last_tick"]) or None
+        return model
@@ -1,12 +1,20 @@
 """Training script to build a simple RandomForest model on synthetic data."""
 from pathlib import Path
+import argparse
+import time
+import numpy as np
 import pandas as pd
-import random
 from datetime import datetime, timedelta
 from sklearn.ensemble import RandomForestRegressor
 import pickle
 
+try:
+    from .compiled_forest import compile_forest, check_parity
+except ImportError:  # executed as a script
+    from compiled_forest import compile_forest, check_parity
+
 OUT_PATH = Path(__file__).resolve().parent / "traffic_model.pkl"
+ARTIFACTS_DIR = OUT_PATH.parent / "artifacts"
 
 ROUTES = [
     "Western Express Highway",
@@ -18,50 +26,86 @@ ROUTES = [
 ]
 
 
-def synthesize(n_days: int = 14):
-    rows = []
-    now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
-    for d in range(n_days):
-        day = now - timedelta(days=d)
-        for hour in range(24):
-            ts = day.replace(hour=hour)
-            for r in ROUTES:
-                dow = ts.weekday()
-                is_weekend = 1 if dow >= 5 else 0
-                is_peak = 1 if (8 <= hour <= 10 or 18 <= hour <= 20) and not is_weekend else 0
-                weather = random.choice(["Clear", "Rain", "Clouds"])
-                rainfall = 1 if weather == "Rain" else 0
-                temperature = 30 + random.random() * 5
-                is_festival = 1 if random.random() < 0.03 else 0
-                hist_avg = 5 + (2 if is_peak else 0) + (1 if rainfall else 0)
-                congestion = hist_avg + random.uniform(-1, 1) + is_festival * 1.2
-                congestion = max(1, min(10, congestion))
-                rows.append({
-                    "hour": hour,
-                    "dow": dow,
-                    "month": ts.month,
-                    "is_weekend": is_weekend,
-                    "is_peak": is_peak,
-                    "rainfall": rainfall,
-                    "temperature": temperature,
-                    "is_festival": is_festival,
-                    "hist_avg": hist_avg,
-                    "congestion": congestion
-                })
-    return pd.DataFrame(rows)
+def synthesize(n_days: int = 14, seed: int | None = None, day_offset: int = 0, now: datetime | None = None):
+    """One row per route per hour for ``n_days`` days back from today (minus ``day_offset`` days)."""
+    rng = np.random.default_rng(seed)
+    now = (now or datetime.utcnow()).replace(minute=0, second=0, microsecond=0)
+    n_routes = len(ROUTES)
+    days = np.datetime64(now.date(), "D") - np.arange(day_offset, day_offset + n_days)
+    day = np.repeat(days, 24 * n_routes)
+    hour = np.tile(np.repeat(np.arange(24), n_routes), n_days)
+    n = len(hour)
+
+    dow = (day.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+    month = day.astype("datetime64[M]").astype(np.int64) % 12 + 1
+    is_weekend = (dow >= 5).astype(np.int64)
+    is_peak = ((((8 <= hour) & (hour <= 10)) | ((18 <= hour) & (hour <= 20))) & (is_weekend == 0)).astype(np.int64)
+    rainfall = (rng.integers(0, 3, n) == 1).astype(np.int64)  # Clear / Rain / Clouds
+    temperature = 30 + rng.random(n) * 5
+    is_festival = (rng.random(n) < 0.03).astype(np.int64)
+    hist_avg = 5 + 2 * is_peak + rainfall
+    congestion = np.clip(hist_avg + rng.uniform(-1, 1, n) + is_festival * 1.2, 1, 10)
+    return pd.DataFrame({
+        "hour": hour,
+        "dow": dow,
+        "month": month,
+        "is_weekend": is_weekend,
+        "is_peak": is_peak,
+        "rainfall": rainfall,
+        "temperature": temperature,
+        "is_festival": is_festival,
+        "hist_avg": hist_avg,
+        "congestion": congestion
+    })
 
 
-def train():
-    df = synthesize()
-    X = df.drop(columns=["congestion"])
-    y = df["congestion"]
-    model = RandomForestRegressor(n_estimators=60, random_state=42)
-    model.fit(X, y)
+def train(n_days: int = 14, n_estimators: int = 60, n_jobs: int | None = None, chunk_days: int | None = None,
+          seed: int = 42):
+    """Fit (in ``chunk_days`` chunks if given), compile and save the model; returns a dict of timings."""
+    # warm_start skips a fit that adds no trees, so there can be no more chunks than trees
+    chunk_days = max(min(chunk_days or n_days, n_days), -(-n_days // n_estimators))
+    n_chunks = -(-n_days // chunk_days)
+    model = RandomForestRegressor(n_estimators=0, random_state=seed, n_jobs=n_jobs, warm_start=True)
+    now = datetime.utcnow()
+    gen_s = fit_s = 0.0
+    rows = 0
+    for i in range(n_chunks):
+        t0 = time.perf_counter()
+        df = synthesize(min(chunk_days, n_days - i * chunk_days), seed=seed + i, day_offset=i * chunk_days, now=now)
+        X = df.drop(columns=["congestion"])
+        y = df["congestion"]
+        t1 = time.perf_counter()
+        model.n_estimators = n_estimators * (i + 1) // n_chunks
+        model.fit(X, y)
+        t2 = time.perf_counter()
+        gen_s += t1 - t0
+        fit_s += t2 - t1
+        rows += len(df)
     OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
     with open(OUT_PATH, "wb") as f:
         pickle.dump(model, f)
+    forest = compile_forest(model)
+    err = check_parity(model, forest, X)
+    version = forest.save_artifact(ARTIFACTS_DIR, {
+        "feature_columns": list(X.columns), "training_rows": rows, "training_days": n_days, "parity_error": err,
+    })
     print(f"Model saved to {OUT_PATH}")
+    print(f"Compiled artifact {version} saved to {ARTIFACTS_DIR} ({forest.n_trees} trees, max parity error {err:.2e})")
+    return {"rows": rows, "generate_s": gen_s, "fit_s": fit_s, "rows_per_s": rows / gen_s if gen_s else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the congestion RandomForest on synthetic data")
+    parser.add_argument("--days", type=int, default=14, help="days of hourly data to synthesize")
+    parser.add_argument("--trees", type=int, default=60)
+    parser.add_argument("--n-jobs", type=int, default=None, help="parallel tree fitting (-1 = all cores)")
+    parser.add_argument("--chunk-days", type=int, default=None, help="generate/fit this many days at a time")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    stats = train(args.days, args.trees, args.n_jobs, args.chunk_days, args.seed)
+    print(f"Generated {stats['rows']:,} rows in {stats['generate_s']:.3f}s ({stats['rows_per_s']:,.0f} rows/s)")
+    print(f"Fitted in {stats['fit_s']:.3f}s")
 
 
 if __name__ == "__main__":
-    train()
+    main()
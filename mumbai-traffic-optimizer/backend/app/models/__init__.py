@@ -0,0 +1 @@
+"""Database models."""
@@ -0,0 +1,46 @@
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String
+from sqlalchemy.orm import declarative_base
+
+Base = declarative_base()
+
+
+class RouteSnapshot(Base):
+    """One raw reading per route per collection tick."""
+    __tablename__ = "route_snapshots"
+
+    id = Column(Integer, primary_key=True)
+    route_id = Column(String(64), nullable=False)
+    timestamp = Column(DateTime, nullable=False)
+    congestion_level = Column(Float, nullable=False)
+    average_speed = Column(Float)
+    delay_minutes = Column(Float)
+    weather = Column(String(16))
+
+    __table_args__ = (
+        Index("ix_route_snapshots_route_ts", "route_id", "timestamp"),
+        Index("ix_route_snapshots_ts", "timestamp"),
+    )
+
+
+class RouteRollup(Base):
+    """Downsampled readings; ``resolution`` is one of ``ROLLUP_RESOLUTIONS``."""
+    __tablename__ = "route_rollups"
+
+    id = Column(Integer, primary_key=True)
+    resolution = Column(String(8), nullable=False)
+    route_id = Column(String(64), nullable=False)
+    bucket_start = Column(DateTime, nullable=False)
+    samples = Column(Integer, nullable=False)
+    congestion_mean = Column(Float, nullable=False)
+    congestion_min = Column(Float, nullable=False)
+    congestion_max = Column(Float, nullable=False)
+    average_speed_mean = Column(Float)
+    delay_minutes_mean = Column(Float)
+
+    __table_args__ = (
+        Index("ux_route_rollups_res_route_bucket", "resolution", "route_id", "bucket_start", unique=True),
+        Index("ix_route_rollups_res_bucket", "resolution", "bucket_start"),
+    )
+
+
+ROLLUP_RESOLUTIONS = {"15m": 15, "1h": 60}
@@ -0,0 +1,26 @@
+"""Production launcher: uvicorn worker processes, each with a ``--cpu-workers`` process pool."""
+import argparse
+import os
+
+import uvicorn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TrafficIQ API server")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+                        help="uvicorn worker processes (default: WEB_CONCURRENCY or the CPU count)")
+    parser.add_argument("--cpu-workers", type=int, default=None,
+                        help="CPU pool processes per worker (sets CPU_WORKERS; 0 runs CPU work in threads)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    if args.cpu_workers is not None:
+        # read by app.utils.executor when each worker imports the app
+        os.environ["CPU_WORKERS"] = str(args.cpu_workers)
+    uvicorn.run("app.main:app", host=args.host, port=args.port, workers=args.workers,
+                proxy_headers=True, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()
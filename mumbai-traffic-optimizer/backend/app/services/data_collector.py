@@ -1,9 +1,22 @@
-"""Simulated data collection & scheduling."""
+"""Traffic data collection & scheduling."""
+import asyncio
 from datetime import datetime
-import random
-from typing import List, Dict
-from apscheduler.schedulers.background import BackgroundScheduler
-from fastapi import FastAPI
+import logging
+import os
+from typing import TYPE_CHECKING, List, Dict, Optional
+from .forecast_store import refresh_forecasts
+from .live_feed import live_feed
+from .route_graph import get_road_graph
+from .traffic_predictor import predictor_service
+from ..utils.cache import cache
+from ..utils.leader import scheduler_lock
+from ..utils.metrics import instrument_scheduler, span
+
+if TYPE_CHECKING:
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from .sources import AsyncCollector
+
+logger = logging.getLogger(__name__)
 
 ROUTES = [
     "Western Express Highway",
@@ -14,36 +27,59 @@ ROUTES = [
     "Jogeshwari-Vikhroli Link Road",
 ]
 
+COLLECTOR_MODE = os.getenv("COLLECTOR_MODE", "inline")
+COLLECT_INTERVAL_MINUTES = 15
+LATEST_KEY = ("traffic", "latest_status")
+
 _LATEST_STATUS: Dict[str, Dict] = {}
+_collector: Optional["AsyncCollector"] = None
 
 
-def collect_once():
-    now = datetime.utcnow()
-    for r in ROUTES:
-        hour = now.hour
-        dow = now.weekday()
-        weekend = dow >= 5
-        peak = (8 <= hour <= 10 or 18 <= hour <= 20) and not weekend
-        base = 4 + (2 if peak else 0)
-        weather = random.choice(["Clear", "Rain", "Clouds"])
-        if weather == "Rain":
-            base += 1.2
-        if random.random() < 0.04:
-            base += 1.5
-        congestion = max(1, min(10, base + random.uniform(-1, 1)))
-        _LATEST_STATUS[r] = {
-            "route_id": r,
-            "timestamp": now.isoformat(),
-            "congestion_level": round(congestion, 2),
-            "average_speed": round(50 - congestion * 3, 1),
-            "delay_minutes": round(congestion * 2.5, 1),
-            "weather": weather,
-        }
+def get_collector() -> "AsyncCollector":
+    global _collector
+    if _collector is None:
+        from .sources import AsyncCollector, build_sources
+        sources = build_sources(
+            os.getenv("TRAFFIC_SOURCES", "simulated"),
+            http_url=os.getenv("TRAFFIC_HTTP_URL"),
+            replay_file=os.getenv("TRAFFIC_REPLAY_FILE"),
+            timeout=float(os.getenv("TRAFFIC_SOURCE_TIMEOUT", "2.0")),
+        )
+        _collector = AsyncCollector(sources, ROUTES, concurrency=int(os.getenv("TRAFFIC_CONCURRENCY", "8")))
+    return _collector
+
+
+def apply_status(rows: List[Dict]):
+    """Swap in one tick's rows and reweight the road graph edges of routes that changed."""
+    global _LATEST_STATUS
+    _LATEST_STATUS = {r["route_id"]: r for r in rows}
+    get_road_graph().update_congestion({r["route_id"]: r["congestion_level"] for r in rows})
+
+
+@span("collect_once")
+def collect_once() -> List[Dict]:
+    rows = asyncio.run(get_collector().collect())
+    apply_status(rows)
+    return rows
+
+
+@span("store_tick")
+def store_tick(rows: List[Dict]):
+    """Persist a tick and share it with the other processes."""
+    from .snapshot_store import write_snapshots
+    try:
+        write_snapshots(rows)
+    except Exception:
+        logger.exception("Failed to persist traffic snapshots")
+    cache.set(LATEST_KEY, rows, ttl=COLLECT_INTERVAL_MINUTES * 60 * 2)
 
 
 def get_current_status() -> List[Dict]:
     if not _LATEST_STATUS:
-        collect_once()
+        if COLLECTOR_MODE == "external" or _following:
+            follow_tick()
+        if not _LATEST_STATUS and COLLECTOR_MODE != "external":
+            collect_once()
     return list(_LATEST_STATUS.values())
 
 
@@ -55,24 +91,95 @@ def get_traffic_health_score() -> int:
     return max(0, min(100, int(100 - (avg_congestion - 1) * (100 / 9))))
 
 
-def get_alternative_routes(origin: str, destination: str):
-    status = sorted(get_current_status(), key=lambda x: x["congestion_level"])
-    return [s["route_id"] for s in status if origin.lower() not in s["route_id"].lower()][:3]
+@span("alternative_routes")
+def get_alternative_routes(origin: str, destination: str, k: int = 3) -> List[Dict]:
+    """Up to ``k`` fastest paths between two road-graph locations under current congestion."""
+    get_current_status()  # make sure the graph carries at least one tick
+    return get_road_graph().alternatives(origin, destination, k)
 
 
-_scheduler: BackgroundScheduler | None = None
+def _status_changed():
+    status = get_current_status()
+    # every process learns each tick, only the scheduler leader writes the shared state file
+    predictor_service.observe(status, persist=scheduler_lock.held)
+    live_feed.publish(status, get_traffic_health_score())
+    refresh_forecasts()
 
 
-def start_scheduler(app: FastAPI):
-    global _scheduler
+def collection_tick():
+    store_tick(collect_once())
+    _status_changed()
+
+
+def follow_tick():
+    """Pick up the latest tick published by an external collector, if it is new."""
+    rows = cache.get(LATEST_KEY)
+    if not rows:
+        from .snapshot_store import load_latest_snapshots
+        try:
+            rows = load_latest_snapshots()
+        except Exception:
+            logger.exception("Failed to load latest snapshots")
+            return
+    if not rows:
+        return
+    current = next(iter(_LATEST_STATUS.values()), None)
+    if current is not None and current["timestamp"] == rows[0]["timestamp"]:
+        return
+    apply_status(rows)
+    _status_changed()
+
+
+_scheduler: Optional["BackgroundScheduler"] = None
+_following = False
+
+
+def _add_collection_jobs(now: datetime):
+    from .snapshot_store import maintain_rollups
+    _scheduler.add_job(collection_tick, "interval", minutes=COLLECT_INTERVAL_MINUTES, id="collect_job",
+                       next_run_time=now)
+    _scheduler.add_job(maintain_rollups, "interval", minutes=15, id="rollup_job")
+
+
+def follow_external():
+    """Follower job with an external collector; the lock holder still persists the online model."""
+    scheduler_lock.acquire()
+    follow_tick()
+
+
+def follow_or_lead():
+    """Follower job: take over collection if the leader is gone, else pick up its latest tick."""
+    global _following
+    if scheduler_lock.acquire():
+        logger.info("Process %d took over as scheduler leader", os.getpid())
+        _following = False
+        _scheduler.remove_job("follow_job")
+        _add_collection_jobs(datetime.utcnow())
+        return
+    follow_tick()
+
+
+def start_scheduler():
+    global _scheduler, _following
     if _scheduler:
         return
+    from apscheduler.schedulers.background import BackgroundScheduler
     _scheduler = BackgroundScheduler(timezone="UTC")
-    _scheduler.add_job(collect_once, "interval", minutes=15, id="collect_job")
-    collect_once()
+    instrument_scheduler(_scheduler)
+    now = datetime.utcnow()
+    if COLLECTOR_MODE == "external":
+        _scheduler.add_job(follow_external, "interval", minutes=1, id="follow_job", next_run_time=now)
+    elif scheduler_lock.acquire():
+        _add_collection_jobs(now)
+    else:
+        _following = True
+        _scheduler.add_job(follow_or_lead, "interval", minutes=1, id="follow_job", next_run_time=now)
     _scheduler.start()
 
-    @app.on_event("shutdown")
-    async def shutdown():  # pragma: no cover
-        if _scheduler:
-            _scheduler.shutdown()
+
+def stop_scheduler():
+    global _scheduler
+    if _scheduler:
+        _scheduler.shutdown()
+        _scheduler = None
+    scheduler_lock.release()
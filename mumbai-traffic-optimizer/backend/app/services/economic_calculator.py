@@ -1,4 +1,5 @@
-from typing import Dict
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
 
 
 def calculate_infrastructure_roi(project_cost: float, delay_hours: float, productivity_cost_per_hour: float, expected_improvement: float):
@@ -27,3 +28,223 @@ def analyze_new_project(payload: Dict):
         "priority_score": round((expected_improvement * 100) / (base["payback_years"] or 10), 2)
     })
     return base
+
+
+# --- Portfolio / sensitivity analysis -------------------------------------
+#
+# Each input of the ROI model can be given as a plain number, a range
+# (``{"min", "max", "steps"}``) or a distribution (``{"dist": ...}``). One
+# request evaluates, per project, the full grid of range steps, a Monte-Carlo
+# sample of every uncertain input and a one-at-a-time tornado, all as array
+# arithmetic over a scenario axis.
+
+HORIZON_YEARS = 10
+DAYS_PER_YEAR = 365
+PARAMETERS = ("project_cost", "delay_hours", "productivity_cost_per_hour", "expected_improvement", "location_factor")
+DEFAULTS = {"delay_hours": 1000.0, "productivity_cost_per_hour": 1500.0, "expected_improvement": 0.15}
+DISTRIBUTIONS = ("uniform", "triangular", "normal", "lognormal")
+PERCENTILES = (5, 25, 50, 75, 95)
+TORNADO_QUANTILES = (0.10, 0.90)
+MAX_SWEEP_SCENARIOS = 1_000_000
+MIN_PROJECT_COST = 1.0
+# Same congestion / strategic-importance factors the MVP calculator uses
+LOCATION_FACTORS = {
+    "Andheri": 1.15, "Bandra": 1.12, "Dadar": 1.14, "Powai": 1.10, "Goregaon": 1.08,
+    "Worli": 1.11, "Sion": 1.09, "Kurla": 1.13, "Colaba": 0.95, "BKC": 1.16,
+}
+
+
+def roi_arrays(project_cost, delay_hours, productivity_cost_per_hour, expected_improvement, location_factor=1.0):
+    """``calculate_infrastructure_roi`` over broadcast arrays: (annual_savings, roi_percent_10yr, payback_years)."""
+    cost = np.asarray(project_cost, dtype=float)
+    annual_savings = (np.asarray(delay_hours, dtype=float) * productivity_cost_per_hour * location_factor
+                      * expected_improvement * DAYS_PER_YEAR)
+    roi = (annual_savings * HORIZON_YEARS - cost) / cost * 100
+    with np.errstate(divide="ignore"):
+        payback = np.where(annual_savings > 0, cost / annual_savings, np.inf)
+    return annual_savings, roi, payback
+
+
+class Parameter:
+    """One ROI input: a base value, sweep grid, tornado bounds and a sampler."""
+
+    def __init__(self, name: str, spec: Any):
+        self.name = name
+        spec = {k: v for k, v in spec.items() if v is not None} if isinstance(spec, dict) else {"value": spec}
+        self.spec = spec
+        self.dist = spec.get("dist")
+        steps = int(spec.get("steps", 5))
+        if self.dist is None and "min" in spec and "max" in spec:
+            # a bare range is swept on an even grid and sampled uniformly
+            lo, hi = float(spec["min"]), float(spec["max"])
+            if lo > hi:
+                raise ValueError(f"{name}: min must not exceed max")
+            self.dist = "uniform"
+            self.grid = np.linspace(lo, hi, max(steps, 1))
+            self.low, self.high = lo, hi
+            self.base = float(spec.get("value", (lo + hi) / 2))
+        elif self.dist is None:
+            if "value" not in spec:
+                raise ValueError(f"{name}: give a value, a min/max range or a distribution")
+            self.base = self.low = self.high = float(spec["value"])
+            self.grid = np.array([self.base])
+        elif self.dist in DISTRIBUTIONS:
+            # quantiles of a large fixed-seed sample stand in for the inverse CDF
+            reference = self._clip(self._draw(np.random.default_rng(0), 20000))
+            self.grid = np.quantile(reference, np.linspace(0.05, 0.95, steps) if steps > 1 else [0.5])
+            self.low, self.high = np.quantile(reference, TORNADO_QUANTILES).tolist()
+            self.base = float(spec.get("value", np.median(reference)))
+        else:
+            raise ValueError(f"{name}: dist must be one of {', '.join(DISTRIBUTIONS)}")
+
+    def _draw(self, rng: np.random.Generator, size) -> np.ndarray:
+        s = self.spec
+        try:
+            if self.dist == "uniform":
+                return rng.uniform(float(s["min"]), float(s["max"]), size)
+            if self.dist == "triangular":
+                return rng.triangular(float(s["min"]), float(s["mode"]), float(s["max"]), size)
+            mean, sd = float(s["mean"]), float(s["sd"])
+        except KeyError as missing:
+            raise ValueError(f"{self.name}: {self.dist} distribution needs {missing}")
+        if sd < 0:
+            raise ValueError(f"{self.name}: sd must be non-negative")
+        if self.dist == "normal":
+            return rng.normal(mean, sd, size)
+        if mean <= 0:
+            raise ValueError(f"{self.name}: lognormal mean must be positive")
+        sigma2 = np.log1p((sd / mean) ** 2)
+        return rng.lognormal(np.log(mean) - sigma2 / 2, np.sqrt(sigma2), size)
+
+    def _clip(self, values: np.ndarray) -> np.ndarray:
+        # optional min/max truncate the unbounded distributions
+        values = np.clip(values, float(self.spec.get("min", -np.inf)), float(self.spec.get("max", np.inf)))
+        if self.name == "expected_improvement":
+            return np.clip(values, 0.0, 1.0)
+        if self.name == "project_cost":
+            return np.maximum(values, MIN_PROJECT_COST)
+        return np.maximum(values, 0.0)
+
+    @property
+    def uncertain(self) -> bool:
+        return self.low != self.high
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        if not self.uncertain:
+            return np.full(size, self.base)
+        return self._clip(self._draw(rng, size))
+
+
+def _project_parameters(project: Dict) -> Dict[str, Parameter]:
+    if project.get("project_cost") is None:
+        raise ValueError(f"{project.get('name', 'project')}: project_cost is required")
+    specs = dict(DEFAULTS)
+    specs["location_factor"] = LOCATION_FACTORS.get(project.get("location"), 1.0)
+    specs.update({k: project[k] for k in PARAMETERS if project.get(k) is not None})
+    params = {name: Parameter(name, specs[name]) for name in PARAMETERS}
+    if params["project_cost"].low < MIN_PROJECT_COST:
+        raise ValueError(f"{project.get('name', 'project')}: project_cost must be > 0")
+    return params
+
+
+def _percentiles(values: np.ndarray, axis: int = -1) -> np.ndarray:
+    # "lower" keeps infinite paybacks from turning into nan through interpolation
+    return np.percentile(values, PERCENTILES, axis=axis, method="lower")
+
+
+def _finite(value: float, digits: int = 2) -> Optional[float]:
+    return round(float(value), digits) if np.isfinite(value) else None
+
+
+def _bands(values: np.ndarray, digits: int = 2) -> Dict[str, Optional[float]]:
+    return {f"p{p}": _finite(v, digits) for p, v in zip(PERCENTILES, values)}
+
+
+def _sweep(params: Dict[str, Parameter]) -> Dict:
+    grids = np.ix_(*(params[name].grid for name in PARAMETERS))
+    _, roi, payback = roi_arrays(*grids)
+    roi, payback = roi.ravel(), payback.ravel()
+    return {
+        "scenarios": int(roi.size),
+        "axes": {name: np.round(params[name].grid, 4).tolist() for name in PARAMETERS if len(params[name].grid) > 1},
+        "roi_percent_10yr": _bands(_percentiles(roi)),
+        "payback_years": _bands(_percentiles(payback)),
+        "share_roi_positive": round(float((roi > 0).mean()), 4),
+    }
+
+
+def _tornado(params: Dict[str, Parameter]) -> List[Dict]:
+    varied = [name for name in PARAMETERS if params[name].uncertain]
+    if not varied:
+        return []
+    # rows 2k / 2k+1 hold input k at its low / high bound, everything else at base
+    values = np.tile([params[name].base for name in PARAMETERS], (2 * len(varied), 1))
+    for k, name in enumerate(varied):
+        col = PARAMETERS.index(name)
+        values[2 * k, col], values[2 * k + 1, col] = params[name].low, params[name].high
+    _, roi, _ = roi_arrays(*values.T)
+    roi = roi.reshape(-1, 2)
+    bars = [
+        {
+            "parameter": name,
+            "low": round(params[name].low, 4),
+            "high": round(params[name].high, 4),
+            "roi_at_low": round(float(roi[k, 0]), 2),
+            "roi_at_high": round(float(roi[k, 1]), 2),
+            "swing": round(float(abs(roi[k, 1] - roi[k, 0])), 2),
+        }
+        for k, name in enumerate(varied)
+    ]
+    return sorted(bars, key=lambda b: -b["swing"])
+
+
+def analyze_scenarios(projects: Sequence[Dict], samples: int = 10000, seed: Optional[int] = None) -> Dict:
+    """Sweep, Monte-Carlo and tornado analysis for a portfolio of projects, ranked by median ROI."""
+    if not projects:
+        raise ValueError("at least one project is required")
+    params = [_project_parameters(p) for p in projects]
+    sweep_size = sum(int(np.prod([len(p[name].grid) for name in PARAMETERS])) for p in params)
+    if sweep_size > MAX_SWEEP_SCENARIOS:
+        raise ValueError(f"sweep would evaluate {sweep_size} scenarios, the limit is {MAX_SWEEP_SCENARIOS}")
+
+    rng = np.random.default_rng(seed)
+    inputs = {name: np.stack([p[name].sample(rng, samples) for p in params]) for name in PARAMETERS}
+    savings, roi, payback = roi_arrays(*(inputs[name] for name in PARAMETERS))
+    roi_bands = _percentiles(roi, axis=1)
+    payback_bands = _percentiles(payback, axis=1)
+    savings_bands = _percentiles(savings, axis=1)
+    base = [roi_arrays(*(p[name].base for name in PARAMETERS)) for p in params]
+
+    results = []
+    for i, (project, p) in enumerate(zip(projects, params)):
+        base_savings, base_roi, base_payback = (float(v) for v in base[i])
+        median_payback = payback_bands[PERCENTILES.index(50), i]
+        results.append({
+            "name": project.get("name") or f"project_{i}",
+            "project_type": project.get("project_type", "unknown"),
+            "location": project.get("location", "unspecified"),
+            "base": {
+                "annual_savings": round(base_savings, 2),
+                "roi_percent_10yr": round(base_roi, 2),
+                "payback_years": _finite(base_payback),
+            },
+            "monte_carlo": {
+                "annual_savings": _bands(savings_bands[:, i]),
+                "roi_percent_10yr": _bands(roi_bands[:, i]),
+                "payback_years": _bands(payback_bands[:, i]),
+                "probability_roi_positive": round(float((roi[i] > 0).mean()), 4),
+                "probability_payback_within_horizon": round(float((payback[i] <= HORIZON_YEARS).mean()), 4),
+            },
+            "sweep": _sweep(p),
+            "tornado": _tornado(p),
+            "priority_score": round(p["expected_improvement"].base * 100 / min(median_payback, HORIZON_YEARS), 2),
+        })
+    order = np.argsort(-roi_bands[PERCENTILES.index(50)], kind="stable")
+    ranked = [dict(results[i], rank=r + 1) for r, i in enumerate(order.tolist())]
+    return {
+        "projects": ranked,
+        "samples": samples,
+        "seed": seed,
+        "horizon_years": HORIZON_YEARS,
+        "scenarios_evaluated": int(roi.size + sweep_size + sum(2 * len(r["tornado"]) for r in results)),
+    }
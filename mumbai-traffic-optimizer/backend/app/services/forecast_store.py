@@ -0,0 +1,90 @@
+"""Materialized forecast table refreshed on every collection tick."""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+from .traffic_predictor import predictor_service
+from ..utils.executor import run_cpu
+from ..utils.metrics import span
+
+HORIZON_HOURS = 6
+
+
+def hour_bucket(ts: datetime) -> datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def horizon_buckets(hours_ahead: int, now: Optional[datetime] = None) -> List[datetime]:
+    base = hour_bucket(now or datetime.utcnow())
+    return [base + timedelta(hours=h) for h in range(1, hours_ahead + 1)]
+
+
+class ForecastTable:
+    """Forecasts keyed by (route_id, hour bucket); ``refresh`` swaps in a complete new table."""
+
+    def __init__(self):
+        self._rows: Dict[Tuple[str, datetime], Dict] = {}
+        self.generated_at: Optional[datetime] = None
+
+    def refresh(self, route_ids: Sequence[str], now: Optional[datetime] = None):
+        now = now or datetime.utcnow()
+        generated_at = now.isoformat()
+        buckets = horizon_buckets(HORIZON_HOURS, now)
+        rows = {}
+        for row in predictor_service.predict_many(route_ids, buckets):
+            row["generated_at"] = generated_at
+            rows[(row["route_id"], datetime.fromisoformat(row["target_time"]))] = row
+        self._rows = rows
+        self.generated_at = now
+
+    def get(self, route_id: str, bucket: datetime) -> Optional[Dict]:
+        return self._rows.get((route_id, bucket))
+
+    def _split(self, route_ids: Sequence[str], buckets: Sequence[datetime]) -> Tuple[Dict[str, List[Dict]], List[str]]:
+        rows = self._rows
+        found = {}
+        missing_routes = []
+        for route_id in route_ids:
+            hits = [rows.get((route_id, b)) for b in buckets]
+            if all(hits):
+                found[route_id] = hits
+            else:
+                missing_routes.append(route_id)
+        return found, missing_routes
+
+    @staticmethod
+    def _merge(found: Dict[str, List[Dict]], missing_routes: List[str], n_buckets: int, computed: List[Dict]):
+        generated_at = datetime.utcnow().isoformat()
+        for i, route_id in enumerate(missing_routes):
+            chunk = computed[i * n_buckets:(i + 1) * n_buckets]
+            for row in chunk:
+                row["generated_at"] = generated_at
+            found[route_id] = chunk
+
+    def lookup(self, route_ids: Sequence[str], buckets: Sequence[datetime]) -> List[Dict]:
+        """Return route-major forecasts, computing only the rows missing from the table."""
+        found, missing_routes = self._split(route_ids, buckets)
+        if missing_routes:
+            self._merge(found, missing_routes, len(buckets), predictor_service.predict_many(missing_routes, buckets))
+        return [row for route_id in route_ids for row in found[route_id]]
+
+    async def alookup(self, route_ids: Sequence[str], buckets: Sequence[datetime]) -> List[Dict]:
+        """``lookup`` for async handlers: table hits stay on the loop, missing rows are scored via ``run_cpu``."""
+        found, missing_routes = self._split(route_ids, buckets)
+        if missing_routes:
+            computed = await run_cpu(predict_many, missing_routes, list(buckets))
+            # the online statistics are learned in this process, so the pool's copy would be stale
+            predictor_service.apply_online(missing_routes, buckets, computed)
+            self._merge(found, missing_routes, len(buckets), computed)
+        return [row for route_id in route_ids for row in found[route_id]]
+
+
+forecast_table = ForecastTable()
+
+
+def predict_many(route_ids: Sequence[str], buckets: Sequence[datetime]) -> List[Dict]:
+    # module-level so it can run in a CPU pool process, on that process' forest; see ``alookup``
+    return predictor_service.predict_many(route_ids, buckets, online=False)
+
+
+@span("refresh_forecasts")
+def refresh_forecasts():
+    forecast_table.refresh(predictor_service.routes)
@@ -0,0 +1,95 @@
+"""Server-sent live status feed: one serialized diff per tick, shared by every subscriber."""
+import asyncio
+import json
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+_DIFF_FIELDS = ("congestion_level", "average_speed", "delay_minutes", "weather")
+
+
+def _event(seq: int, kind: str, data: Dict) -> bytes:
+    return f"id: {seq}\nevent: {kind}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+class LiveFeed:
+    def __init__(self, queue_size: int = 8):
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._status: Dict[str, Dict] = {}
+        self._health: Optional[int] = None
+        self._timestamp: Optional[str] = None
+        self._seq = 0
+        self._snapshot_bytes: Optional[bytes] = None
+        self.resyncs = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def _snapshot_locked(self) -> bytes:
+        if self._snapshot_bytes is None:
+            self._snapshot_bytes = _event(self._seq, "snapshot", {
+                "timestamp": self._timestamp,
+                "traffic_health_score": self._health,
+                "status": list(self._status.values()),
+            })
+        return self._snapshot_bytes
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a subscriber on the running loop; its queue starts with a full snapshot."""
+        self._loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            if self._timestamp is not None:
+                queue.put_nowait(self._snapshot_locked())
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def publish(self, status: List[Dict], health_score: int, timestamp: Optional[str] = None):
+        """Record a new tick and push its diff to all subscribers. Safe to call from any thread."""
+        with self._lock:
+            changed = [
+                row for row in status
+                if any(self._status.get(row["route_id"], {}).get(f) != row.get(f) for f in _DIFF_FIELDS)
+            ]
+            self._status = {row["route_id"]: row for row in status}
+            health_changed = health_score != self._health
+            self._health = health_score
+            self._timestamp = timestamp or datetime.utcnow().isoformat()
+            self._seq += 1
+            self._snapshot_bytes = None
+            diff = {"timestamp": self._timestamp, "changed": changed}
+            if health_changed:
+                diff["traffic_health_score"] = health_score
+            payload = _event(self._seq, "diff", diff)
+        loop = self._loop
+        if loop is None or loop.is_closed() or not self._subscribers:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._fanout(payload)
+        else:
+            loop.call_soon_threadsafe(self._fanout, payload)
+
+    def _fanout(self, payload: bytes):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                with self._lock:
+                    queue.put_nowait(self._snapshot_locked())
+                self.resyncs += 1
+
+
+live_feed = LiveFeed()
@@ -0,0 +1,297 @@
+"""Road graph with congestion-weighted travel times and k-shortest-path queries."""
+from __future__ import annotations
+from heapq import heappop, heappush
+from pathlib import Path
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+NETWORK_PATH = Path(os.getenv("ROAD_NETWORK_FILE", BACKEND_DIR / "data" / "road_network.json"))
+N_LANDMARKS = 8
+CONNECTOR_FACTOR = 1.5  # unmonitored connector roads are assumed moderately busy
+SEARCH_SLACK = 1.5  # alternatives up to this multiple of the best time get exact A* guidance
+
+INF = float("inf")
+Path_ = Tuple[float, List[int]]  # (cost in minutes, edge ids)
+
+
+def congestion_multiplier(level: float) -> float:
+    """Travel-time multiplier for a 1-10 congestion level: 1x when free, 3x at 10."""
+    x = (min(max(level, 1.0), 10.0) - 1) / 9
+    return 1 + 2 * x * x
+
+
+def _haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371.0 * np.arcsin(np.sqrt(a))
+
+
+class RoadGraph:
+    def __init__(self, node_ids: Sequence[str], names: Sequence[str], lat, lng, src, dst, length_km, speed_kmh,
+                 edge_route, route_names: Sequence[str], n_landmarks: int = N_LANDMARKS):
+        self.node_ids = list(node_ids)
+        self.names = list(names)
+        self.index = {nid: i for i, nid in enumerate(self.node_ids)}
+        self._by_name = {name.lower(): i for i, name in enumerate(self.names)}
+        self.lat = np.asarray(lat, dtype=float)
+        self.lng = np.asarray(lng, dtype=float)
+        self.route_names = list(route_names)
+        n = len(self.node_ids)
+
+        order = np.argsort(np.asarray(src), kind="stable")
+        self.src = np.asarray(src, dtype=np.int64)[order]
+        self.dst = np.asarray(dst, dtype=np.int64)[order]
+        self.length_km = np.asarray(length_km, dtype=float)[order]
+        self.edge_route = np.asarray(edge_route, dtype=np.int64)[order]  # -1 = connector
+        self.free_time = self.length_km / np.asarray(speed_kmh, dtype=float)[order] * 60
+        self.ptr = np.concatenate([[0], np.cumsum(np.bincount(self.src, minlength=n))])
+        self.route_edges = [np.flatnonzero(self.edge_route == r) for r in range(len(self.route_names))]
+
+        self.weight = np.where(self.edge_route < 0, self.free_time * CONNECTOR_FACTOR, self.free_time)
+        self.route_level: Dict[str, float] = {}
+        self.version = 0
+        self._lock = threading.Lock()
+        # plain lists: the search loops index them element by element
+        self._ptr = self.ptr.tolist()
+        self._src = self.src.tolist()
+        self._dst = self.dst.tolist()
+        self._w = self.weight.tolist()
+
+        rev = np.argsort(self.dst, kind="stable")
+        self._rptr = np.concatenate([[0], np.cumsum(np.bincount(self.dst, minlength=n))]).tolist()
+        self._rsrc = self.src[rev].tolist()
+        self._rfree = self.free_time[rev].tolist()
+        self._rpos = np.empty(len(rev), dtype=np.int64)
+        self._rpos[rev] = np.arange(len(rev))
+        self._rw = self.weight[rev].tolist()
+        self.landmarks = self._select_landmarks(min(n_landmarks, n))
+        self.from_landmark = np.array([self._dijkstra(lm, self._ptr, self._dst, self.free_time.tolist())
+                                       for lm in self.landmarks]).reshape(-1, n)
+        self.to_landmark = np.array([self._dijkstra(lm, self._rptr, self._rsrc, self._rfree)
+                                     for lm in self.landmarks]).reshape(-1, n)
+
+    @classmethod
+    def from_file(cls, path: Path = NETWORK_PATH) -> "RoadGraph":
+        """Build from a network file of nodes, named route chains and connectors (see data/road_network.json)."""
+        with open(path, "r", encoding="utf-8") as f:
+            doc = json.load(f)
+        nodes = doc["nodes"]
+        index = {n["id"]: i for i, n in enumerate(nodes)}
+        lat = np.array([n["lat"] for n in nodes])
+        lng = np.array([n["lng"] for n in nodes])
+        src, dst, speed, edge_route = [], [], [], []
+
+        def add(a: str, b: str, kmh: float, route: int):
+            i, j = index[a], index[b]
+            src.extend((i, j))
+            dst.extend((j, i))
+            speed.extend((kmh, kmh))
+            edge_route.extend((route, route))
+
+        for r, route in enumerate(doc["routes"]):
+            for a, b in zip(route["nodes"], route["nodes"][1:]):
+                add(a, b, route["free_speed_kmh"], r)
+        for a, b in doc.get("connectors", []):
+            add(a, b, doc.get("connector_speed_kmh", 25), -1)
+        src, dst = np.array(src), np.array(dst)
+        length = _haversine_km(lat[src], lng[src], lat[dst], lng[dst]) * doc.get("road_factor", 1.0)
+        return cls([n["id"] for n in nodes], [n.get("name", n["id"]) for n in nodes], lat, lng, src, dst, length,
+                   speed, edge_route, [r["name"] for r in doc["routes"]])
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    @staticmethod
+    def _dijkstra(source: int, ptr: List[int], nbr: List[int], w: List[float]) -> List[float]:
+        dist = [INF] * (len(ptr) - 1)
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            d, u = heappop(heap)
+            if d > dist[u]:
+                continue
+            for e in range(ptr[u], ptr[u + 1]):
+                nd = d + w[e]
+                v = nbr[e]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    heappush(heap, (nd, v))
+        return dist
+
+    def _select_landmarks(self, k: int) -> List[int]:
+        """Farthest-point landmarks: each new one maximises its distance to those already chosen."""
+        if k == 0:
+            return []
+        free = self.free_time.tolist()
+        d = np.array(self._dijkstra(0, self._ptr, self._dst, free))
+        landmarks = [int(np.argmax(np.where(np.isfinite(d), d, -1)))]
+        closest = np.full(len(self), INF)
+        while len(landmarks) < k:
+            closest = np.minimum(closest, self._dijkstra(landmarks[-1], self._ptr, self._dst, free))
+            closest[landmarks] = -1
+            landmarks.append(int(np.argmax(np.where(np.isfinite(closest), closest, -1))))
+        return landmarks
+
+    def resolve(self, key: str) -> Optional[int]:
+        """Node index for an id or (case-insensitive) name."""
+        if key in self.index:
+            return self.index[key]
+        return self._by_name.get(key.strip().lower(), self.index.get(key.strip().lower().replace(" ", "_")))
+
+    def update_congestion(self, levels: Dict[str, float]) -> int:
+        """Reweight the edges of every route whose congestion level changed; returns edges touched."""
+        touched = 0
+        with self._lock:
+            for r, name in enumerate(self.route_names):
+                level = levels.get(name)
+                if level is None or self.route_level.get(name) == level:
+                    continue
+                edges = self.route_edges[r]
+                self.weight[edges] = self.free_time[edges] * congestion_multiplier(level)
+                for e, r_e, w in zip(edges.tolist(), self._rpos[edges].tolist(), self.weight[edges].tolist()):
+                    self._w[e] = w
+                    self._rw[r_e] = w
+                self.route_level[name] = level
+                touched += len(edges)
+            if touched:
+                self.version += 1
+        return touched
+
+    def heuristic(self, target: int, source: Optional[int] = None, slack: float = SEARCH_SLACK) -> List[float]:
+        """Lower bound on the current travel time from every node to ``target``."""
+        if self.landmarks:
+            with np.errstate(invalid="ignore"):
+                bounds = np.maximum(self.from_landmark[:, [target]] - self.from_landmark,
+                                    self.to_landmark - self.to_landmark[:, [target]])
+            h = np.maximum(np.where(np.isfinite(bounds), bounds, 0.0).max(axis=0), 0.0)
+        else:
+            h = np.zeros(len(self))
+        if source is None:
+            return h.tolist()
+        ptr, nbr, w = self._rptr, self._rsrc, self._rw
+        dist = {target: 0.0}
+        settled = {}
+        limit = INF
+        radius = INF
+        heap = [(0.0, target)]
+        while heap:
+            d, u = heappop(heap)
+            if u in settled:
+                continue
+            if d > limit:
+                radius = d
+                break
+            settled[u] = d
+            if u == source:
+                limit = d * slack
+            for e in range(ptr[u], ptr[u + 1]):
+                v = nbr[e]
+                nd = d + w[e]
+                if nd < dist.get(v, INF):
+                    dist[v] = nd
+                    heappush(heap, (nd, v))
+        exact = np.full(len(self), radius)
+        exact[list(settled)] = list(settled.values())
+        return np.maximum(h, exact).tolist()
+
+    def astar(self, source: int, target: int, h: List[float], banned_nodes: Set[int] = frozenset(),
+              banned_edges: Set[int] = frozenset()) -> Optional[Path_]:
+        ptr, dst, w = self._ptr, self._dst, self._w
+        g = {source: 0.0}
+        parent = {source: -1}
+        closed = set()
+        # ties on f go to the deeper node, which keeps A* from flooding equal-cost plateaus
+        heap = [(h[source], 0.0, source)]
+        while heap:
+            _, neg_g, u = heappop(heap)
+            gu = -neg_g
+            if u == target:
+                edges = []
+                while parent[u] >= 0:
+                    edges.append(parent[u])
+                    u = self._src[parent[u]]
+                return gu, edges[::-1]
+            if u in closed:
+                continue
+            closed.add(u)
+            for e in range(ptr[u], ptr[u + 1]):
+                v = dst[e]
+                if v in closed or v in banned_nodes or e in banned_edges:
+                    continue
+                ng = gu + w[e]
+                if ng < g.get(v, INF):
+                    g[v] = ng
+                    parent[v] = e
+                    heappush(heap, (ng + h[v], -ng, v))
+        return None
+
+    def k_shortest(self, source: int, target: int, k: int = 3) -> List[Path_]:
+        """Yen's algorithm: up to ``k`` loopless paths in increasing travel time."""
+        h = self.heuristic(target, source)
+        first = self.astar(source, target, h)
+        if first is None:
+            return []
+        found = [first]
+        deviations = [0]
+        candidates: List[Tuple[float, List[int], int]] = []
+        seen = {tuple(first[1])}
+        while len(found) < k:
+            _, prev = found[-1]
+            nodes = [source] + [self._dst[e] for e in prev]
+            root_cost = sum(self._w[e] for e in prev[:deviations[-1]])
+            for i in range(deviations[-1], len(prev)):
+                root = prev[:i]
+                banned_edges = {p[i] for _, p in found if len(p) > i and p[:i] == root}
+                spur = self.astar(nodes[i], target, h, set(nodes[:i]), banned_edges)
+                if spur is not None:
+                    path = root + spur[1]
+                    if tuple(path) not in seen:
+                        seen.add(tuple(path))
+                        heappush(candidates, (root_cost + spur[0], path, i))
+                root_cost += self._w[prev[i]]
+            if not candidates:
+                break
+            cost, path, deviation = heappop(candidates)
+            found.append((cost, path))
+            deviations.append(deviation)
+        return found
+
+    def describe(self, path: Path_) -> Dict:
+        cost, edges = path
+        routes: List[str] = []
+        for r in self.edge_route[edges].tolist():
+            name = self.route_names[r] if r >= 0 else None
+            if name and (not routes or routes[-1] != name):
+                routes.append(name)
+        nodes = [self._src[edges[0]]] + self.dst[edges].tolist() if edges else []
+        return {
+            "via": [self.names[i] for i in nodes],
+            "routes": routes,
+            "distance_km": round(float(self.length_km[edges].sum()), 1),
+            "travel_time_minutes": round(cost, 1),
+            "free_flow_minutes": round(float(self.free_time[edges].sum()), 1),
+        }
+
+    def alternatives(self, origin: str, destination: str, k: int = 3) -> List[Dict]:
+        source, target = self.resolve(origin), self.resolve(destination)
+        if source is None or target is None:
+            missing = origin if source is None else destination
+            raise ValueError(f"Unknown location '{missing}'")
+        return [self.describe(p) for p in self.k_shortest(source, target, k)]
+
+
+_road_graph: Optional[RoadGraph] = None
+_graph_lock = threading.Lock()
+
+
+def get_road_graph() -> RoadGraph:
+    global _road_graph
+    if _road_graph is None:
+        with _graph_lock:
+            if _road_graph is None:
+                _road_graph = RoadGraph.from_file(NETWORK_PATH)
+    return _road_graph
@@ -0,0 +1,302 @@
+"""Network-level signal coordination: one common cycle, per-intersection offsets and splits."""
+from __future__ import annotations
+from pathlib import Path
+import json
+import math
+import os
+import time
+import zlib
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from .signal_optimizer import CYCLE_MAX, CYCLE_MIN, LOST_TIME, SAMPLE_INTERSECTIONS, SAT_FLOW
+from ..utils.executor import CPU_WORKERS, pool_size, process_pool
+from ..utils.metrics import span
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+INTERSECTIONS_FILE = Path(os.getenv(
+    "INTERSECTIONS_FILE", BACKEND_DIR.parent.parent / "trafficiq-mumbai" / "backend" / "data" / "intersections.json"
+))
+
+LANES = 2  # per approach
+PEAK_HOUR_FACTOR = 0.09  # share of daily vehicles in the peak hour
+CYCLE_STEP = 5
+PROGRESSION_SPEED_KMH = 30.0
+K_NEIGHBORS = 2
+MAX_LINK_KM = 8.0
+OFFSET_STEP = 1.0
+MAX_SWEEPS = 20
+MIN_GAIN = 2e-3  # stop once a sweep cuts link delay by less than this fraction
+PARALLEL_MIN_INTERSECTIONS = 64
+
+
+def load_network_intersections() -> List[Dict[str, Any]]:
+    """SAMPLE_INTERSECTIONS plus every located intersection in the TrafficIQ data file."""
+    merged = {i["id"]: dict(i) for i in SAMPLE_INTERSECTIONS}
+    if INTERSECTIONS_FILE.exists():
+        with open(INTERSECTIONS_FILE, "r", encoding="utf-8") as f:
+            for item in json.load(f)["intersections"]:
+                if "location" in item:
+                    merged.setdefault(item["id"], {}).update(item)
+    return list(merged.values())
+
+
+def approach_flows(intersection: Dict[str, Any]) -> Tuple[float, float]:
+    """Peak-hour (main, cross) volumes in veh/h, both directions."""
+    adt = intersection.get("average_daily_vehicles")
+    if adt:
+        splits = intersection.get("current_green_splits") or {}
+        ns, ew = splits.get("NS", 1), splits.get("EW", 1)
+        peak = adt * PEAK_HOUR_FACTOR
+        return peak * ns / (ns + ew), peak * ew / (ns + ew)
+    h = zlib.crc32(intersection["id"].encode())
+    return float(800 + h % 1601), float(600 + (h >> 12) % 1201)
+
+
+def _haversine_km(lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+    lat, lng = np.radians(lat), np.radians(lng)
+    dlat = lat[:, None] - lat[None, :]
+    dlng = lng[:, None] - lng[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlng / 2) ** 2
+    return 2 * 6371.0 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _uniform_delay(cycle: float, green: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Webster's uniform delay term, seconds per vehicle."""
+    lam = green / cycle
+    x = np.minimum(y / lam, 0.95)
+    return cycle * (1 - lam) ** 2 / (2 * (1 - lam * x))
+
+
+def _wait_integral(x, green, cycle: float):
+    """Integral over arrival times [0, x) of the red wait, for a cycle green during [0, green)."""
+    n, t = np.divmod(x, cycle)
+    red = cycle - green
+    return n * red ** 2 / 2 + np.where(t < green, 0.0, (red ** 2 - (cycle - t) ** 2) / 2)
+
+
+def _platoon_wait(phase, band, green, cycle: float) -> np.ndarray:
+    """Mean red wait (s/veh) of a platoon spread over ``band`` s arriving ``phase`` s into the cycle."""
+    a = np.mod(phase, cycle)
+    return (_wait_integral(a + band, green, cycle) - _wait_integral(a, green, cycle)) / band
+
+
+class SignalNetwork:
+    """Intersections as arrays plus directed main-road links between neighbours."""
+
+    def __init__(self, intersections: Sequence[Dict[str, Any]], speed_kmh: float = PROGRESSION_SPEED_KMH,
+                 k_neighbors: int = K_NEIGHBORS, max_link_km: float = MAX_LINK_KM):
+        self.intersections = list(intersections)
+        n = len(self.intersections)
+        self.speed_kmh = speed_kmh
+        lat = np.array([i["location"]["lat"] for i in self.intersections], dtype=float)
+        lng = np.array([i["location"]["lng"] for i in self.intersections], dtype=float)
+        flows = np.array([approach_flows(i) for i in self.intersections], dtype=float).reshape(n, 2)
+        self.main, self.cross = flows[:, 0], flows[:, 1]
+        self.y_main = self.main / 2 / (SAT_FLOW * LANES)
+        self.y_cross = self.cross / 2 / (SAT_FLOW * LANES)
+
+        dist = _haversine_km(lat, lng)
+        np.fill_diagonal(dist, np.inf)
+        k = min(k_neighbors, n - 1)
+        pairs = set()
+        if k > 0:
+            nearest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+            for i, js in enumerate(nearest):
+                for j in js:
+                    if dist[i, j] <= max_link_km:
+                        pairs.add((min(i, int(j)), max(i, int(j))))
+        undirected = np.array(sorted(pairs), dtype=np.int64).reshape(-1, 2)
+        self.src = np.concatenate([undirected[:, 0], undirected[:, 1]])
+        self.dst = np.concatenate([undirected[:, 1], undirected[:, 0]])
+        self.distance_km = dist[self.src, self.dst]
+        self.travel = self.distance_km / speed_kmh * 3600
+        # each main approach's volume arrives evenly from its upstream neighbours
+        indeg = np.bincount(self.dst, minlength=n)
+        self.link_volume = self.main[self.dst] / np.maximum(indeg[self.dst], 1)
+        self.unlinked_main = np.where(indeg == 0, self.main, 0.0)
+
+        ends = np.concatenate([self.src, self.dst])
+        order = np.argsort(ends, kind="stable")
+        self.inc_links = np.concatenate([np.arange(len(self.src))] * 2)[order]
+        self.inc_ptr = np.concatenate([[0], np.cumsum(np.bincount(ends, minlength=n))])
+        self._classes = self.colour_classes()
+
+    def __len__(self) -> int:
+        return len(self.intersections)
+
+    def candidate_cycles(self) -> List[float]:
+        """Common cycles every intersection can run: from the critical intersection's minimum up to CYCLE_MAX."""
+        Y = np.minimum(self.y_main + self.y_cross, 0.95)
+        c_min = float(np.max(LOST_TIME / (1 - Y))) if len(self) else CYCLE_MIN
+        start = max(CYCLE_MIN, CYCLE_STEP * math.ceil(c_min / CYCLE_STEP))
+        return [float(c) for c in range(start, CYCLE_MAX + 1, CYCLE_STEP)] or [float(CYCLE_MAX)]
+
+    def greens(self, cycle: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Effective green (main, cross) in seconds, split by flow ratio as in Webster."""
+        effective = cycle - LOST_TIME
+        share = self.y_main / (self.y_main + self.y_cross)
+        return effective * share, effective * (1 - share)
+
+    def _link_cost(self, cycle: float, theta_src, theta_dst, links, g_main: np.ndarray) -> np.ndarray:
+        """Platoon delay on ``links`` in veh*s per hour, broadcast over offset candidates."""
+        phase = theta_src + self.travel[links] - theta_dst
+        wait = _platoon_wait(phase, g_main[self.src[links]], g_main[self.dst[links]], cycle)
+        return self.link_volume[links] * wait
+
+    def fixed_delay(self, cycle: float) -> float:
+        """Offset-independent delay, veh*h per hour: cross streets and unlinked main approaches."""
+        g_main, g_cross = self.greens(cycle)
+        return float((self.cross * _uniform_delay(cycle, g_cross, self.y_cross)).sum()
+                     + (self.unlinked_main * _uniform_delay(cycle, g_main, self.y_main)).sum()) / 3600
+
+    def delay(self, cycle: float, offsets: np.ndarray) -> float:
+        """Total network delay in vehicle-hours per hour for one cycle and offset vector."""
+        g_main, _ = self.greens(cycle)
+        links = np.arange(len(self.src))
+        link = self._link_cost(cycle, offsets[self.src], offsets[self.dst], links, g_main).sum() / 3600
+        return self.fixed_delay(cycle) + float(link)
+
+    def uncoordinated_delay(self) -> float:
+        """Every intersection on its own Webster cycle, with platoons arriving at random."""
+        Y = np.minimum(self.y_main + self.y_cross, 0.95)
+        own = np.clip((1.5 * LOST_TIME + 5) / (1 - Y), CYCLE_MIN, CYCLE_MAX)
+        effective = own - LOST_TIME
+        share = self.y_main / (self.y_main + self.y_cross)
+        d_main = _uniform_delay(own, effective * share, self.y_main)
+        d_cross = _uniform_delay(own, effective * (1 - share), self.y_cross)
+        return float((self.main * d_main + self.cross * d_cross).sum()) / 3600
+
+    def green_wave(self, cycle: float) -> np.ndarray:
+        """Initial offsets: a forward green wave along a BFS tree of each connected component."""
+        offsets = np.full(len(self), np.nan)
+        for root in range(len(self)):
+            if not np.isnan(offsets[root]):
+                continue
+            offsets[root] = 0.0
+            queue = deque([root])
+            while queue:
+                i = queue.popleft()
+                for link in self.inc_links[self.inc_ptr[i]:self.inc_ptr[i + 1]]:
+                    if self.src[link] == i and np.isnan(offsets[self.dst[link]]):
+                        offsets[self.dst[link]] = (offsets[i] + self.travel[link]) % cycle
+                        queue.append(self.dst[link])
+        return offsets
+
+    def colour_classes(self) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """Greedy colouring of the link graph, as (nodes, links, owner, starts) per colour."""
+        colour = np.full(len(self), -1)
+        for k in np.argsort(-np.diff(self.inc_ptr), kind="stable"):
+            links = self.inc_links[self.inc_ptr[k]:self.inc_ptr[k + 1]]
+            taken = set(colour[np.where(self.src[links] == k, self.dst[links], self.src[links])].tolist())
+            colour[k] = next(c for c in range(len(taken) + 1) if c not in taken)
+        classes = []
+        for c in range(colour.max() + 1 if len(self) else 0):
+            nodes = np.flatnonzero((colour == c) & (np.diff(self.inc_ptr) > 0))
+            if not len(nodes):
+                continue
+            counts = np.diff(self.inc_ptr)[nodes]
+            links = np.concatenate([self.inc_links[self.inc_ptr[k]:self.inc_ptr[k + 1]] for k in nodes])
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            classes.append((nodes, links, np.repeat(nodes, counts), starts))
+        return classes
+
+    def optimize_offsets(self, cycle: float, max_sweeps: int = MAX_SWEEPS) -> Tuple[np.ndarray, int]:
+        """Coordinate descent on offsets, one colour class of intersections per step."""
+        g_main, _ = self.greens(cycle)
+        offsets = self.green_wave(cycle)
+        grid = np.arange(0.0, cycle, OFFSET_STEP)[:, None]
+        all_links = np.arange(len(self.src))
+        link_delay = self._link_cost(cycle, offsets[self.src], offsets[self.dst], all_links, g_main).sum()
+        sweeps = 0
+        for sweeps in range(1, max_sweeps + 1):
+            for nodes, links, owner, starts in self._classes:
+                candidates = np.vstack([np.broadcast_to(grid, (len(grid), len(links))), offsets[owner]])
+                theta_src = np.where(self.src[links] == owner, candidates, offsets[self.src[links]])
+                theta_dst = np.where(self.dst[links] == owner, candidates, offsets[self.dst[links]])
+                cost = np.add.reduceat(self._link_cost(cycle, theta_src, theta_dst, links, g_main), starts, axis=1)
+                best = np.argmin(cost, axis=0)  # current offset is the last row
+                better = cost[best, np.arange(len(nodes))] < cost[-1] - 1e-9
+                offsets[nodes[better]] = grid[best[better], 0]
+            previous = link_delay
+            link_delay = self._link_cost(cycle, offsets[self.src], offsets[self.dst], all_links, g_main).sum()
+            if previous - link_delay <= MIN_GAIN * previous:
+                break
+        return offsets, sweeps
+
+    def solve(self, cycle: float) -> Tuple[float, float, np.ndarray, int]:
+        offsets, sweeps = self.optimize_offsets(cycle)
+        return self.delay(cycle, offsets), cycle, offsets, sweeps
+
+
+def _solve_cycles(network: SignalNetwork, cycles: Sequence[float]):
+    return [network.solve(c) for c in cycles]
+
+
+@span("plan_network")
+def plan_network(intersections: Optional[Sequence[Dict[str, Any]]] = None, cycles: Optional[Sequence[float]] = None,
+                 workers: Optional[int] = None, speed_kmh: float = PROGRESSION_SPEED_KMH) -> Dict[str, Any]:
+    """Coordinated plan for every intersection (default: ``load_network_intersections()``)."""
+    started = time.perf_counter()
+    network = SignalNetwork(intersections if intersections is not None else load_network_intersections(), speed_kmh)
+    cycles = list(cycles) if cycles else network.candidate_cycles()
+    if workers is None:
+        workers = (CPU_WORKERS or os.cpu_count() or 1) if len(network) >= PARALLEL_MIN_INTERSECTIONS else 1
+    workers = max(1, min(workers, len(cycles)))
+    if workers > 1:
+        # one task per worker, cycles interleaved so each gets short and long ones
+        chunks = [cycles[i::workers] for i in range(workers)]
+        with process_pool(workers) as pool:
+            solved = [s for part in pool.map(_solve_cycles, [network] * workers, chunks) for s in part]
+        workers = min(workers, pool_size(workers))
+    else:
+        solved = [network.solve(c) for c in cycles]
+    total, cycle, offsets, sweeps = min(solved, key=lambda s: s[0])
+    return describe_plan(network, cycle, offsets, total, {
+        "cycles_evaluated": len(cycles),
+        "sweeps": sweeps,
+        "workers": workers,
+        "elapsed_s": round(time.perf_counter() - started, 3),
+    })
+
+
+def describe_plan(network: SignalNetwork, cycle: float, offsets: np.ndarray, total: float,
+                  search: Dict[str, Any]) -> Dict[str, Any]:
+    g_main, g_cross = network.greens(cycle)
+    waits = _platoon_wait(offsets[network.src] + network.travel - offsets[network.dst],
+                          g_main[network.src], g_main[network.dst], cycle)
+    baseline = network.uncoordinated_delay()
+    ids = [i["id"] for i in network.intersections]
+    return {
+        "cycle_time": cycle,
+        "total_delay_veh_hours": round(total, 2),
+        "uncoordinated_delay_veh_hours": round(baseline, 2),
+        "expected_delay_reduction_pct": round((1 - total / baseline) * 100, 1) if baseline else 0.0,
+        "intersections": [
+            {
+                "intersection_id": inter["id"],
+                "location": inter["location"],
+                "offset_seconds": round(float(offsets[i]), 1),
+                "green_splits_seconds": {"main": round(float(g_main[i]), 1), "cross": round(float(g_cross[i]), 1)},
+                "flows_veh_per_hour": {"main": round(float(network.main[i])), "cross": round(float(network.cross[i]))},
+            }
+            for i, inter in enumerate(network.intersections)
+        ],
+        "links": [
+            {
+                "from": ids[network.src[j]],
+                "to": ids[network.dst[j]],
+                "distance_km": round(float(network.distance_km[j]), 2),
+                "travel_time_seconds": round(float(network.travel[j]), 1),
+                "platoon_wait_seconds": round(float(waits[j]), 1),
+            }
+            for j in range(len(network.src))
+        ],
+        "search": search,
+        "assumptions": {
+            "saturation_flow_per_lane": SAT_FLOW,
+            "lanes_per_approach": LANES,
+            "lost_time_seconds": LOST_TIME,
+            "progression_speed_kmh": network.speed_kmh,
+        },
+    }
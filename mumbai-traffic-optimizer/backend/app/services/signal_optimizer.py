@@ -1,5 +1,9 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 import random
+import zlib
+import numpy as np
+from .queue_sim import compare_plans, green_starts, simulate
+from ..utils.cache import LRUCache
 
 SAMPLE_INTERSECTIONS = [
     {"id": "bandra_linking_road", "location": {"lat": 19.0596, "lng": 72.8295}},
@@ -7,6 +11,95 @@ SAMPLE_INTERSECTIONS = [
     {"id": "worli_sea_link", "location": {"lat": 19.0176, "lng": 72.8562}},
     {"id": "powai_hiranandani", "location": {"lat": 19.1197, "lng": 72.9073}},
 ]
+INTERSECTIONS_BY_ID = {i["id"]: i for i in SAMPLE_INTERSECTIONS}
+
+APPROACHES = ("north", "south", "east", "west")
+SAT_FLOW = 1800
+LOST_TIME = 4 * 4
+CURRENT_CYCLE_TIME = 90
+CYCLE_MIN, CYCLE_MAX = 40, 150
+SIMULATION_SECONDS = 900
+SIMULATION_RUNS = 4
+SIMULATION_CHUNK_ROWS = 256  # rows per vectorized run; bounds the arrival arrays
+
+# simulated results per (flows, recommended plan) row; the current timing is fixed
+_improvements = LRUCache(max_entries=50_000)
+_comparisons = LRUCache(max_entries=1024)
+
+PlanKey = Tuple[Tuple[float, ...], float, Tuple[float, ...]]
+
+
+def webster_batch(flows, sat_flow: float = SAT_FLOW, lost_time: float = LOST_TIME) -> Dict[str, np.ndarray]:
+    """Webster cycle and green splits for any number of intersections/timesteps at once."""
+    flows = np.asarray(flows, dtype=float)
+    Y = (flows / sat_flow).sum(axis=-1)
+    cycle_time = np.clip((1.5 * lost_time + 5) / (1 - np.minimum(Y, 0.95)), CYCLE_MIN, CYCLE_MAX)
+    effective_green = cycle_time - lost_time
+    total = flows.sum(axis=-1, keepdims=True)
+    share = np.divide(flows, total, out=np.full_like(flows, 1 / max(flows.shape[-1], 1)), where=total > 0)
+    return {
+        "cycle_time": cycle_time,
+        "green_splits": effective_green[..., None] * share,
+        "Y": Y,
+        "saturated": Y >= 1,
+    }
+
+
+def _plan_key(flows, cycle_time, green_splits) -> PlanKey:
+    # plans are simulated as reported, to 0.1 s
+    return (tuple(float(f) for f in flows), round(float(cycle_time), 1),
+            tuple(round(float(g), 1) for g in green_splits))
+
+
+def _seed(key: PlanKey) -> int:
+    return zlib.crc32(repr(key).encode())
+
+
+def _current_green(approaches: int) -> float:
+    # the current timing is taken as a fixed 90 s cycle with equal greens
+    return (CURRENT_CYCLE_TIME - LOST_TIME) / approaches
+
+
+def _improvement(before: float, after: float) -> float:
+    return (before - after) / before if before else 0.0
+
+
+def _compare(key: PlanKey) -> List[Dict]:
+    hit = _comparisons.get(key)
+    if hit is None:
+        flows, cycle_time, greens = key
+        current_green = _current_green(len(APPROACHES))
+        hit = compare_plans(
+            [(CURRENT_CYCLE_TIME, {a: current_green for a in APPROACHES}), (cycle_time, dict(zip(APPROACHES, greens)))],
+            dict(zip(APPROACHES, flows)), duration_s=SIMULATION_SECONDS, runs=SIMULATION_RUNS, seed=_seed(key),
+            sat_flow=SAT_FLOW
+        )
+        _comparisons.set(key, hit)
+    return hit
+
+
+def simulated_improvement(flows, cycle_time, green_splits) -> np.ndarray:
+    """Simulated reduction in average delay per vehicle of each plan over the current timing."""
+    flows = np.asarray(flows, dtype=float)
+    n_approaches = flows.shape[-1]
+    keys = [_plan_key(f, c, g) for f, c, g in zip(flows.reshape(-1, n_approaches), np.reshape(cycle_time, -1),
+                                                   np.reshape(green_splits, (-1, n_approaches)))]
+    found = {k: _improvements.get(k) for k in keys}
+    missing = [k for k, v in found.items() if v is None]
+    for start in range(0, len(missing), SIMULATION_CHUNK_ROWS):
+        # one vectorized run per chunk of uncached rows, each row with its own arrivals
+        chunk = missing[start:start + SIMULATION_CHUNK_ROWS]
+        rows = len(chunk)
+        cycle = np.array([[CURRENT_CYCLE_TIME] * rows, [k[1] for k in chunk]], dtype=float)
+        green = np.stack([np.full((rows, n_approaches), _current_green(n_approaches)),
+                          np.array([k[2] for k in chunk])])
+        result = simulate(cycle, green_starts(cycle, green), green, np.array([k[0] for k in chunk]),
+                          SIMULATION_SECONDS, SIMULATION_RUNS, sat_flow=SAT_FLOW, seeds=[_seed(k) for k in chunk])
+        delay = np.round(result["delay"].sum(axis=(0, 3)) / np.maximum(result["arrived"].sum(axis=(0, 3)), 1), 1)
+        for i, key in enumerate(chunk):
+            found[key] = _improvement(delay[0, i], delay[1, i])
+            _improvements.set(key, found[key])
+    return np.array([found[k] for k in keys], dtype=float).reshape(flows.shape[:-1])
 
 
 def optimize_signal_timing(intersection: Dict[str, Any]):
@@ -16,27 +109,29 @@ def optimize_signal_timing(intersection: Dict[str, Any]):
         "east": random.randint(300, 900),
         "west": random.randint(300, 900),
     }
-    sat_flow = 1800
-    y_values = {k: v / sat_flow for k, v in flows.items()}
-    Y = sum(y_values.values())
-    lost_time = 4 * 4
-    if Y >= 0.95:
-        Y = 0.95
-    cycle_time = (1.5 * lost_time + 5) / (1 - Y)
-    effective_green = cycle_time - lost_time
-    splits = {k: round(effective_green * (v / sum(flows.values())), 1) for k, v in flows.items()}
-    current_cycle_time = 90
-    improvement = min(0.25, abs(cycle_time - current_cycle_time) / current_cycle_time + 0.1)
+    plan = webster_batch([flows[a] for a in APPROACHES])
+    key = _plan_key([flows[a] for a in APPROACHES], plan["cycle_time"], plan["green_splits"])
+    cycle_time, splits = key[1], dict(zip(APPROACHES, key[2]))
+    current, recommended = _compare(key)
+    improvement = _improvement(current["average_delay_s_per_vehicle"], recommended["average_delay_s_per_vehicle"])
+    _improvements.set(key, improvement)
     return {
         "intersection_id": intersection["id"],
         "location": intersection["location"],
-        "current_cycle_time": current_cycle_time,
-        "recommended_cycle_time": round(cycle_time, 1),
+        "current_cycle_time": CURRENT_CYCLE_TIME,
+        "recommended_cycle_time": cycle_time,
         "green_splits_seconds": splits,
         "expected_flow_improvement_pct": round(improvement * 100, 1),
+        "simulation": {
+            "duration_seconds": SIMULATION_SECONDS,
+            "runs": SIMULATION_RUNS,
+            "arrival_flows_veh_per_hour": flows,
+            "current": current,
+            "recommended": recommended,
+        },
         "assumptions": {
-            "saturation_flow_per_lane": sat_flow,
-            "lost_time_seconds": lost_time,
-            "Y": round(Y, 3)
+            "saturation_flow_per_lane": SAT_FLOW,
+            "lost_time_seconds": LOST_TIME,
+            "Y": round(float(plan["Y"]), 3)
         }
     }
@@ -0,0 +1,197 @@
+"""Time-series persistence for collected snapshots: bulk append, rollups, retention."""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy import delete, func, insert, select
+from ..models.db_models import RouteRollup, RouteSnapshot, ROLLUP_RESOLUTIONS
+from ..utils.db import SessionLocal
+
+RAW_RETENTION = timedelta(days=7)
+ROLLUP_15M_RETENTION = timedelta(days=90)
+# rolled buckets this far behind the watermark are recomputed on every run, so ticks
+# committed after their bucket was rolled up (external collector, slow store_tick) are counted
+ROLLUP_LOOKBACK = timedelta(hours=1)
+
+
+def floor_time(ts: datetime, minutes: int) -> datetime:
+    return ts - timedelta(minutes=ts.minute % minutes, seconds=ts.second, microseconds=ts.microsecond)
+
+
+def write_snapshots(rows: List[Dict]):
+    """Append one tick of snapshots with a single executemany insert."""
+    if not rows:
+        return
+    params = [{
+        "route_id": r["route_id"],
+        "timestamp": datetime.fromisoformat(r["timestamp"]) if isinstance(r["timestamp"], str) else r["timestamp"],
+        "congestion_level": r["congestion_level"],
+        "average_speed": r.get("average_speed"),
+        "delay_minutes": r.get("delay_minutes"),
+        "weather": r.get("weather"),
+    } for r in rows]
+    with SessionLocal() as session:
+        session.execute(insert(RouteSnapshot), params)
+        session.commit()
+
+
+def load_latest_snapshots() -> List[Dict]:
+    """Rows of the most recent collection tick, in the collector's dict format."""
+    with SessionLocal() as session:
+        latest = session.scalar(select(func.max(RouteSnapshot.timestamp)))
+        if latest is None:
+            return []
+        snaps = session.execute(select(RouteSnapshot).where(RouteSnapshot.timestamp == latest)).scalars()
+        return [{
+            "route_id": s.route_id,
+            "timestamp": s.timestamp.isoformat(),
+            "congestion_level": s.congestion_level,
+            "average_speed": s.average_speed,
+            "delay_minutes": s.delay_minutes,
+            "weather": s.weather,
+        } for s in snaps]
+
+
+class _Acc:
+    __slots__ = ("n", "c_sum", "c_min", "c_max", "s_sum", "s_n", "d_sum", "d_n")
+
+    def __init__(self):
+        self.n = 0
+        self.c_sum = 0.0
+        self.c_min = float("inf")
+        self.c_max = float("-inf")
+        self.s_sum = self.d_sum = 0.0
+        self.s_n = self.d_n = 0
+
+    def add(self, n: int, c_mean: float, c_min: float, c_max: float, speed: Optional[float], delay: Optional[float]):
+        self.n += n
+        self.c_sum += c_mean * n
+        self.c_min = min(self.c_min, c_min)
+        self.c_max = max(self.c_max, c_max)
+        if speed is not None:
+            self.s_sum += speed * n
+            self.s_n += n
+        if delay is not None:
+            self.d_sum += delay * n
+            self.d_n += n
+
+    def row(self, resolution: str, route_id: str, bucket: datetime) -> Dict:
+        return {
+            "resolution": resolution,
+            "route_id": route_id,
+            "bucket_start": bucket,
+            "samples": self.n,
+            "congestion_mean": round(self.c_sum / self.n, 3),
+            "congestion_min": self.c_min,
+            "congestion_max": self.c_max,
+            "average_speed_mean": round(self.s_sum / self.s_n, 2) if self.s_n else None,
+            "delay_minutes_mean": round(self.d_sum / self.d_n, 2) if self.d_n else None,
+        }
+
+
+def _aggregate(records: Iterable[Tuple], minutes: int) -> Dict[Tuple[str, datetime], _Acc]:
+    """records: (route_id, ts, samples, mean, min, max, speed, delay) tuples."""
+    buckets: Dict[Tuple[str, datetime], _Acc] = {}
+    for route_id, ts, n, c_mean, c_min, c_max, speed, delay in records:
+        key = (route_id, floor_time(ts, minutes))
+        acc = buckets.get(key)
+        if acc is None:
+            acc = buckets[key] = _Acc()
+        acc.add(n, c_mean, c_min, c_max, speed, delay)
+    return buckets
+
+
+def _rollup_start(session, resolution: str, source_min, lookback: timedelta = timedelta(0)) -> Optional[datetime]:
+    """First bucket not yet rolled up at ``resolution``, less ``lookback`` (None when there is no source data)."""
+    minutes = ROLLUP_RESOLUTIONS[resolution]
+    last = session.scalar(select(func.max(RouteRollup.bucket_start)).where(RouteRollup.resolution == resolution))
+    if last is not None:
+        return floor_time(last + timedelta(minutes=minutes) - lookback, minutes)
+    first = session.scalar(source_min)
+    return floor_time(first, minutes) if first is not None else None
+
+
+def _replace_rollups(session, resolution: str, start: datetime, cutoff: datetime, rows: List[Dict]):
+    session.execute(delete(RouteRollup).where(RouteRollup.resolution == resolution,
+                                              RouteRollup.bucket_start >= start, RouteRollup.bucket_start < cutoff))
+    if rows:
+        session.execute(insert(RouteRollup), rows)
+
+
+def _rollup_15m(session, cutoff: datetime) -> int:
+    start = _rollup_start(session, "15m", select(func.min(RouteSnapshot.timestamp)), ROLLUP_LOOKBACK)
+    if start is None or start >= cutoff:
+        return 0
+    rows = session.execute(
+        select(RouteSnapshot.route_id, RouteSnapshot.timestamp, RouteSnapshot.congestion_level,
+               RouteSnapshot.average_speed, RouteSnapshot.delay_minutes)
+        .where(RouteSnapshot.timestamp >= start, RouteSnapshot.timestamp < cutoff)
+        .execution_options(yield_per=5000)
+    )
+    buckets = _aggregate(((r, ts, 1, c, c, c, s, d) for r, ts, c, s, d in rows), 15)
+    _replace_rollups(session, "15m", start, cutoff, [acc.row("15m", r, b) for (r, b), acc in buckets.items()])
+    return len(buckets)
+
+
+def _rollup_1h(session, cutoff: datetime) -> int:
+    source = select(func.min(RouteRollup.bucket_start)).where(RouteRollup.resolution == "15m")
+    start = _rollup_start(session, "1h", source, ROLLUP_LOOKBACK)
+    if start is None or start >= cutoff:
+        return 0
+    rows = session.execute(
+        select(RouteRollup.route_id, RouteRollup.bucket_start, RouteRollup.samples, RouteRollup.congestion_mean,
+               RouteRollup.congestion_min, RouteRollup.congestion_max, RouteRollup.average_speed_mean,
+               RouteRollup.delay_minutes_mean)
+        .where(RouteRollup.resolution == "15m", RouteRollup.bucket_start >= start, RouteRollup.bucket_start < cutoff)
+        .execution_options(yield_per=5000)
+    )
+    buckets = _aggregate(rows, 60)
+    _replace_rollups(session, "1h", start, cutoff, [acc.row("1h", r, b) for (r, b), acc in buckets.items()])
+    return len(buckets)
+
+
+def maintain_rollups(now: Optional[datetime] = None) -> Dict[str, int]:
+    """Roll completed buckets up (raw -> 15m -> 1h) and apply retention."""
+    now = now or datetime.utcnow()
+    with SessionLocal() as session:
+        added_15m = _rollup_15m(session, floor_time(now, 15))
+        added_1h = _rollup_1h(session, floor_time(now, 60))
+        session.flush()
+        # only prune what has been rolled up and will not be recomputed
+        rolled_15m = _rollup_start(session, "15m", select(func.min(RouteSnapshot.timestamp)), ROLLUP_LOOKBACK)
+        rolled_1h = _rollup_start(session, "1h", select(func.min(RouteRollup.bucket_start)), ROLLUP_LOOKBACK)
+        raw_cut = min(now - RAW_RETENTION, rolled_15m or now)
+        pruned_raw = session.execute(delete(RouteSnapshot).where(RouteSnapshot.timestamp < raw_cut)).rowcount
+        pruned_15m = 0
+        if rolled_1h is not None:
+            cut_15m = min(now - ROLLUP_15M_RETENTION, rolled_1h)
+            pruned_15m = session.execute(
+                delete(RouteRollup).where(RouteRollup.resolution == "15m", RouteRollup.bucket_start < cut_15m)
+            ).rowcount
+        session.commit()
+    return {"rollups_15m": added_15m, "rollups_1h": added_1h, "pruned_raw": pruned_raw, "pruned_15m": pruned_15m}
+
+
+HISTORY_FIELDS = (
+    "route_id", "bucket_start", "samples", "congestion_mean", "congestion_min", "congestion_max",
+    "average_speed_mean", "delay_minutes_mean",
+)
+
+
+def iter_history(route_ids: Sequence[str], start: datetime, end: datetime, resolution: str,
+                 batch_size: int = 1000) -> Iterator[List[Dict]]:
+    """Stream rollup rows for ``route_ids`` in [start, end) in batches, ordered by route then time."""
+    columns = [getattr(RouteRollup, f) for f in HISTORY_FIELDS]
+    query = (
+        select(*columns)
+        .where(RouteRollup.resolution == resolution, RouteRollup.route_id.in_(list(route_ids)),
+               RouteRollup.bucket_start >= start, RouteRollup.bucket_start < end)
+        .order_by(RouteRollup.route_id, RouteRollup.bucket_start)
+        .execution_options(yield_per=batch_size)
+    )
+    with SessionLocal() as session:
+        for part in session.execute(query).partitions():
+            yield [
+                {"route_id": r, "bucket_start": b.isoformat(), "samples": n, "congestion_mean": c_mean,
+                 "congestion_min": c_min, "congestion_max": c_max, "average_speed_mean": speed,
+                 "delay_minutes_mean": delay}
+                for r, b, n, c_mean, c_min, c_max, speed, delay in part
+            ]
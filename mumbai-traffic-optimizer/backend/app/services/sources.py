@@ -0,0 +1,152 @@
+"""Pluggable async traffic sources and the concurrent collector that drives them."""
+import abc
+import asyncio
+import csv
+import itertools
+import logging
+import math
+import random
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import quote
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+def make_row(route_id: str, timestamp: datetime, congestion: float, weather: str,
+             average_speed: Optional[float] = None, delay_minutes: Optional[float] = None) -> Dict:
+    congestion = float(congestion)
+    if not math.isfinite(congestion):
+        raise ValueError(f"non-finite congestion_level for {route_id}")
+    congestion = max(1, min(10, congestion))
+    return {
+        "route_id": route_id,
+        "timestamp": timestamp.isoformat(),
+        "congestion_level": round(congestion, 2),
+        "average_speed": round(float(average_speed) if average_speed is not None else 50 - congestion * 3, 1),
+        "delay_minutes": round(float(delay_minutes) if delay_minutes is not None else congestion * 2.5, 1),
+        "weather": weather,
+    }
+
+
+class TrafficSource(abc.ABC):
+    name = "base"
+
+    def __init__(self, timeout: float = 2.0):
+        self.timeout = timeout
+
+    @abc.abstractmethod
+    async def fetch(self, route_id: str, now: datetime, client: httpx.AsyncClient) -> Optional[Dict]:
+        """Return a status row for ``route_id`` or None if this source has no reading."""
+
+
+class SimulatedSource(TrafficSource):
+    """Synthetic feed: peak-hour, rain and incident effects plus noise."""
+    name = "simulated"
+
+    async def fetch(self, route_id: str, now: datetime, client: httpx.AsyncClient) -> Optional[Dict]:
+        hour = now.hour
+        weekend = now.weekday() >= 5
+        peak = (8 <= hour <= 10 or 18 <= hour <= 20) and not weekend
+        base = 4 + (2 if peak else 0)
+        weather = random.choice(["Clear", "Rain", "Clouds"])
+        if weather == "Rain":
+            base += 1.2
+        if random.random() < 0.04:
+            base += 1.5
+        return make_row(route_id, now, base + random.uniform(-1, 1), weather)
+
+
+class CsvReplaySource(TrafficSource):
+    """Replays recorded readings from a CSV, one row per route per tick, looping at the end."""
+    name = "csv"
+
+    def __init__(self, path: Path, timeout: float = 2.0):
+        super().__init__(timeout)
+        self.path = Path(path)
+        with open(self.path, newline="", encoding="utf-8") as f:
+            by_route: Dict[str, List[Dict]] = {}
+            for row in csv.DictReader(f):
+                by_route.setdefault(row["route_id"], []).append(row)
+        self._cycles = {r: itertools.cycle(rows) for r, rows in by_route.items()}
+
+    async def fetch(self, route_id: str, now: datetime, client: httpx.AsyncClient) -> Optional[Dict]:
+        rows = self._cycles.get(route_id)
+        if rows is None:
+            return None
+        row = next(rows)
+        return make_row(route_id, now, row["congestion_level"], row.get("weather") or "Clear",
+                        row.get("average_speed") or None, row.get("delay_minutes") or None)
+
+
+class HttpSource(TrafficSource):
+    """Reads ``GET {base_url}/routes/{route_id}`` returning at least ``congestion_level``."""
+    name = "http"
+
+    def __init__(self, base_url: str, timeout: float = 2.0):
+        super().__init__(timeout)
+        self.base_url = base_url.rstrip("/")
+
+    async def fetch(self, route_id: str, now: datetime, client: httpx.AsyncClient) -> Optional[Dict]:
+        resp = await client.get(f"{self.base_url}/routes/{quote(route_id, safe='')}")
+        if resp.status_code == 404:
+            return None
+        resp.raise_for_status()
+        data = resp.json()
+        return make_row(route_id, now, data["congestion_level"], data.get("weather", "Clear"),
+                        data.get("average_speed"), data.get("delay_minutes"))
+
+
+class AsyncCollector:
+    def __init__(self, sources: Sequence[TrafficSource], routes: Sequence[str], concurrency: int = 8,
+                 client: Optional[httpx.AsyncClient] = None):
+        self.sources = list(sources)
+        self.routes = list(routes)
+        self.concurrency = concurrency
+        self.client = client
+
+    async def _fetch_route(self, route_id: str, now: datetime, client: httpx.AsyncClient,
+                           limit: asyncio.Semaphore) -> Optional[Dict]:
+        async with limit:
+            for source in self.sources:
+                try:
+                    row = await asyncio.wait_for(source.fetch(route_id, now, client), source.timeout)
+                except Exception as exc:
+                    logger.warning("Source %s failed for %s: %r", source.name, route_id, exc)
+                    continue
+                if row is not None:
+                    return row
+        return None
+
+    async def collect(self, now: Optional[datetime] = None) -> List[Dict]:
+        """Fetch every route concurrently and return the rows that some source answered."""
+        now = now or datetime.utcnow()
+        limit = asyncio.Semaphore(self.concurrency)
+        if self.client is not None:
+            rows = await asyncio.gather(*(self._fetch_route(r, now, self.client, limit) for r in self.routes))
+        else:
+            async with httpx.AsyncClient(limits=httpx.Limits(max_connections=self.concurrency)) as client:
+                rows = await asyncio.gather(*(self._fetch_route(r, now, client, limit) for r in self.routes))
+        return [r for r in rows if r is not None]
+
+
+def build_sources(spec: str, http_url: Optional[str] = None, replay_file: Optional[str] = None,
+                  timeout: float = 2.0) -> List[TrafficSource]:
+    """Build sources from a comma-separated priority list such as ``"http,simulated"``."""
+    sources: List[TrafficSource] = []
+    for name in (s.strip() for s in spec.split(",") if s.strip()):
+        if name == "simulated":
+            sources.append(SimulatedSource(timeout))
+        elif name == "csv":
+            if not replay_file:
+                raise ValueError("csv source requires TRAFFIC_REPLAY_FILE")
+            sources.append(CsvReplaySource(Path(replay_file), timeout))
+        elif name == "http":
+            if not http_url:
+                raise ValueError("http source requires TRAFFIC_HTTP_URL")
+            sources.append(HttpSource(http_url, timeout))
+        else:
+            raise ValueError(f"Unknown traffic source '{name}'")
+    return sources
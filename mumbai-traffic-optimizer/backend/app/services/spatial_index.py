@@ -0,0 +1,121 @@
+"""In-memory grid index for nearest-k and viewport lookups of intersections."""
+from __future__ import annotations
+import math
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from .signal_network import load_network_intersections
+
+CELL_DEG = 0.01  # ~1.1 km
+MAX_CELLS_PER_AXIS = 1024
+KM_PER_DEG = 111.195
+
+
+def _haversine_km(lat, lng, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    lat, lng = math.radians(lat), math.radians(lng)
+    lats, lngs = np.radians(lats), np.radians(lngs)
+    a = np.sin((lats - lat) / 2) ** 2 + math.cos(lat) * np.cos(lats) * np.sin((lngs - lng) / 2) ** 2
+    return 2 * 6371.0 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class GridIndex:
+    def __init__(self, lat, lng, cell_deg: float = CELL_DEG):
+        lat = np.asarray(lat, dtype=float)
+        lng = np.asarray(lng, dtype=float)
+        self.size = len(lat)
+        self.lat0 = float(lat.min()) if self.size else 0.0
+        self.lng0 = float(lng.min()) if self.size else 0.0
+        extent = max(float(np.ptp(lat)), float(np.ptp(lng))) if self.size else 0.0
+        self.cell = max(cell_deg, extent / MAX_CELLS_PER_AXIS)
+        cy = ((lat - self.lat0) // self.cell).astype(np.int64)
+        cx = ((lng - self.lng0) // self.cell).astype(np.int64)
+        self.ny = int(cy.max()) + 1 if self.size else 1
+        self.nx = int(cx.max()) + 1 if self.size else 1
+        key = cy * self.nx + cx
+        self.order = np.argsort(key, kind="stable")
+        self.lat = lat[self.order]
+        self.lng = lng[self.order]
+        self.ptr = np.concatenate([[0], np.cumsum(np.bincount(key, minlength=self.ny * self.nx))])
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return int((lat - self.lat0) // self.cell), int((lng - self.lng0) // self.cell)
+
+    def _square(self, y0: int, y1: int, x0: int, x1: int) -> np.ndarray:
+        """Sorted positions of every point in cell rows y0..y1, columns x0..x1 (inclusive, clamped)."""
+        y0, y1 = max(y0, 0), min(y1, self.ny - 1)
+        x0, x1 = max(x0, 0), min(x1, self.nx - 1)
+        if y0 > y1 or x0 > x1:
+            return np.empty(0, dtype=np.int64)
+        rows = np.arange(y0, y1 + 1) * self.nx
+        starts, ends = self.ptr[rows + x0], self.ptr[rows + x1 + 1]
+        return np.concatenate([np.arange(s, e) for s, e in zip(starts.tolist(), ends.tolist())])
+
+    def within(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> np.ndarray:
+        """Original indices of all points inside the box."""
+        y0, x0 = self._cell(min_lat, min_lng)
+        y1, x1 = self._cell(max_lat, max_lng)
+        pos = self._square(y0, y1, x0, x1)
+        lat, lng = self.lat[pos], self.lng[pos]
+        keep = (lat >= min_lat) & (lat <= max_lat) & (lng >= min_lng) & (lng <= max_lng)
+        return self.order[pos[keep]]
+
+    def nearest(self, lat: float, lng: float, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Original indices and great-circle distances (km) of the ``k`` closest points."""
+        k = min(k, self.size)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        cy, cx = self._cell(lat, lng)
+        cy, cx = min(max(cy, 0), self.ny - 1), min(max(cx, 0), self.nx - 1)
+        r = 0
+        while True:
+            pos = self._square(cy - r, cy + r, cx - r, cx + r)
+            covers_all = cy - r <= 0 and cx - r <= 0 and cy + r >= self.ny - 1 and cx + r >= self.nx - 1
+            if len(pos) >= k:
+                dist = _haversine_km(lat, lng, self.lat[pos], self.lng[pos])
+                top = np.argpartition(dist, k - 1)[:k]
+                top = top[np.argsort(dist[top], kind="stable")]
+                # closest any point outside the square could be
+                lat_lo, lat_hi = self.lat0 + (cy - r) * self.cell, self.lat0 + (cy + r + 1) * self.cell
+                lng_lo, lng_hi = self.lng0 + (cx - r) * self.cell, self.lng0 + (cx + r + 1) * self.cell
+                cos = math.cos(math.radians(min(max(abs(lat_lo), abs(lat_hi)), 89.9)))
+                margin = min(lat - lat_lo, lat_hi - lat) * KM_PER_DEG
+                margin = min(margin, min(lng - lng_lo, lng_hi - lng) * KM_PER_DEG * cos)
+                if covers_all or dist[top[-1]] <= margin:
+                    return self.order[pos[top]], dist[top]
+            r = max(1, r * 2)
+
+
+class IntersectionIndex:
+    """Intersection records behind a GridIndex."""
+
+    def __init__(self, intersections: Sequence[Dict[str, Any]], cell_deg: float = CELL_DEG):
+        self.intersections = list(intersections)
+        self.grid = GridIndex([i["location"]["lat"] for i in self.intersections],
+                              [i["location"]["lng"] for i in self.intersections], cell_deg)
+
+    def __len__(self) -> int:
+        return len(self.intersections)
+
+    def nearest(self, lat: float, lng: float, k: int = 5) -> List[Dict[str, Any]]:
+        idx, dist = self.grid.nearest(lat, lng, k)
+        return [dict(self.intersections[i], distance_km=round(float(d), 3)) for i, d in zip(idx.tolist(), dist)]
+
+    def within(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+               limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """Intersections in the box (at most ``limit``) and the total number that matched."""
+        idx = self.grid.within(min_lat, min_lng, max_lat, max_lng)
+        shown = idx if limit is None else idx[:limit]
+        return [self.intersections[i] for i in shown.tolist()], len(idx)
+
+
+_index: Optional[IntersectionIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_intersection_index() -> IntersectionIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = IntersectionIndex(load_network_intersections())
+    return _index
@@ -1,70 +1,301 @@
 from __future__ import annotations
 from pathlib import Path
+import logging
+import os
 import pickle
+import threading
+import time
+import zlib
 from datetime import datetime
-import random
-import pandas as pd
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from ..utils.metrics import registry, span
+from ..ml_models.compiled_forest import CompiledForest, compile_forest, current_version
+from ..ml_models.online_model import WEATHER_INDEX, OnlineModel
+
+logger = logging.getLogger(__name__)
 
 MODEL_PATH = Path(__file__).resolve().parent.parent / "ml_models" / "traffic_model.pkl"
+ARTIFACTS_DIR = MODEL_PATH.parent / "artifacts"
+# seconds between checks of artifacts/CURRENT for a new version (0 disables)
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "30"))
+# online per route x hour x weather statistics, learned from every collection tick ("0" disables)
+ONLINE_LEARNING = os.getenv("ONLINE_LEARNING", "1") != "0"
+ONLINE_STATE_FILE = Path(os.getenv("ONLINE_STATE_FILE", ARTIFACTS_DIR / "online_state.npz"))
+ONLINE_MIN_COUNT = 4  # observations before a cell is served
+ONLINE_MIN_TICKS = 8  # evaluated ticks before the online statistics may take over
+ONLINE_ALPHA = 0.05  # weight of the newest tick in the error averages
+ONLINE_DRIFT_RATIO = 1.25  # back to the forest once online error exceeds its error by this factor
+
+FEATURE_COLUMNS = [
+    "hour", "dow", "month", "is_weekend", "is_peak", "rainfall", "temperature", "is_festival", "hist_avg"
+]
+TEMPERATURE_COL = FEATURE_COLUMNS.index("temperature")
+HIST_AVG_COL = FEATURE_COLUMNS.index("hist_avg")
+N_JITTER = 5
+N_DRAWS = 3 + N_JITTER
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+
+
+def _row_uniforms(route_ids: Sequence[str], target_times: Sequence[datetime], k: int) -> np.ndarray:
+    """Uniforms in [0, 1) seeded per (route, hour bucket) row, shape (n_routes * n_times, k)."""
+    hours = np.array([t.toordinal() * 24 + t.hour for t in target_times], dtype=np.uint64)
+    routes = np.array([zlib.crc32(r.encode()) for r in route_ids], dtype=np.uint64)
+    seeds = ((routes[:, None] << np.uint64(32)) ^ hours[None, :]).reshape(-1)
+    z = seeds[:, None] + _GOLDEN * np.arange(1, k + 1, dtype=np.uint64)
+    z = (z ^ (z >> np.uint64(30))) * _MIX1
+    z = (z ^ (z >> np.uint64(27))) * _MIX2
+    z = z ^ (z >> np.uint64(31))
+    return (z >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+
+
+def _weather_draw(u: np.ndarray) -> np.ndarray:
+    """Sampled weather per row: Clear / Rain / Clouds with equal odds (``WEATHER_INDEX`` order)."""
+    return (u[:, 0] * 3).astype(int)
 
 
 class TrafficPredictorService:
-    def __init__(self):
-        self.model = None
-        self._load_or_stub()
+    """Congestion forecasts from the compiled forest (or a heuristic stub) and online statistics."""
+
+    def __init__(self, artifacts_dir: Path = ARTIFACTS_DIR, watch_interval: float = MODEL_WATCH_INTERVAL,
+                 online_state_file: Optional[Path] = ONLINE_STATE_FILE if ONLINE_LEARNING else None):
+        self.artifacts_dir = Path(artifacts_dir)
+        self.watch_interval = watch_interval
+        self.version: Optional[str] = None
+        self._model: Optional[CompiledForest] = None
+        self._loaded = False
+        self._next_check = 0.0
+        self._lock = threading.Lock()
         self.routes = [
             "Western Express Highway", "Eastern Express Highway", "Sion-Panvel Highway",
             "LBS Marg", "SV Road", "Jogeshwari-Vikhroli Link Road"
         ]
+        self.online_state_file = Path(online_state_file) if online_state_file else None
+        self.online: Optional[OnlineModel] = self._load_online() if self.online_state_file else None
+        self._online_lock = threading.Lock()
+
+    @property
+    def model(self) -> Optional[CompiledForest]:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._swap(*self._load_or_stub())
+        elif self.watch_interval and time.monotonic() >= self._next_check:
+            self._check_for_update()
+        return self._model
 
-    def _load_or_stub(self):
+    def _load_or_stub(self, version: Optional[str] = None):
+        """Return (model, version); a legacy pickle is compiled in memory, no model means the stub."""
+        version = version or current_version(self.artifacts_dir)
+        if version:
+            try:
+                return CompiledForest.load_artifact(self.artifacts_dir / version), version
+            except Exception:
+                logger.exception("Failed to load model artifact %s", version)
         if MODEL_PATH.exists():
             try:
                 with open(MODEL_PATH, "rb") as f:
-                    self.model = pickle.load(f)
+                    return compile_forest(pickle.load(f)), None
+            except Exception:
+                logger.exception("Failed to load %s", MODEL_PATH)
+        return None, None
+
+    def _swap(self, model: Optional[CompiledForest], version: Optional[str]):
+        self._model, self.version = model, version
+        self._loaded = True
+        self._next_check = time.monotonic() + self.watch_interval
+
+    def _check_for_update(self):
+        if not self._lock.acquire(blocking=False):
+            return  # another thread is already checking or reloading
+        try:
+            self._next_check = time.monotonic() + self.watch_interval
+            version = current_version(self.artifacts_dir)
+            if version and version != self.version:
+                model, loaded = self._load_or_stub(version)
+                if loaded == version:
+                    logger.info("Hot-reloaded traffic model %s (was %s)", version, self.version)
+                    self._swap(model, version)
+        finally:
+            self._lock.release()
+
+    def _load_online(self) -> OnlineModel:
+        if self.online_state_file.exists():
+            try:
+                return OnlineModel.load(self.online_state_file, self.routes)
             except Exception:
-                self.model = None
-
-    def _feature_row(self, route_id: str, target_time: datetime) -> pd.DataFrame:
-        hour = target_time.hour
-        dow = target_time.weekday()
-        month = target_time.month
-        is_weekend = 1 if dow >= 5 else 0
-        is_peak = 1 if (8 <= hour <= 10 or 18 <= hour <= 20) and not is_weekend else 0
-        weather_condition = random.choice(["Clear", "Rain", "Clouds"])
-        is_festival = 1 if random.random() < 0.05 else 0
-        rainfall = 1 if weather_condition == "Rain" else 0
-        temp = 30 + random.random() * 5
-        hist_avg = 5 + (2 if is_peak else 0) + (1 if weather_condition == "Rain" else 0)
-        return pd.DataFrame([{
-            "hour": hour,
-            "dow": dow,
-            "month": month,
-            "is_weekend": is_weekend,
-            "is_peak": is_peak,
-            "rainfall": rainfall,
-            "temperature": temp,
-            "is_festival": is_festival,
-            "hist_avg": hist_avg
-        }])
+                logger.exception("Failed to load online model state %s", self.online_state_file)
+        return OnlineModel(self.routes)
+
+    def reload(self) -> Dict:
+        """Load the CURRENT artifact now and swap it in; returns the model info."""
+        with self._lock:
+            self._swap(*self._load_or_stub())
+        return self.info()
+
+    def info(self) -> Dict:
+        model = self.model
+        return {
+            "version": self.version,
+            "loaded": model is not None,
+            "metadata": model.metadata if model is not None else {},
+            "online": self.online.stats() if self.online is not None else None,
+        }
+
+    def _feature_matrix(self, n_routes: int, target_times: Sequence[datetime], u: np.ndarray) -> np.ndarray:
+        """Build the (n_routes * n_times, n_features) matrix, route-major."""
+        n_times = len(target_times)
+        hour = np.array([t.hour for t in target_times], dtype=float)
+        dow = np.array([t.weekday() for t in target_times], dtype=float)
+        month = np.array([t.month for t in target_times], dtype=float)
+        is_weekend = (dow >= 5).astype(float)
+        is_peak = (((8 <= hour) & (hour <= 10)) | ((18 <= hour) & (hour <= 20))) & (is_weekend == 0)
+
+        n = n_routes * n_times
+        X = np.empty((n, len(FEATURE_COLUMNS)))
+        X[:, 0] = np.tile(hour, n_routes)
+        X[:, 1] = np.tile(dow, n_routes)
+        X[:, 2] = np.tile(month, n_routes)
+        X[:, 3] = np.tile(is_weekend, n_routes)
+        X[:, 4] = np.tile(is_peak, n_routes)
+        rainfall = (_weather_draw(u) == WEATHER_INDEX["Rain"]).astype(float)
+        X[:, 5] = rainfall
+        X[:, 6] = 30 + u[:, 1] * 5
+        X[:, 7] = (u[:, 2] < 0.05).astype(float)
+        X[:, 8] = 5 + 2 * X[:, 4] + rainfall
+        return X
+
+    def _batch_scores(self, X: np.ndarray, u: np.ndarray):
+        """(prediction, confidence) per row from the forest, or the stub when no model is loaded."""
+        n = X.shape[0]
+        model = self.model
+        if model is None:
+            return np.clip(X[:, HIST_AVG_COL] + u[:, 3] * 2 - 1, 1, 10), 0.6 + u[:, 4] * 0.2
+        jitter = np.repeat(X[None, :, :], N_JITTER, axis=0)
+        jitter[:, :, TEMPERATURE_COL] += u[:, 3:3 + N_JITTER].T * 2 - 1
+        with span("model.predict"):
+            scores = model.predict(np.vstack([X, jitter.reshape(-1, X.shape[1])]))
+        variance = scores[n:].reshape(N_JITTER, n).var(axis=0, ddof=1) + 1e-6
+        return scores[:n], 1 / (1 + variance)
+
+    def _online_cells(self, route_ids: Sequence[str], target_times: Sequence[datetime], u: np.ndarray) -> np.ndarray:
+        hours = [t.hour for t in target_times]
+        return self.online.cells([r for r in route_ids for _ in hours], hours * len(route_ids), _weather_draw(u))
+
+    def observe(self, rows: Sequence[Dict], persist: bool = True):
+        """Score the forecasts for one collection tick, then learn from it in O(len(rows))."""
+        online = self.online
+        if online is None or not rows or rows[0]["timestamp"] == online.last_tick:
+            return  # disabled, empty, or a tick already learned (a follower re-reading it)
+        with self._online_lock:
+            by_bucket: Dict[datetime, List[Dict]] = {}
+            for row in rows:
+                if row["route_id"] in online.route_index:
+                    bucket = datetime.fromisoformat(row["timestamp"]).replace(minute=0, second=0, microsecond=0)
+                    by_bucket.setdefault(bucket, []).append(row)
+            online_err = batch_err = 0.0
+            covered_rows = 0
+            for bucket, group in by_bucket.items():
+                route_ids = [r["route_id"] for r in group]
+                actual = np.array([r["congestion_level"] for r in group], dtype=float)
+                u = _row_uniforms(route_ids, [bucket], N_DRAWS)
+                batch, _ = self._batch_scores(self._feature_matrix(len(route_ids), [bucket], u), u)
+                mean, _, covered = online.predict(self._online_cells(route_ids, [bucket], u), ONLINE_MIN_COUNT)
+                online_err += float(np.abs(mean - actual)[covered].sum())
+                batch_err += float(np.abs(batch - actual)[covered].sum())
+                covered_rows += int(covered.sum())
+                weathers = [WEATHER_INDEX.get(r.get("weather"), -1) for r in group]
+                online.update(online.cells(route_ids, [bucket.hour] * len(group), weathers), actual)
+            if covered_rows:
+                online.track_error(online_err / covered_rows, batch_err / covered_rows, ONLINE_ALPHA)
+                self._choose_source(online)
+            online.last_tick = rows[0]["timestamp"]
+            if not persist:
+                return
+            try:
+                online.save(self.online_state_file)
+            except OSError as exc:
+                logger.warning("Could not save online model state to %s: %s", self.online_state_file, exc)
+
+    @staticmethod
+    def _choose_source(online: OnlineModel):
+        if online.evaluated_ticks < ONLINE_MIN_TICKS:
+            return
+        was_active = online.active
+        # hysteresis: take over once better than the forest, give up only once clearly worse
+        online.active = online.online_mae <= online.batch_mae * (ONLINE_DRIFT_RATIO if was_active else 1.0)
+        if online.active != was_active:
+            logger.info("Forecasts now use the %s (online MAE %.3f, forest MAE %.3f)",
+                        "online statistics" if online.active else "forest", online.online_mae, online.batch_mae)
+
+    def predict_many(self, route_ids: Sequence[str], target_times: Sequence[datetime],
+                     online: bool = True) -> List[Dict]:
+        """Predict every route x target time in one pass, route-major; ``online=False`` skips the online overlay."""
+        route_ids = list(route_ids)
+        target_times = list(target_times)
+        u = _row_uniforms(route_ids, target_times, N_DRAWS)
+        X = self._feature_matrix(len(route_ids), target_times, u)
+        n = X.shape[0]
+        if n == 0:
+            return []
+        pred, confidence = self._batch_scores(X, u)
+        if online:
+            covered, mean, online_confidence = self._online_overlay(route_ids, target_times, u)
+            pred = np.where(covered, mean, pred)
+            confidence = np.where(covered, online_confidence, confidence)
+
+        results = []
+        i = 0
+        for route_id in route_ids:
+            for target in target_times:
+                results.append({
+                    "route_id": route_id,
+                    "target_time": target.isoformat(),
+                    "congestion_level": round(float(pred[i]), 2),
+                    "confidence": round(float(confidence[i]), 3)
+                })
+                i += 1
+        return results
+
+    def _online_overlay(self, route_ids: Sequence[str], target_times: Sequence[datetime], u: np.ndarray):
+        """(covered, mean, confidence) per row from the online statistics; nothing is covered while inactive."""
+        online = self.online
+        if online is None or not online.active:
+            return np.zeros(len(u), dtype=bool), None, None
+        mean, variance, covered = online.predict(self._online_cells(route_ids, target_times, u), ONLINE_MIN_COUNT)
+        return covered, mean, 1 / (1 + variance)
+
+    def apply_online(self, route_ids: Sequence[str], target_times: Sequence[datetime], rows: List[Dict]) -> List[Dict]:
+        """Overlay this process' online statistics on rows from ``predict_many(..., online=False)``."""
+        route_ids, target_times = list(route_ids), list(target_times)
+        u = _row_uniforms(route_ids, target_times, N_DRAWS)
+        covered, mean, confidence = self._online_overlay(route_ids, target_times, u)
+        for i in np.flatnonzero(covered):
+            rows[i]["congestion_level"] = round(float(mean[i]), 2)
+            rows[i]["confidence"] = round(float(confidence[i]), 3)
+        return rows
 
     def predict_congestion(self, route_id: str, target_time: datetime):
-        features = self._feature_row(route_id, target_time)
-        if self.model:
-            pred = float(self.model.predict(features)[0])
-            sims = []
-            for _ in range(5):
-                jitter = features.copy()
-                jitter["temperature"] += random.uniform(-1, 1)
-                sims.append(float(self.model.predict(jitter)[0]))
-            variance = pd.Series(sims).var() + 1e-6
-            confidence = 1 / (1 + variance)
-        else:
-            base = features["hist_avg"].iloc[0]
-            noise = random.uniform(-1, 1)
-            pred = max(1, min(10, base + noise))
-            confidence = 0.6 + random.random() * 0.2
-        return round(pred, 2), round(confidence, 3)
+        row = self.predict_many([route_id], [target_time])[0]
+        return row["congestion_level"], row["confidence"]
 
 
 predictor_service = TrafficPredictorService()
+
+
+def _online_metrics():
+    online = predictor_service.online
+    if online is None:
+        return
+    yield "online_model_active", "gauge", "1 while forecasts use the online statistics", [({}, float(online.active))]
+    yield "online_model_observations", "gauge", "Snapshot rows folded into the online statistics", \
+        [({}, float(online.count.sum()))]
+    if online.online_mae is not None:
+        yield "online_model_mae", "gauge", "Moving mean absolute error against realized congestion", \
+            [({"model": "online"}, online.online_mae), ({"model": "forest"}, online.batch_mae)]
+
+
+registry.add_collector(_online_metrics)
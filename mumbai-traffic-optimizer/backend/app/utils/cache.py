@@ -1,36 +1,309 @@
-import json
+"""Bounded, thread-safe LRU/TTL cache, the two-tier ``cache`` and the ``cached`` decorator."""
+import asyncio
+import functools
+import os
+import sys
+import threading
 import time
-from typing import Any, Callable
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+from .metrics import span
+from .redis_cache import MISSING as L2_MISSING, RedisBackend
+
+_MISSING = object()
+
+
+def _sizeof(value: Any, _depth: int = 0) -> int:
+    """Approximate deep size in bytes; good enough for budgeting, not exact."""
+    size = sys.getsizeof(value)
+    if _depth > 4:
+        return size
+    if isinstance(value, dict):
+        size += sum(_sizeof(k, _depth + 1) + _sizeof(v, _depth + 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_sizeof(v, _depth + 1) for v in value)
+    return size
+
+
+class _Flight:
+    __slots__ = ("event", "value", "error")
 
-class SimpleInMemoryCache:
     def __init__(self):
-        self._store = {}
-
-    def get(self, key: str):
-        item = self._store.get(key)
-        if not item:
-            return None
-        value, exp = item
-        if exp and exp < time.time():
-            self._store.pop(key, None)
-            return None
+        self.event = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class LRUCache:
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 64 * 1024 * 1024, sweep_interval: float = 30.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self._data: "OrderedDict[Hashable, Tuple[Any, Optional[float], int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._ainflight: Dict[Hashable, Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = {}
+        self._last_sweep = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def _pop_locked(self, key: Hashable):
+        _, _, size = self._data.pop(key)
+        self._bytes -= size
+
+    def _get_locked(self, key: Hashable, now: float):
+        item = self._data.get(key)
+        if item is None:
+            return _MISSING
+        value, exp, _ = item
+        if exp is not None and exp < now:
+            self._pop_locked(key)
+            self.expirations += 1
+            return _MISSING
+        self._data.move_to_end(key)
         return value
 
-    def set(self, key: str, value: Any, ttl: int | None = None):
-        exp = time.time() + ttl if ttl else None
-        self._store[key] = (value, exp)
+    def get(self, key: Hashable, default: Any = None):
+        with self._lock:
+            value = self._get_locked(key, time.monotonic())
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        size = _sizeof(value)
+        if size > self.max_bytes:
+            return
+        now = time.monotonic()
+        exp = now + ttl if ttl else None
+        with self._lock:
+            if key in self._data:
+                self._pop_locked(key)
+            self._data[key] = (value, exp, size)
+            self._bytes += size
+            if now - self._last_sweep >= self.sweep_interval:
+                self._sweep_locked(now)
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                self._pop_locked(next(iter(self._data)))
+                self.evictions += 1
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            if key in self._data:
+                self._pop_locked(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _sweep_locked(self, now: float) -> int:
+        expired = [k for k, (_, exp, _) in self._data.items() if exp is not None and exp < now]
+        for k in expired:
+            self._pop_locked(k)
+        self.expirations += len(expired)
+        self._last_sweep = now
+        return len(expired)
+
+    def sweep(self) -> int:
+        """Drop every expired entry; returns how many were removed."""
+        with self._lock:
+            return self._sweep_locked(time.monotonic())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any], ttl: Optional[float] = None):
+        """Return the cached value, or compute it once however many threads miss together."""
+        with self._lock:
+            value = self._get_locked(key, time.monotonic())
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            self.misses += 1
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = compute()
+            self.set(key, flight.value, ttl)
+            return flight.value
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    async def aget_or_compute(self, key: Hashable, compute: Callable[[], Any], ttl: Optional[float] = None):
+        """Async flavour of ``get_or_compute``; ``compute`` returns an awaitable."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            value = self._get_locked(key, time.monotonic())
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            self.misses += 1
+            pending = self._ainflight.get(key)
+            if pending is not None and pending[0] is loop:
+                fut = pending[1]
+                leader = False
+            else:
+                fut = loop.create_future()
+                self._ainflight[key] = (loop, fut)
+                leader = True
+        if not leader:
+            return await asyncio.shield(fut)
+        try:
+            value = await compute()
+            self.set(key, value, ttl)
+            fut.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except BaseException as exc:
+            fut.set_exception(exc)
+            fut.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            with self._lock:
+                if self._ainflight.get(key, (None, None))[1] is fut:
+                    del self._ainflight[key]
+
+
+class TieredCache:
+    """L1 ``LRUCache`` backed by an optional ``RedisBackend`` L2."""
+
+    def __init__(self, l1: LRUCache, l2: Optional[RedisBackend] = None, l1_fill_ttl: float = 5.0):
+        self.l1 = l1
+        self.l2 = l2
+        # L2 does not report remaining TTLs, so bulk reads keep copies in L1 only briefly
+        self.l1_fill_ttl = l1_fill_ttl
+
+    def _through_l2(self, key: Hashable, compute: Callable[[], Any], ttl: Optional[float]):
+        if self.l2 is not None:
+            with span("cache.l2_get"):
+                value = self.l2.get_many([key])[0]
+            if value is not L2_MISSING:
+                return value
+        value = compute()
+        if self.l2 is not None:
+            with span("cache.l2_set"):
+                self.l2.set_many({key: value}, ttl)
+        return value
+
+    async def _athrough_l2(self, key: Hashable, compute: Callable[[], Any], ttl: Optional[float]):
+        if self.l2 is not None:
+            with span("cache.l2_get"):
+                value = (await asyncio.to_thread(self.l2.get_many, [key]))[0]
+            if value is not L2_MISSING:
+                return value
+        value = await compute()
+        if self.l2 is not None:
+            with span("cache.l2_set"):
+                await asyncio.to_thread(self.l2.set_many, {key: value}, ttl)
+        return value
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any], ttl: Optional[float] = None):
+        return self.l1.get_or_compute(key, lambda: self._through_l2(key, compute, ttl), ttl)
+
+    async def aget_or_compute(self, key: Hashable, compute: Callable[[], Any], ttl: Optional[float] = None):
+        return await self.l1.aget_or_compute(key, lambda: self._athrough_l2(key, compute, ttl), ttl)
+
+    def get_many(self, keys: Sequence[Hashable]) -> List[Any]:
+        """Bulk read: L1 first, then one pipelined L2 round trip for the rest (None when absent)."""
+        out = [self.l1.get(k, _MISSING) for k in keys]
+        missing = [i for i, v in enumerate(out) if v is _MISSING]
+        if missing and self.l2 is not None:
+            for i, value in zip(missing, self.l2.get_many([keys[i] for i in missing])):
+                if value is not L2_MISSING:
+                    out[i] = value
+                    self.l1.set(keys[i], value, self.l1_fill_ttl)
+        return [None if v is _MISSING else v for v in out]
+
+    def set_many(self, items: Dict[Hashable, Any], ttl: Optional[float] = None):
+        for key, value in items.items():
+            self.l1.set(key, value, ttl)
+        if self.l2 is not None:
+            self.l2.set_many(items, ttl)
+
+    def get(self, key: Hashable, default: Any = None):
+        value = self.get_many([key])[0]
+        return default if value is None else value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        self.set_many({key: value}, ttl)
+
+    def delete(self, key: Hashable):
+        self.l1.delete(key)
+        if self.l2 is not None:
+            self.l2.delete(key)
+
+    def clear(self):
+        self.l1.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {"l1": self.l1.stats()}
+        if self.l2 is not None:
+            stats["l2"] = self.l2.stats()
+        return stats
+
+
+def _build_cache() -> TieredCache:
+    url = os.getenv("REDIS_URL")
+    return TieredCache(LRUCache(), RedisBackend.from_url(url) if url else None)
+
+
+cache = _build_cache()
+
+
+def _make_key(name: str, args: tuple, kwargs: dict) -> Hashable:
+    key = (name, args, tuple(sorted(kwargs.items())) if kwargs else ())
+    try:
+        hash(key)
+    except TypeError:
+        key = (name, repr(args), repr(sorted(kwargs.items())))
+    return key
 
-cache = SimpleInMemoryCache()
 
 def cached(ttl: int = 60):
+    """Memoize a sync or async function in the shared cache for ``ttl`` seconds."""
     def deco(func: Callable):
+        name = f"{func.__module__}.{func.__qualname__}"
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await cache.aget_or_compute(_make_key(name, args, kwargs), lambda: func(*args, **kwargs), ttl)
+            return async_wrapper
+
+        @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            key = func.__name__ + json.dumps([args, kwargs], sort_keys=True)
-            hit = cache.get(key)
-            if hit is not None:
-                return hit
-            val = func(*args, **kwargs)
-            cache.set(key, val, ttl)
-            return val
+            return cache.get_or_compute(_make_key(name, args, kwargs), lambda: func(*args, **kwargs), ttl)
         return wrapper
     return deco
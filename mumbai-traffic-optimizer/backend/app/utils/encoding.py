@@ -0,0 +1,255 @@
+"""Content negotiation, compression and ETags for bulk endpoints."""
+import gzip
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+
+from .cache import LRUCache
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib json fallback
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is then not offered
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COLUMNAR_JSON = "application/vnd.trafficiq.columnar+json"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+MEDIA_TYPES = {
+    "json": "application/json",
+    "columnar": COLUMNAR_JSON,
+    "msgpack": "application/msgpack",
+    "arrow": ARROW_STREAM,
+}
+_ACCEPTED = {
+    "application/json": "json",
+    COLUMNAR_JSON: "columnar",
+    "application/msgpack": "msgpack",
+    "application/x-msgpack": "msgpack",
+    ARROW_STREAM: "arrow",
+}
+MIN_COMPRESS_BYTES = 1024
+VARY = "Accept, Accept-Encoding"
+
+# encoded bodies of versioned payloads: (key, version, format, requested coding) -> (body, applied coding)
+_bodies = LRUCache(max_entries=512, max_bytes=32 * 1024 * 1024)
+BODY_TTL = 1800
+
+_pyarrow = None
+
+
+def _arrow_module():
+    # pyarrow is large; import it on the first Arrow request only
+    global _pyarrow
+    if _pyarrow is None:
+        try:
+            import pyarrow
+            import pyarrow.ipc  # noqa: F401
+        except ImportError:
+            _pyarrow = False
+        else:
+            _pyarrow = pyarrow
+    return _pyarrow or None
+
+
+def available(fmt: str) -> bool:
+    if fmt == "msgpack":
+        return msgpack is not None
+    if fmt == "arrow":
+        return _arrow_module() is not None
+    return fmt in MEDIA_TYPES
+
+
+def _by_quality(header: str) -> List[Tuple[str, float]]:
+    """``Accept``-style header values ordered by descending q (ties keep header order)."""
+    items = []
+    for part in header.split(","):
+        name, *params = [p.strip() for p in part.split(";")]
+        if not name:
+            continue
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        items.append((name.lower(), q))
+    return sorted(items, key=lambda item: -item[1])
+
+
+def choose_format(request: Request) -> str:
+    fmt = request.query_params.get("format")
+    if fmt:
+        if fmt not in MEDIA_TYPES:
+            raise HTTPException(status_code=400, detail=f"format must be one of {sorted(MEDIA_TYPES)}")
+        if not available(fmt):
+            raise HTTPException(status_code=406, detail=f"{fmt} encoding is not available on this server")
+        return fmt
+    for media_type, q in _by_quality(request.headers.get("accept", "")):
+        fmt = _ACCEPTED.get(media_type)
+        if q > 0 and fmt and available(fmt):
+            return fmt
+    return "json"
+
+
+def choose_coding(request: Request) -> Optional[str]:
+    offered = dict(_by_quality(request.headers.get("accept-encoding", "")))
+    for coding in ("br", "gzip") if brotli is not None else ("gzip",):
+        if offered.get(coding, offered.get("*", 0)) > 0:
+            return coding
+    return None
+
+
+def _is_rows(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(row, dict) for row in value)
+
+
+def to_columns(rows: List[Dict]) -> Dict[str, List]:
+    """Rows as ``{column: [values]}``; keys missing from a row become None."""
+    keys = tuple(rows[0]) if rows else ()
+    if all(tuple(row) == keys for row in rows):
+        # the usual case, rows built by one function: transpose in C
+        return dict(zip(keys, map(list, zip(*(row.values() for row in rows)))))
+    columns = {}
+    for row in rows:
+        for k in row:
+            columns.setdefault(k, None)
+    return {k: [row.get(k) for row in rows] for k in columns}
+
+
+def columnar(payload: Any) -> Any:
+    if _is_rows(payload):
+        return to_columns(payload)
+    if isinstance(payload, dict):
+        return {k: to_columns(v) if _is_rows(v) else v for k, v in payload.items()}
+    return payload
+
+
+def dumps_json(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, default=str, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def _dumps_arrow(payload: Any) -> bytes:
+    pa = _arrow_module()
+    if _is_rows(payload):
+        name, rows, meta = "rows", payload, {}
+    else:
+        tables = [k for k, v in payload.items() if _is_rows(v)] if isinstance(payload, dict) else []
+        if len(tables) != 1:
+            raise HTTPException(status_code=406, detail="arrow needs a response with exactly one table")
+        name = tables[0]
+        rows, meta = payload[name], {k: v for k, v in payload.items() if k != name}
+    table = pa.Table.from_pylist(rows).replace_schema_metadata({"table": name, "meta": dumps_json(meta)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode(payload: Any, fmt: str) -> bytes:
+    if fmt == "json":
+        return dumps_json(payload)
+    if fmt == "columnar":
+        return dumps_json(columnar(payload))
+    if fmt == "msgpack":
+        return msgpack.packb(columnar(payload), use_bin_type=True, default=str)
+    return _dumps_arrow(payload)
+
+
+def compress(body: bytes, coding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    if coding is None or len(body) < MIN_COMPRESS_BYTES:
+        return body, None
+    if coding == "br":
+        return brotli.compress(body, quality=4), coding
+    return gzip.compress(body, compresslevel=5), coding
+
+
+def _etag(*parts: Hashable) -> str:
+    return 'W/"%s"' % hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+
+
+def _body_etag(body: bytes) -> str:
+    return 'W/"%s"' % hashlib.blake2b(body, digest_size=12).hexdigest()
+
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # weak comparison: W/ prefixes are ignored
+    return any(tag.strip().removeprefix("W/") == etag.removeprefix("W/") for tag in header.split(","))
+
+
+class _Negotiation:
+    def __init__(self, request: Request, key: Optional[Hashable], version: Optional[Hashable]):
+        self.request = request
+        self.fmt = choose_format(request)
+        self.coding = choose_coding(request)
+        self.conditional = request.method == "GET"
+        if key is None:
+            key = (request.url.path, tuple(sorted((k, v) for k, v in request.query_params.multi_items()
+                                                  if k != "format")))
+        self.key = (key, version, self.fmt) if version is not None else None
+        self.etag = _etag(*self.key) if self.key else None
+
+    def _headers(self, coding: Optional[str] = None) -> Dict[str, str]:
+        headers = {"ETag": self.etag, "Vary": VARY}
+        if coding:
+            headers["Content-Encoding"] = coding
+        return headers
+
+    def _not_modified(self) -> Response:
+        return Response(status_code=304, headers=self._headers())
+
+    def early(self) -> Optional[Response]:
+        """A 304 or an already encoded body for this version; None when the payload has to be built."""
+        if self.key is None:
+            return None
+        if self.conditional and _matches(self.request, self.etag):
+            return self._not_modified()
+        hit = _bodies.get(self.key + (self.coding,))
+        if hit is None:
+            return None
+        body, coding = hit
+        return Response(body, media_type=MEDIA_TYPES[self.fmt], headers=self._headers(coding))
+
+    def respond(self, payload: Any) -> Response:
+        body = encode(payload, self.fmt)
+        if self.key is None:
+            self.etag = _body_etag(body)
+            if self.conditional and _matches(self.request, self.etag):
+                return self._not_modified()
+        body, coding = compress(body, self.coding)
+        if self.key is not None:
+            _bodies.set(self.key + (self.coding,), (body, coding), ttl=BODY_TTL)
+        return Response(body, media_type=MEDIA_TYPES[self.fmt], headers=self._headers(coding))
+
+
+def encode_response(request: Request, build: Callable[[], Any], key: Optional[Hashable] = None,
+                    version: Optional[Hashable] = None) -> Response:
+    """Negotiated, compressed response; ``build()`` only runs when no 304 or stored body will do."""
+    negotiation = _Negotiation(request, key, version)
+    return negotiation.early() or negotiation.respond(build())
+
+
+async def aencode_response(request: Request, build: Callable[[], Awaitable[Any]], key: Optional[Hashable] = None,
+                           version: Optional[Hashable] = None) -> Response:
+    """``encode_response`` for a coroutine ``build``."""
+    negotiation = _Negotiation(request, key, version)
+    return negotiation.early() or negotiation.respond(await build())
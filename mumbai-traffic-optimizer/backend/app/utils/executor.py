@@ -0,0 +1,69 @@
+"""Process pool for CPU-bound request work."""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, TypeVar
+
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", "0"))
+
+T = TypeVar("T")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _context():
+    return multiprocessing.get_context("spawn")
+
+
+def get_cpu_pool() -> Optional[ProcessPoolExecutor]:
+    """The shared pool, created on first use; None when ``CPU_WORKERS`` is 0."""
+    global _pool
+    if _pool is None and CPU_WORKERS > 0:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=CPU_WORKERS, mp_context=_context())
+    return _pool
+
+
+def warm_cpu_pool():
+    """Start every pool process now rather than on the first requests."""
+    pool = get_cpu_pool()
+    if pool is not None:
+        for future in [pool.submit(os.getpid) for _ in range(CPU_WORKERS)]:
+            future.result()
+
+
+def shutdown_cpu_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+async def run_cpu(func: Callable[..., T], *args) -> T:
+    """Run ``func(*args)`` off the event loop: in the process pool if configured, else in a thread."""
+    pool = get_cpu_pool()
+    if pool is None:
+        return await asyncio.to_thread(func, *args)
+    return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+
+
+@contextmanager
+def process_pool(workers: int) -> Iterator[ProcessPoolExecutor]:
+    """The shared pool when configured, else a pool of ``workers`` for the duration of the block."""
+    pool = get_cpu_pool()
+    if pool is not None:
+        yield pool
+        return
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_context()) as pool:
+        yield pool
+
+
+def pool_size(workers: int) -> int:
+    """How many processes ``process_pool(workers)`` actually runs on."""
+    return CPU_WORKERS if CPU_WORKERS > 0 else workers
@@ -0,0 +1,65 @@
+"""Leader election between web worker processes on one host."""
+import os
+import tempfile
+import zlib
+from pathlib import Path
+from typing import IO, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+
+def _default_lock_path() -> Path:
+    # one lock per database, so separate deployments on a host elect separately
+    database = os.getenv("DATABASE_URL", "sqlite:///./traffic.db")
+    return Path(tempfile.gettempdir()) / f"trafficiq-scheduler-{zlib.crc32(database.encode()):08x}.lock"
+
+
+class FileLock:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file: Optional[IO] = None
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def acquire(self) -> bool:
+        """Take the lock without waiting; True if this process holds it (now or already)."""
+        if self._file is not None:
+            return True
+        f = open(self.path, "a+")
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:  # pragma: no cover - Windows
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            return False
+        f.seek(0)
+        f.truncate()
+        f.write(f"{os.getpid()}\n")
+        f.flush()
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:  # pragma: no cover - Windows
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+scheduler_lock = FileLock(Path(os.getenv("SCHEDULER_LOCK_FILE") or _default_lock_path()))
@@ -0,0 +1,349 @@
+"""In-process metrics in Prometheus text format, plus an on-demand sampling profiler."""
+from __future__ import annotations
+import abc
+import functools
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as _StackCounter
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Sample = Tuple[str, Dict[str, str], float]  # (name suffix, labels, value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(abc.ABC):
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], object] = {}
+
+    @abc.abstractmethod
+    def samples(self) -> Iterable[Sample]:
+        """Every (name suffix, labels, value) of this metric, for the text exposition."""
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        with self._lock:
+            self._series[label_values] = self._series.get(label_values, 0.0) + amount
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = list(self._series.items())
+        for values, total in items:
+            yield "", dict(zip(self.labels, values)), total
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value: float, *label_values: str):
+        with self._lock:
+            self._series[label_values] = value
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        with self._lock:
+            self._series[label_values] = self._series.get(label_values, 0.0) + amount
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = list(self._series.items())
+        for values, value in items:
+            yield "", dict(zip(self.labels, values)), value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *label_values: str):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = [(values, (list(counts), total)) for values, (counts, total) in self._series.items()]
+        for values, (counts, total) in items:
+            labels = dict(zip(self.labels, values))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield "_bucket", dict(labels, le=_format_value(bound)), cumulative
+            yield "_sum", labels, total
+            yield "_count", labels, cumulative
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def add_collector(self, collect: Callable):
+        """``collect()`` is called per scrape and yields (name, type, help, [(labels, value), ...])."""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        for collect in self._collectors:
+            for name, kind, help, samples in collect():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.histogram("http_request_duration_seconds", "HTTP request latency by route template",
+                                     ("method", "route", "status"))
+REQUESTS_IN_FLIGHT = registry.gauge("http_requests_in_flight", "HTTP requests currently being served")
+SPAN_LATENCY = registry.histogram("span_duration_seconds", "Time spent in instrumented code paths", ("span",))
+SPAN_ERRORS = registry.counter("span_errors_total", "Instrumented code paths that raised", ("span",))
+JOB_DURATION = registry.histogram("scheduler_job_duration_seconds", "Scheduler job run time", ("job",))
+JOB_LAG = registry.gauge("scheduler_job_lag_seconds", "Delay between a job's scheduled and actual start", ("job",))
+JOB_FAILURES = registry.counter("scheduler_job_failures_total", "Scheduler job runs that raised", ("job",))
+JOB_MISSED = registry.counter("scheduler_job_missed_total", "Scheduler job runs skipped past their grace time",
+                              ("job",))
+
+
+class span:
+    """Time a block or, used as a decorator, every call of a function."""
+
+    __slots__ = ("name", "_start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        SPAN_LATENCY.observe(time.perf_counter() - self._start, self.name)
+        if exc_type is not None:
+            SPAN_ERRORS.inc(self.name)
+        return False
+
+    def __call__(self, func: Callable) -> Callable:
+        name = self.name
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except BaseException:
+                SPAN_ERRORS.inc(name)
+                raise
+            finally:
+                SPAN_LATENCY.observe(time.perf_counter() - start, name)
+        return wrapper
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency per (method, route template, status)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.inc(amount=-1)
+            route = scope.get("route")
+            template = scope.get("root_path", "") + route.path if route is not None else "unmatched"
+            REQUEST_LATENCY.observe(time.perf_counter() - start, scope["method"], template, str(status))
+
+
+def instrument_scheduler(scheduler):
+    """Record duration, start lag, failures and misses of every job run by ``scheduler``."""
+    from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED, EVENT_JOB_MISSED, EVENT_JOB_SUBMITTED
+    started: Dict[Tuple[str, datetime], float] = {}
+    lock = threading.Lock()
+
+    def listener(event):
+        if event.code == EVENT_JOB_SUBMITTED:
+            now = time.perf_counter()
+            with lock:
+                for run_time in event.scheduled_run_times:
+                    started[(event.job_id, run_time)] = now
+            latest = max(event.scheduled_run_times)
+            JOB_LAG.set(max(0.0, (datetime.now(timezone.utc) - latest).total_seconds()), event.job_id)
+        elif event.code == EVENT_JOB_MISSED:
+            JOB_MISSED.inc(event.job_id)
+        else:
+            with lock:
+                start = started.pop((event.job_id, event.scheduled_run_time), None)
+            if start is not None:
+                JOB_DURATION.observe(time.perf_counter() - start, event.job_id)
+            if event.code == EVENT_JOB_ERROR:
+                JOB_FAILURES.inc(event.job_id)
+
+    scheduler.add_listener(listener, EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED)
+
+
+def _cache_metrics():
+    from .cache import cache
+    stats = cache.stats()
+    tiers = [("l1", stats["l1"])] + ([("l2", stats["l2"])] if "l2" in stats else [])
+    yield "cache_hits_total", "counter", "Cache lookups served from the tier", \
+        [({"tier": t}, s["hits"]) for t, s in tiers]
+    yield "cache_misses_total", "counter", "Cache lookups the tier could not serve", \
+        [({"tier": t}, s["misses"]) for t, s in tiers]
+    yield "cache_hit_ratio", "gauge", "Hits over lookups since start", \
+        [({"tier": t}, s["hits"] / max(s["hits"] + s["misses"], 1)) for t, s in tiers]
+    l1 = stats["l1"]
+    yield "cache_entries", "gauge", "Entries held in the in-process cache", [({}, l1["entries"])]
+    yield "cache_bytes", "gauge", "Approximate bytes held in the in-process cache", [({}, l1["bytes"])]
+    yield "cache_evictions_total", "counter", "Entries evicted for size", [({}, l1["evictions"])]
+
+
+registry.add_collector(_cache_metrics)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)})"
+
+
+class SamplingProfiler:
+    """Wall-clock stack sampler for every thread in the process."""
+
+    MAX_SECONDS = 300.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stacks: _StackCounter = _StackCounter()
+        self.interval = 0.01
+        self.samples = 0
+        self.started_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float = 0.01, max_seconds: float = MAX_SECONDS, reset: bool = True):
+        """Start sampling every ``interval`` seconds; stops by itself after ``max_seconds``."""
+        with self._lock:
+            if self.running:
+                return
+            if reset:
+                self._stacks = _StackCounter()
+                self.samples = 0
+            self.interval = interval
+            self.started_at = time.time()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(interval, min(max_seconds, self.MAX_SECONDS)),
+                                            name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def _run(self, interval: float, max_seconds: float):
+        own = threading.get_ident()
+        deadline = time.monotonic() + max_seconds
+        while not self._stop.wait(interval) and time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Stacks in collapsed format, root first, most frequent first."""
+        stacks = self._stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def status(self) -> Dict:
+        return {
+            "running": self.running,
+            "interval_s": self.interval,
+            "samples": self.samples,
+            "distinct_stacks": len(self._stacks),
+            "started_at": (datetime.fromtimestamp(self.started_at, timezone.utc).isoformat()
+                           if self.started_at else None),
+        }
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,109 @@
+"""Shared L2 cache tier speaking the Redis protocol."""
+import hashlib
+import json
+import math
+import time
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - json fallback keeps the tier usable
+    msgpack = None
+
+MISSING = object()
+
+
+def dumps(value: Any) -> bytes:
+    if msgpack is not None:
+        return b"m" + msgpack.packb(value, use_bin_type=True)
+    return b"j" + json.dumps(value, separators=(",", ":")).encode()
+
+
+def loads(raw: bytes) -> Any:
+    tag, body = raw[:1], raw[1:]
+    if tag == b"m" and msgpack is not None:
+        return msgpack.unpackb(body, raw=False)
+    if tag == b"j":
+        return json.loads(body)
+    raise ValueError(f"Unknown cache payload tag {tag!r}")
+
+
+class RedisBackend:
+    def __init__(self, client, prefix: str = "trafficiq:", retry_after: float = 30.0):
+        self.client = client
+        self.prefix = prefix
+        self.retry_after = retry_after
+        self._down_until = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> Optional["RedisBackend"]:
+        try:
+            import redis
+        except ImportError:
+            return None
+        client = redis.Redis.from_url(url, socket_timeout=0.25, socket_connect_timeout=0.25)
+        return cls(client, **kwargs)
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def _key(self, key: Hashable) -> str:
+        return self.prefix + hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+
+    def _failed(self):
+        self.errors += 1
+        self._down_until = time.monotonic() + self.retry_after
+
+    def get_many(self, keys: Sequence[Hashable]) -> List[Any]:
+        """Fetch keys in one pipelined round trip; absent or undecodable keys come back as MISSING."""
+        if not keys or not self.available:
+            return [MISSING] * len(keys)
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key in keys:
+                pipe.get(self._key(key))
+            raw = pipe.execute()
+        except Exception:
+            self._failed()
+            return [MISSING] * len(keys)
+        out = []
+        for item in raw:
+            if item is None:
+                self.misses += 1
+                out.append(MISSING)
+                continue
+            try:
+                out.append(loads(item))
+                self.hits += 1
+            except Exception:
+                self.misses += 1
+                out.append(MISSING)
+        return out
+
+    def set_many(self, items: Dict[Hashable, Any], ttl: Optional[float] = None):
+        if not items or not self.available:
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.set(self._key(key), dumps(value), ex=max(1, math.ceil(ttl)) if ttl else None)
+            pipe.execute()
+        except (TypeError, ValueError):
+            pass  # value not serializable; it stays L1-only
+        except Exception:
+            self._failed()
+
+    def delete(self, key: Hashable):
+        if not self.available:
+            return
+        try:
+            self.client.delete(self._key(key))
+        except Exception:
+            self._failed()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"available": self.available, "hits": self.hits, "misses": self.misses, "errors": self.errors}
@@ -1,5 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, root_validator
 from datetime import datetime
+from typing import List, Optional, Union
+
+MAX_SCENARIOS = 2_000_000  # Monte-Carlo samples plus sweep grid points over all projects of a request
 
 class TrafficPrediction(BaseModel):
     route_id: str
@@ -11,3 +14,63 @@ class SignalOptimizationResult(BaseModel):
     intersection_id: str
     recommended_cycle_time: float
     expected_flow_improvement_pct: float
+
+class BatchPredictionRequest(BaseModel):
+    route_ids: Optional[List[str]] = None
+    hours_ahead: int = Field(4, ge=1, le=6)
+
+class BatchSignalRequest(BaseModel):
+    # flows[intersection][timestep][approach] in veh/h
+    flows: List[List[List[float]]]
+    intersection_ids: Optional[List[str]] = None
+    approaches: List[str] = ["north", "south", "east", "west"]
+    start: Optional[datetime] = None
+    interval_minutes: int = Field(15, ge=1, le=1440)
+    simulate: bool = False  # also simulate the delay reduction of every plan
+
+class ScenarioParameter(BaseModel):
+    # a fixed value, a min/max range swept in `steps`, or a distribution
+    value: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    steps: int = Field(5, ge=1, le=50)
+    dist: Optional[str] = None
+    mode: Optional[float] = None
+    mean: Optional[float] = None
+    sd: Optional[float] = None
+
+    @property
+    def grid_size(self) -> int:
+        swept = self.dist is not None or (self.min is not None and self.max is not None)
+        return self.steps if swept else 1
+
+class ScenarioProject(BaseModel):
+    name: Optional[str] = None
+    project_type: str = "unknown"
+    location: str = "unspecified"
+    project_cost: Union[float, ScenarioParameter]
+    delay_hours: Optional[Union[float, ScenarioParameter]] = None
+    productivity_cost_per_hour: Optional[Union[float, ScenarioParameter]] = None
+    expected_improvement: Optional[Union[float, ScenarioParameter]] = None
+    location_factor: Optional[Union[float, ScenarioParameter]] = None
+
+    @property
+    def sweep_size(self) -> int:
+        size = 1
+        for value in (self.project_cost, self.delay_hours, self.productivity_cost_per_hour,
+                      self.expected_improvement, self.location_factor):
+            if isinstance(value, ScenarioParameter):
+                size *= value.grid_size
+        return size
+
+class ScenarioAnalysisRequest(BaseModel):
+    projects: List[ScenarioProject] = Field(..., min_items=1, max_items=100)
+    samples: int = Field(10000, ge=100, le=100000)
+    seed: Optional[int] = None
+
+    @root_validator(skip_on_failure=True)
+    def within_budget(cls, values):
+        scenarios = sum(values["samples"] + p.sweep_size for p in values["projects"])
+        if scenarios > MAX_SCENARIOS:
+            raise ValueError(f"request would evaluate {scenarios} scenarios, the limit is {MAX_SCENARIOS}")
+        return values
@@ -0,0 +1,63 @@
+"""Standalone collector process."""
+import argparse
+import asyncio
+import logging
+import signal
+import time
+
+import httpx
+
+from .services.data_collector import ROUTES, store_tick
+from .services.snapshot_store import maintain_rollups
+from .services.sources import AsyncCollector, build_sources
+from .utils.db import init_db
+
+logger = logging.getLogger("app.worker")
+
+
+async def run(collector: AsyncCollector, interval: float, once: bool = False):
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # pragma: no cover - Windows
+            pass
+    while not stop.is_set():
+        started = time.monotonic()
+        rows = await collector.collect()
+        await asyncio.to_thread(store_tick, rows)
+        await asyncio.to_thread(maintain_rollups)
+        logger.info("Collected %d routes in %.3fs", len(rows), time.monotonic() - started)
+        if once:
+            break
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=max(0.0, interval - (time.monotonic() - started)))
+        except asyncio.TimeoutError:
+            pass
+
+
+async def main_async(args):
+    sources = build_sources(args.sources, http_url=args.http_url, replay_file=args.replay_file, timeout=args.timeout)
+    async with httpx.AsyncClient(limits=httpx.Limits(max_connections=args.concurrency)) as client:
+        collector = AsyncCollector(sources, ROUTES, concurrency=args.concurrency, client=client)
+        await run(collector, args.interval, once=args.once)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TrafficIQ collector worker")
+    parser.add_argument("--interval", type=float, default=900, help="seconds between ticks")
+    parser.add_argument("--sources", default="simulated", help="comma-separated priority list: http,csv,simulated")
+    parser.add_argument("--http-url", default=None)
+    parser.add_argument("--replay-file", default=None)
+    parser.add_argument("--timeout", type=float, default=2.0, help="per-source timeout in seconds")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--once", action="store_true", help="collect a single tick and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    init_db()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
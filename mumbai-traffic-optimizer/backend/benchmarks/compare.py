@@ -0,0 +1,59 @@
+"""Compare two ``benchmarks.suite`` result files."""
+import argparse
+import json
+import sys
+from typing import Dict, List, Tuple
+
+# metric -> True when higher is better
+MICRO_METRICS = {"median_us": False}
+MACRO_METRICS = {"throughput_rps": True, "p50_ms": False, "p99_ms": False}
+
+
+def compare(base: Dict, head: Dict, threshold: float) -> Tuple[List[Dict], List[Dict]]:
+    """Return (rows, regressions); ``change`` is positive when ``head`` is worse."""
+    rows = []
+    for section, metrics in (("micro", MICRO_METRICS), ("macro", MACRO_METRICS)):
+        for name in sorted(set(base.get(section, {})) & set(head.get(section, {}))):
+            b, h = base[section][name], head[section][name]
+            if "skipped" in b or "skipped" in h:
+                continue
+            for metric, higher_is_better in metrics.items():
+                if not b.get(metric):
+                    continue
+                ratio = h[metric] / b[metric]
+                change = (1 / ratio - 1) if higher_is_better else (ratio - 1)
+                rows.append({"benchmark": name, "metric": metric, "base": b[metric], "head": h[metric],
+                             "change": round(change, 4), "regressed": change > threshold})
+    return rows, [r for r in rows if r["regressed"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown, e.g. 0.10 = 10%%")
+    parser.add_argument("--json", help="write the comparison to this file")
+    args = parser.parse_args()
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.head, encoding="utf-8") as f:
+        head = json.load(f)
+
+    rows, regressions = compare(base, head, args.threshold)
+    print(f"base {str(base['meta'].get('commit'))[:10]}  head {str(head['meta'].get('commit'))[:10]}  "
+          f"threshold {args.threshold:.0%}")
+    for r in rows:
+        flag = "  REGRESSED" if r["regressed"] else ""
+        print(f"{r['benchmark']:<40} {r['metric']:<15} {r['base']:>14,.2f} -> {r['head']:>14,.2f}  "
+              f"{r['change']:+8.1%}{flag}")
+    if base["meta"].get("machine") != head["meta"].get("machine") or \
+            base["meta"].get("cpu_count") != head["meta"].get("cpu_count"):
+        print("warning: runs come from different machines; differences may not be meaningful")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"threshold": args.threshold, "rows": rows}, f, indent=2)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
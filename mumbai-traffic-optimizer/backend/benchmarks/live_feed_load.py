@@ -0,0 +1,144 @@
+"""Load test for the live status feed: real SSE clients on /api/traffic/live of a uvicorn server."""
+import argparse
+import asyncio
+import random
+import re
+import socket
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List
+
+import httpx
+import uvicorn
+
+from app.main import create_app
+from app.services.live_feed import live_feed
+
+# the timestamp leads every event's data, so clients need not decode the whole payload
+_TIMESTAMP = re.compile(rb'"timestamp":"([^"]+)"')
+
+
+def _status(n_routes: int):
+    return [{
+        "route_id": f"route-{i}",
+        "congestion_level": round(random.uniform(1, 10), 2),
+        "average_speed": round(random.uniform(20, 50), 1),
+        "delay_minutes": round(random.uniform(2, 25), 1),
+        "weather": random.choice(["Clear", "Rain", "Clouds"]),
+    } for i in range(n_routes)]
+
+
+def _health(status):
+    avg = sum(s["congestion_level"] for s in status) / len(status)
+    return max(0, min(100, int(100 - (avg - 1) * (100 / 9))))
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _serve() -> uvicorn.Server:
+    # the server runs in this process, so ticks are published straight into its feed
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    config = uvicorn.Config(create_app(mount_mvp=False), port=port, log_level="warning", lifespan="off",
+                            timeout_graceful_shutdown=1)
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def _listen(http: httpx.AsyncClient, stall: float, sent: Dict[str, float], stats: Dict):
+    """Read the stream until the final tick; a slow client stops reading for ``stall`` seconds first."""
+    buffer = b""
+    async with http.stream("GET", "/api/traffic/live") as resp:
+        async for chunk in resp.aiter_raw():
+            buffer += chunk
+            *events, buffer = buffer.split(b"\n\n")
+            for event in events:
+                match = _TIMESTAMP.search(event)
+                if match is None:
+                    continue  # keep-alive
+                timestamp = match.group(1).decode()
+                if b"\nevent: snapshot\n" in event:
+                    stats["snapshots"] += 1
+                else:
+                    stats["diffs"] += 1
+                    stats["latencies"].append(time.perf_counter() - sent[timestamp])
+                if timestamp == stats["final"]:
+                    return
+            if stall:
+                await asyncio.sleep(stall)
+                stall = 0
+
+
+async def _run(base_url: str, n_clients: int, n_slow: int, n_routes: int, ticks: int, interval: float,
+               stall: float) -> Dict:
+    sent: Dict[str, float] = {}
+    clients = [{"slow": i < n_slow, "snapshots": 0, "diffs": 0, "latencies": [], "final": None}
+               for i in range(n_clients)]
+    status = _status(n_routes)
+    live_feed.publish(status, _health(status))  # so every client starts with a snapshot
+    resyncs = live_feed.resyncs
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base_url, timeout=None, limits=limits) as http:
+        tasks = [asyncio.create_task(_listen(http, stall if c["slow"] else 0, sent, c)) for c in clients]
+        while live_feed.subscriber_count < n_clients:
+            await asyncio.sleep(0.01)
+        for i in range(ticks):
+            status = _status(n_routes)
+            timestamp = datetime.utcnow().isoformat()
+            if i == ticks - 1:
+                for c in clients:
+                    c["final"] = timestamp
+            sent[timestamp] = time.perf_counter()
+            live_feed.publish(status, _health(status), timestamp)
+            await asyncio.sleep(interval)
+        await asyncio.wait_for(asyncio.gather(*tasks), timeout=60)
+    fast = [c for c in clients if not c["slow"]]
+    slow = [c for c in clients if c["slow"]]
+    latencies = sorted(x for c in fast for x in c["latencies"])
+    return {
+        "delivered": sum(c["diffs"] for c in fast) / (ticks * len(fast)) if fast else 0.0,
+        "p50": _percentile(latencies, 0.5),
+        "p99": _percentile(latencies, 0.99),
+        "max": latencies[-1] if latencies else 0.0,
+        "slow_missed": sum(ticks - c["diffs"] for c in slow),
+        "slow_resyncs": sum(c["snapshots"] - 1 for c in slow),
+        "server_resyncs": live_feed.resyncs - resyncs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[10, 100, 250])
+    parser.add_argument("--slow", type=float, default=0.1, help="fraction of clients that stall")
+    parser.add_argument("--stall", type=float, default=4.0, help="seconds a slow client stops reading")
+    parser.add_argument("--routes", type=int, default=1000, help="rows per tick; sets the diff size")
+    parser.add_argument("--ticks", type=int, default=100)
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between ticks")
+    args = parser.parse_args()
+
+    server = _serve()
+    base_url = f"http://127.0.0.1:{server.config.port}"
+    print(f"{'clients':>8} {'slow':>5} {'delivered':>10} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'slow missed':>12} {'slow resyncs':>13} {'server resyncs':>15}")
+    try:
+        for n in args.clients:
+            n_slow = round(n * args.slow)
+            r = asyncio.run(_run(base_url, n, n_slow, args.routes, args.ticks, args.interval, args.stall))
+            print(f"{n:>8} {n_slow:>5} {r['delivered']:>10.1%} {r['p50'] * 1000:>8.2f} {r['p99'] * 1000:>8.2f} "
+                  f"{r['max'] * 1000:>8.2f} {r['slow_missed']:>12} {r['slow_resyncs']:>13} "
+                  f"{r['server_resyncs']:>15}")
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
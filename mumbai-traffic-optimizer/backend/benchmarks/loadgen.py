@@ -0,0 +1,137 @@
+"""Reproducible load generator for the TrafficIQ API."""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Callable, Dict, List, Tuple
+
+import httpx
+
+ROUTES = [
+    "Western Express Highway", "Eastern Express Highway", "Sion-Panvel Highway",
+    "LBS Marg", "SV Road", "Jogeshwari-Vikhroli Link Road",
+]
+INTERSECTIONS = ["bandra_linking_road", "andheri_west_main", "worli_sea_link", "powai_hiranandani"]
+
+# name -> (weight, request factory)
+Request = Tuple[str, str, Dict]
+REQUESTS: Dict[str, Tuple[float, Callable[[random.Random], Request]]] = {
+    "status": (35, lambda r: ("GET", "/api/traffic/current-status", {})),
+    "health": (20, lambda r: ("GET", "/api/analytics/traffic-health-score", {})),
+    "predict": (25, lambda r: ("GET", f"/api/traffic/predict/{r.choice(ROUTES)}",
+                               {"params": {"hours_ahead": r.randint(1, 6)}})),
+    "batch": (5, lambda r: ("POST", "/api/traffic/predict/batch", {"json": {"hours_ahead": 6}})),
+    "signal": (10, lambda r: ("GET", f"/api/signals/optimization/{r.choice(INTERSECTIONS)}", {})),
+    "roi": (5, lambda r: ("GET", "/api/infrastructure/roi-calculator",
+                         {"params": {"project_cost": r.choice([1e7, 5e7, 1e8, 5e8])}})),
+}
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+async def run_load(client: httpx.AsyncClient, mix: Dict[str, float], concurrency: int, duration: float,
+                   total: int, seed: int, requests=REQUESTS) -> Dict:
+    """Issue requests drawn from ``mix`` (weights over ``requests``) until ``duration`` or ``total``."""
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    latencies: Dict[str, List[float]] = {n: [] for n in names}
+    errors: Dict[str, int] = {n: 0 for n in names}
+    issued = 0
+    deadline = time.monotonic() + duration if duration else None
+
+    async def worker(wid: int):
+        nonlocal issued
+        rng = random.Random(seed * 1000 + wid)
+        while (deadline is None or time.monotonic() < deadline) and (not total or issued < total):
+            issued += 1
+            name = rng.choices(names, weights)[0]
+            method, path, kwargs = requests[name][1](rng)
+            t0 = time.perf_counter()
+            try:
+                resp = await client.request(method, path, **kwargs)
+                ok = resp.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies[name].append(time.perf_counter() - t0)
+            if not ok:
+                errors[name] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    report = {"elapsed_s": round(elapsed, 3), "concurrency": concurrency, "endpoints": {}}
+    all_lat = []
+    for name in names:
+        lat = sorted(latencies[name])
+        all_lat.extend(lat)
+        report["endpoints"][name] = {
+            "requests": len(lat),
+            "errors": errors[name],
+            "p50_ms": round(_percentile(lat, 0.50) * 1000, 2),
+            "p95_ms": round(_percentile(lat, 0.95) * 1000, 2),
+            "p99_ms": round(_percentile(lat, 0.99) * 1000, 2),
+        }
+    all_lat.sort()
+    report["requests"] = len(all_lat)
+    report["throughput_rps"] = round(len(all_lat) / elapsed, 1) if elapsed else 0.0
+    report["p50_ms"] = round(_percentile(all_lat, 0.50) * 1000, 2)
+    report["p99_ms"] = round(_percentile(all_lat, 0.99) * 1000, 2)
+    return report
+
+
+def _parse_mix(items: List[str]) -> Dict[str, float]:
+    if not items:
+        return {name: w for name, (w, _) in REQUESTS.items()}
+    mix = {}
+    for item in items:
+        name, _, weight = item.partition("=")
+        if name not in REQUESTS:
+            raise SystemExit(f"unknown request type '{name}', choose from {sorted(REQUESTS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+async def main_async(args) -> Dict:
+    mix = _parse_mix(args.mix)
+    if args.in_process:
+        from app.main import app
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://loadgen"
+    else:
+        transport = None
+        base_url = args.url
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits, timeout=30) as client:
+        return await run_load(client, mix, args.concurrency, args.duration, args.requests, args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TrafficIQ API load generator")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default="http://localhost:8000")
+    target.add_argument("--in-process", action="store_true", help="drive app.main:app over ASGI")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=0, help="seconds to run (0 = until --requests)")
+    parser.add_argument("--requests", type=int, default=0, help="total requests (default 1000 when no --duration)")
+    parser.add_argument("--mix", nargs="*", default=[], help="request weights, e.g. status=5 predict=3")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+    if not args.duration and not args.requests:
+        args.requests = 1000
+    report = asyncio.run(main_async(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Query and update latency of the road graph on a synthetic city grid."""
+import argparse
+import json
+import random
+import time
+import numpy as np
+from app.services.route_graph import RoadGraph
+
+
+def grid_graph(side: int, block_km: float = 0.5, routes_every: int = 5) -> RoadGraph:
+    idx = np.arange(side * side).reshape(side, side)
+    pairs, route = [], []
+    for axis in (0, 1):
+        a = idx[:, :-1] if axis == 0 else idx[:-1, :]
+        b = idx[:, 1:] if axis == 0 else idx[1:, :]
+        lines = np.broadcast_to(np.arange(side)[:, None] if axis == 0 else np.arange(side)[None, :], a.shape)
+        pairs.append(np.stack([a.ravel(), b.ravel()], axis=1))
+        # every ``routes_every``-th row/column is a named arterial, the rest are connectors
+        r = np.where(lines % routes_every == 0, lines // routes_every + axis * side, -1).ravel()
+        route.append(r)
+    pairs = np.concatenate(pairs)
+    route = np.concatenate(route)
+    names = sorted(set(route[route >= 0].tolist()))
+    remap = {r: i for i, r in enumerate(names)}
+    route = np.array([remap.get(r, -1) for r in route.tolist()])
+    src = np.concatenate([pairs[:, 0], pairs[:, 1]])
+    dst = np.concatenate([pairs[:, 1], pairs[:, 0]])
+    edge_route = np.concatenate([route, route])
+    speed = np.where(edge_route >= 0, 40.0, 25.0)
+    lat = 19.0 + (np.arange(side * side) // side) * 0.0045
+    lng = 72.8 + (np.arange(side * side) % side) * 0.0045
+    ids = [f"n{i}" for i in range(side * side)]
+    return RoadGraph(ids, ids, lat, lng, src, dst, np.full(len(src), block_km), speed, edge_route,
+                     [f"route_{r}" for r in names])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Road graph query benchmark")
+    parser.add_argument("--side", type=int, default=70)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    t0 = time.perf_counter()
+    graph = grid_graph(args.side)
+    build_s = time.perf_counter() - t0
+
+    levels = {name: rng.uniform(1, 10) for name in graph.route_names}
+    t0 = time.perf_counter()
+    touched = graph.update_congestion(levels)
+    update_ms = (time.perf_counter() - t0) * 1000
+
+    latencies = []
+    for _ in range(args.queries):
+        a, b = rng.randrange(len(graph)), rng.randrange(len(graph))
+        t0 = time.perf_counter()
+        graph.k_shortest(a, b, args.k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    latencies.sort()
+    report = {
+        "nodes": len(graph),
+        "edges": len(graph.src),
+        "landmarks": len(graph.landmarks),
+        "build_s": round(build_s, 3),
+        "update_ms": round(update_ms, 3),
+        "edges_reweighted": touched,
+        "k": args.k,
+        "query_p50_ms": round(latencies[len(latencies) // 2], 2),
+        "query_p95_ms": round(latencies[int(len(latencies) * 0.95)], 2),
+        "query_max_ms": round(latencies[-1], 2),
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
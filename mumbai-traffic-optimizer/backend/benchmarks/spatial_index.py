@@ -0,0 +1,63 @@
+"""Throughput of the intersection grid index on a city-scale synthetic dataset."""
+import argparse
+import json
+import time
+import numpy as np
+from app.services.spatial_index import GridIndex, _haversine_km
+
+LAT_RANGE = (18.90, 19.30)
+LNG_RANGE = (72.80, 73.00)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spatial index query benchmark")
+    parser.add_argument("--points", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--viewport-deg", type=float, default=0.03, help="viewport height/width in degrees")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+    lat = rng.uniform(*LAT_RANGE, args.points)
+    lng = rng.uniform(*LNG_RANGE, args.points)
+
+    t0 = time.perf_counter()
+    index = GridIndex(lat, lng)
+    build_s = time.perf_counter() - t0
+
+    q_lat = rng.uniform(*LAT_RANGE, args.queries)
+    q_lng = rng.uniform(*LNG_RANGE, args.queries)
+    for i in range(min(20, args.queries)):
+        _, dist = index.nearest(q_lat[i], q_lng[i], args.k)
+        brute = np.sort(_haversine_km(q_lat[i], q_lng[i], lat, lng))[:args.k]
+        assert np.allclose(dist, brute), "nearest-k disagrees with brute force"
+
+    t0 = time.perf_counter()
+    for a, b in zip(q_lat.tolist(), q_lng.tolist()):
+        index.nearest(a, b, args.k)
+    nearest_s = time.perf_counter() - t0
+
+    d = args.viewport_deg
+    t0 = time.perf_counter()
+    hits = 0
+    for a, b in zip(q_lat.tolist(), q_lng.tolist()):
+        hits += len(index.within(a, b, a + d, b + d))
+    bbox_s = time.perf_counter() - t0
+
+    report = {
+        "points": args.points,
+        "build_s": round(build_s, 3),
+        "nearest_qps": round(args.queries / nearest_s),
+        "bbox_qps": round(args.queries / bbox_s),
+        "bbox_mean_hits": round(hits / args.queries, 1),
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
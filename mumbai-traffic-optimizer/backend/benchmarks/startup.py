@@ -0,0 +1,104 @@
+"""Cold-start cost of the API process."""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| *(\S+)")
+
+
+def import_profile(module: str = "app.main", top: int = 15):
+    """Total import time of ``module`` and its slowest top-level dependencies (cumulative ms)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, check=True)
+    packages = {}
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        m = IMPORTTIME_LINE.match(line)
+        if not m:
+            continue
+        cumulative, name = int(m.group(2)), m.group(3)
+        if name == module:
+            total_us = cumulative
+        root = name.split(".")[0]
+        packages[root] = max(packages.get(root, 0), cumulative)
+    slowest = sorted(packages.items(), key=lambda kv: -kv[1])[:top]
+    return {
+        "total_ms": round(total_us / 1000, 1),
+        "slowest": [{"module": name, "cumulative_ms": round(us / 1000, 1)} for name, us in slowest],
+    }
+
+
+def _get_json(url: str, timeout: float = 0.5):
+    with urllib.request.urlopen(url, timeout=timeout) as resp:
+        return json.loads(resp.read())
+
+
+def time_to_healthy(port: int, timeout: float = 30.0):
+    """Seconds from spawning uvicorn to the first 200 from /api/health, and to ``ready``."""
+    url = f"http://127.0.0.1:{port}/api/health"
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+                             "--log-level", "warning"], env=dict(os.environ))
+    healthy = ready = None
+    try:
+        while time.perf_counter() - started < timeout and ready is None:
+            try:
+                body = _get_json(url)
+            except (urllib.error.URLError, ConnectionError, OSError):
+                time.sleep(0.01)
+                continue
+            elapsed = time.perf_counter() - started
+            healthy = healthy or elapsed
+            if body.get("ready"):
+                ready = elapsed
+            else:
+                time.sleep(0.01)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    return healthy, ready
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    profile = import_profile(top=args.top)
+    print(f"import app.main: {profile['total_ms']} ms")
+    for row in profile["slowest"]:
+        print(f"  {row['cumulative_ms']:>8.1f} ms  {row['module']}")
+
+    healthy, ready = [], []
+    for _ in range(args.runs):
+        h, r = time_to_healthy(args.port)
+        if h is not None:
+            healthy.append(h * 1000)
+        if r is not None:
+            ready.append(r * 1000)
+    report = {
+        "import": profile,
+        "runs": args.runs,
+        "first_healthy_ms": {"median": round(statistics.median(healthy), 1), "max": round(max(healthy), 1)}
+        if healthy else None,
+        "ready_ms": {"median": round(statistics.median(ready), 1), "max": round(max(ready), 1)} if ready else None,
+    }
+    print(f"first healthy response: {report['first_healthy_ms']}")
+    print(f"ready (db + scheduler): {report['ready_ms']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""Benchmark suite for the hot paths of both backends."""
+import argparse
+import asyncio
+import fnmatch
+import importlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+import numpy as np
+
+from . import loadgen
+
+MICRO: Dict[str, Callable[[], Callable[[], Any]]] = {}
+
+
+def micro(name: str):
+    """Register a benchmark: the decorated function does the setup and returns the callable to time."""
+    def deco(setup):
+        MICRO[name] = setup
+        return setup
+    return deco
+
+
+def _mvp(module: str):
+    """Import a module of the trafficiq-mumbai MVP backend (raises ImportError when it is not on disk)."""
+    from app.main import MVP_DIR
+    if not (MVP_DIR / f"{module}.py").exists():
+        raise ImportError(f"MVP backend not found at {MVP_DIR}")
+    if str(MVP_DIR) not in sys.path:
+        sys.path.append(str(MVP_DIR))
+    return importlib.import_module(module)
+
+
+def _predictor(with_model: bool):
+    """A predictor with a freshly fitted default-size forest, or one forced onto the stub."""
+    from app.services.traffic_predictor import TrafficPredictorService
+    service = TrafficPredictorService(watch_interval=0, online_state_file=None)
+    model = None
+    if with_model:
+        from sklearn.ensemble import RandomForestRegressor
+        from app.ml_models.compiled_forest import compile_forest
+        from app.ml_models.train_model import synthesize
+        df = synthesize(14, seed=0)
+        X, y = df.drop(columns=["congestion"]), df["congestion"]
+        model = compile_forest(RandomForestRegressor(n_estimators=60, random_state=0).fit(X, y))
+    service._swap(model, "benchmark" if with_model else None)
+    return service
+
+
+_TARGET = datetime(2024, 1, 15, 9)
+
+
+@micro("predictor.feature_matrix.1x1")
+def _():
+    from app.services.traffic_predictor import N_DRAWS, _row_uniforms
+    service = _predictor(False)
+    u = _row_uniforms(["SV Road"], [_TARGET], N_DRAWS)
+    return lambda: service._feature_matrix(1, [_TARGET], u)
+
+
+@micro("predictor.feature_matrix.6x6")
+def _():
+    from app.services.traffic_predictor import N_DRAWS, _row_uniforms
+    service = _predictor(False)
+    times = [_TARGET + timedelta(hours=h) for h in range(6)]
+    u = _row_uniforms(service.routes, times, N_DRAWS)
+    return lambda: service._feature_matrix(len(service.routes), times, u)
+
+
+@micro("predictor.predict_congestion.model")
+def _():
+    service = _predictor(True)
+    return lambda: service.predict_congestion("SV Road", _TARGET)
+
+
+@micro("predictor.predict_congestion.stub")
+def _():
+    service = _predictor(False)
+    return lambda: service.predict_congestion("SV Road", _TARGET)
+
+
+@micro("predictor.predict_many.model.6x6")
+def _():
+    service = _predictor(True)
+    times = [_TARGET + timedelta(hours=h) for h in range(6)]
+    return lambda: service.predict_many(service.routes, times)
+
+
+@micro("mvp.predict_congestion")
+def _():
+    models = _mvp("models")
+    return lambda: models.predict_congestion("western_express_highway", 8, "rain", "weekday")
+
+
+@micro("mvp.prediction_grid")
+def _():
+    models = _mvp("models")
+    return lambda: models.prediction_grid(day_type="weekday")
+
+
+@micro("signal.optimize_signal_timing")
+def _():
+    from app.services.signal_optimizer import INTERSECTIONS_BY_ID, optimize_signal_timing
+    intersection = INTERSECTIONS_BY_ID["bandra_linking_road"]
+    return lambda: optimize_signal_timing(intersection)
+
+
+@micro("signal.webster_batch.100x96")
+def _():
+    from app.services.signal_optimizer import webster_batch
+    flows = np.random.default_rng(0).uniform(100, 700, (100, 96, 4))
+    return lambda: webster_batch(flows)
+
+
+@micro("mvp.optimize_signal_timing")
+def _():
+    models = _mvp("models")
+    flows = {"N": 800, "S": 750, "E": 600, "W": 650}
+    return lambda: models.optimize_signal_timing("bandra_linking_road", flows)
+
+
+@micro("roi.calculate_infrastructure_roi")
+def _():
+    from app.services.economic_calculator import calculate_infrastructure_roi
+    return lambda: calculate_infrastructure_roi(5e8, 1000, 1500, 0.15)
+
+
+@micro("roi.analyze_new_project")
+def _():
+    from app.services.economic_calculator import analyze_new_project
+    payload = {"project_cost": 5e8, "project_type": "flyover", "location": "Andheri"}
+    return lambda: analyze_new_project(payload)
+
+
+@micro("roi.analyze_scenarios.10x10000")
+def _():
+    from app.services.economic_calculator import analyze_scenarios
+    projects = [{
+        "name": f"project_{i}",
+        "location": "Andheri",
+        "project_cost": {"dist": "lognormal", "mean": 2e8 * (i + 1), "sd": 5e7},
+        "delay_hours": {"min": 500, "max": 3000, "steps": 6},
+        "expected_improvement": {"dist": "triangular", "min": 0.05, "mode": 0.15, "max": 0.3},
+    } for i in range(10)]
+    return lambda: analyze_scenarios(projects, samples=10000, seed=0)
+
+
+@micro("mvp.calculate_infrastructure_roi")
+def _():
+    models = _mvp("models")
+    return lambda: models.calculate_infrastructure_roi("flyover", "Andheri", 5e8)
+
+
+@micro("collector.collect_once")
+def _():
+    from app.services.data_collector import collect_once
+    return collect_once
+
+
+@micro("cache.cached.hit")
+def _():
+    from app.utils.cache import cached
+
+    @cached(ttl=3600)
+    def square(x):
+        return x * x
+    square(7)
+    return lambda: square(7)
+
+
+@micro("cache.cached.miss")
+def _():
+    from app.utils.cache import cache, cached
+
+    @cached(ttl=3600)
+    def square(x):
+        return x * x
+
+    def call():
+        cache.clear()
+        return square(7)
+    return call
+
+
+def _status_rows(n: int):
+    return [{"route_id": f"route_{i}", "timestamp": "2024-01-15T09:00:00", "congestion_level": 5.5 + i % 4,
+             "average_speed": 31.2, "delay_minutes": 12.4, "weather": "Rain"} for i in range(n)]
+
+
+@micro("encoding.json.1000")
+def _():
+    from app.utils.encoding import encode
+    payload = {"status": _status_rows(1000)}
+    return lambda: encode(payload, "json")
+
+
+@micro("encoding.columnar.1000")
+def _():
+    from app.utils.encoding import encode
+    payload = {"status": _status_rows(1000)}
+    return lambda: encode(payload, "columnar")
+
+
+@micro("encoding.msgpack.1000")
+def _():
+    from app.utils.encoding import encode
+    payload = {"status": _status_rows(1000)}
+    return lambda: encode(payload, "msgpack")
+
+
+@micro("encoding.jsonable_encoder.1000")
+def _():
+    # FastAPI's default path, for comparison
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    payload = {"status": _status_rows(1000)}
+    return lambda: JSONResponse(jsonable_encoder(payload)).body
+
+
+@micro("train.synthesize.14d")
+def _():
+    from app.ml_models.train_model import synthesize
+    return lambda: synthesize(14, seed=0)
+
+
+def run_micro(name: str, repeat: int) -> Dict:
+    try:
+        fn = MICRO[name]()
+    except ImportError as exc:
+        return {"skipped": str(exc)}
+    timer = timeit.Timer(fn)
+    loops, _ = timer.autorange()
+    per_call = [t / loops for t in timer.repeat(repeat, loops)]
+    return {
+        "median_us": round(statistics.median(per_call) * 1e6, 3),
+        "best_us": round(min(per_call) * 1e6, 3),
+        "stdev_us": round(statistics.stdev(per_call) * 1e6, 3) if len(per_call) > 1 else 0.0,
+        "loops": loops,
+        "repeat": repeat,
+    }
+
+
+MVP_REQUESTS = {
+    "predict": (50, lambda r: ("GET", f"/api/predict/{r.choice(['western_express_highway', 'sv_road', 'lbs_marg'])}",
+                               {"params": {"hour": r.randrange(24), "weather": r.choice(["clear", "rain"])}})),
+    "grid": (10, lambda r: ("GET", "/api/predict-grid", {"params": {"day_type": "weekday"}})),
+    "optimize": (25, lambda r: ("GET", "/api/optimize/bandra_linking_road",
+                                {"params": {"north_flow": r.randint(300, 900), "south_flow": 700, "east_flow": 600,
+                                            "west_flow": 650}})),
+    "roi": (15, lambda r: ("POST", "/api/calculate-roi",
+                           {"json": {"project_type": "flyover", "location": "Andheri", "project_cost": 5e8}})),
+}
+
+
+def _api_app():
+    from app.main import create_app
+    return create_app(mount_mvp=False)
+
+
+def _mvp_app():
+    from app.main import _load_mvp
+    return _load_mvp()
+
+
+# name -> (app factory, request table, requests, concurrency)
+MACRO = {
+    "api.mix.c16": (_api_app, loadgen.REQUESTS, 1000, 16),
+    "mvp.mix.c16": (_mvp_app, MVP_REQUESTS, 2000, 16),
+}
+
+
+async def _drive(app, requests, total: int, concurrency: int, seed: int) -> Dict:
+    mix = {name: w for name, (w, _) in requests.items()}
+    transport = httpx.ASGITransport(app=app)
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url="http://bench", transport=transport, limits=limits, timeout=30) as client:
+        # one untimed pass warms lazy imports, the model and the caches
+        await loadgen.run_load(client, mix, concurrency, 0, concurrency * 4, seed, requests)
+        return await loadgen.run_load(client, mix, concurrency, 0, total, seed, requests)
+
+
+def run_macro(name: str, seed: int) -> Dict:
+    factory, requests, total, concurrency = MACRO[name]
+    try:
+        app = factory()
+    except (ImportError, FileNotFoundError) as exc:
+        return {"skipped": str(exc)}
+    report = asyncio.run(_drive(app, requests, total, concurrency, seed))
+    return {
+        "requests": report["requests"],
+        "concurrency": concurrency,
+        "errors": sum(e["errors"] for e in report["endpoints"].values()),
+        "throughput_rps": report["throughput_rps"],
+        "p50_ms": report["p50_ms"],
+        "p99_ms": report["p99_ms"],
+        "endpoints": report["endpoints"],
+    }
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> Dict:
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def _selected(names, patterns):
+    if not patterns:
+        return list(names)
+    return [n for n in names if any(fnmatch.fnmatch(n, p if any(c in p for c in "*?[") else f"*{p}*")
+                                    for p in patterns)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TrafficIQ benchmark suite")
+    parser.add_argument("--filter", nargs="*", default=[], help="substrings or globs of benchmark names")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-micro", action="store_true")
+    parser.add_argument("--no-macro", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--list", action="store_true", help="print benchmark names and exit")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+    if args.list:
+        print("\n".join(list(MICRO) + list(MACRO)))
+        return
+
+    results = {"meta": environment(), "micro": {}, "macro": {}}
+    if not args.no_micro:
+        for name in _selected(MICRO, args.filter):
+            row = results["micro"][name] = run_micro(name, args.repeat)
+            if "skipped" in row:
+                print(f"{name:<40} skipped: {row['skipped']}")
+            else:
+                print(f"{name:<40} {row['median_us']:>14,.2f} us  (best {row['best_us']:,.2f}, {row['loops']} loops)")
+    if not args.no_macro:
+        for name in _selected(MACRO, args.filter):
+            row = results["macro"][name] = run_macro(name, args.seed)
+            if "skipped" in row:
+                print(f"{name:<40} skipped: {row['skipped']}")
+            else:
+                print(f"{name:<40} {row['throughput_rps']:>10,.1f} req/s  p50 {row['p50_ms']} ms  "
+                      f"p99 {row['p99_ms']} ms  errors {row['errors']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
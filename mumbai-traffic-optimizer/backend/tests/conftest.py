@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# keep tests off the developer's database and saved online-model state
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{Path(tempfile.mkdtemp()) / 'test.db'}")
+os.environ.setdefault("ONLINE_LEARNING", "0")
+os.environ.setdefault("MODEL_WATCH_INTERVAL", "0")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,117 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.api import routes
+from app.services import data_collector
+from app.services.traffic_predictor import predictor_service
+
+
+@pytest.fixture(scope="module")
+def client():
+    # no context manager: skips start-up, so no database or scheduler
+    return TestClient(create_app(mount_mvp=False))
+
+
+def test_predict_route_known(client):
+    route_id = predictor_service.routes[0]
+    resp = client.get(f"/api/traffic/predict/{route_id}", params={"hours_ahead": 2})
+    assert resp.status_code == 200
+    assert [p["route_id"] for p in resp.json()["predictions"]] == [route_id, route_id]
+
+
+def test_predict_route_unknown_is_404(client):
+    assert client.get("/api/traffic/predict/Nowhere Road").status_code == 404
+
+
+def test_predict_batch_unknown_is_404(client):
+    resp = client.post("/api/traffic/predict/batch", json={"route_ids": [predictor_service.routes[0], "Nowhere Road"]})
+    assert resp.status_code == 404
+    assert "Nowhere Road" in resp.json()["detail"]
+
+
+def test_signal_batch_zero_and_saturated_rows(client):
+    resp = client.post("/api/signals/optimization/batch", json={"flows": [[[0, 0, 0, 0], [1200, 1200, 900, 900]]]})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["saturated"] == [[False, True]]
+    zero_greens = [body["green_splits_seconds"][a][0][0] for a in body["approaches"]]
+    assert len(set(zero_greens)) == 1 and zero_greens[0] > 0
+    assert all(c > 0 for c in body["cycle_time"][0])
+    assert body["expected_flow_improvement_pct"] is None
+
+
+def test_signal_batch_simulates_on_request_within_a_cap(client):
+    resp = client.post("/api/signals/optimization/batch", json={"flows": [[[400, 350, 250, 200]]], "simulate": True})
+    assert resp.status_code == 200
+    assert len(resp.json()["expected_flow_improvement_pct"][0]) == 1
+    flows = [[[0, 0, 0, 0]] * (routes.MAX_SIMULATED_ROWS + 1)]
+    assert client.post("/api/signals/optimization/batch", json={"flows": flows}).status_code == 200
+    assert client.post("/api/signals/optimization/batch", json={"flows": flows, "simulate": True}).status_code == 422
+
+
+def test_health_score_follows_each_tick(client, monkeypatch):
+    status = []
+    monkeypatch.setattr(routes, "get_current_status", lambda: status)
+    monkeypatch.setattr(data_collector, "get_current_status", lambda: status)
+    status[:] = [{"route_id": "SV Road", "timestamp": "2026-10-01T08:00:00", "congestion_level": 1.0}]
+    assert client.get("/api/analytics/traffic-health-score").json() == {"traffic_health_score": 100}
+    status[:] = [{"route_id": "SV Road", "timestamp": "2026-10-01T08:15:00", "congestion_level": 10.0}]
+    assert client.get("/api/analytics/traffic-health-score").json() == {"traffic_health_score": 0}
+
+
+@pytest.fixture
+def history_db():
+    from app.services.snapshot_store import maintain_rollups, write_snapshots
+    from app.utils.db import init_db
+    init_db()
+    write_snapshots([{"route_id": "SV Road", "timestamp": "2026-10-01T08:00:00", "congestion_level": 4.0}])
+    maintain_rollups(now=datetime(2026, 10, 1, 9, 5))
+
+
+def test_history_accepts_timezone_aware_bounds(client, history_db):
+    resp = client.get("/api/traffic/history/SV Road", params={"from": "2026-10-01T00:00:00Z",
+                                                              "to": "2026-10-01T15:30:00+05:30"})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["from"] == "2026-10-01T00:00:00" and body["to"] == "2026-10-01T10:00:00"
+    assert [p["bucket_start"] for p in body["points"]] == ["2026-10-01T08:00:00"]
+    assert client.get("/api/traffic/history/SV Road", params={"from": "2026-10-01T00:00:00Z"}).status_code == 200
+
+
+def test_history_of_unknown_route_is_404(client):
+    assert client.get("/api/traffic/history/Nowhere Road").status_code == 404
+    resp = client.get("/api/traffic/history", params={"route_ids": ["SV Road", "Nowhere Road"]})
+    assert resp.status_code == 404 and "Nowhere Road" in resp.json()["detail"]
+
+
+def test_model_reload_requires_the_admin_token(client, monkeypatch):
+    monkeypatch.setattr(routes.predictor_service, "reload", lambda: {"version": "v2"})
+    monkeypatch.setattr(routes, "refresh_forecasts", lambda: None)
+    assert client.post("/api/admin/model/reload").status_code == 403  # ADMIN_TOKEN unset
+    monkeypatch.setattr(routes, "ADMIN_TOKEN", "s3cret")
+    assert client.post("/api/admin/model/reload").status_code == 401
+    assert client.post("/api/admin/model/reload", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    resp = client.post("/api/admin/model/reload", headers={"Authorization": "Bearer s3cret"})
+    assert resp.status_code == 200
+    assert resp.json() == {"version": "v2"}
+
+
+def test_scenario_analysis_over_budget_is_422(client):
+    swept = {"project_cost": {"min": 1e7, "max": 5e7, "steps": 50}, "expected_improvement": {"min": 0.1, "max": 0.3}}
+    assert client.post("/api/infrastructure/scenario-analysis",
+                       json={"projects": [swept], "samples": 1000, "seed": 1}).status_code == 200
+    # 20 x (100,000 samples + a 50 x 5 sweep) is just over MAX_SCENARIOS
+    resp = client.post("/api/infrastructure/scenario-analysis", json={"projects": [swept] * 20, "samples": 100000})
+    assert resp.status_code == 422
+    assert "limit" in resp.text
+
+
+@pytest.mark.parametrize("method, path", [("get", "/api/admin/profiler"), ("post", "/api/admin/profiler/start"),
+                                          ("post", "/api/admin/profiler/stop"), ("get", "/api/admin/profiler/stacks")])
+def test_profiler_endpoints_require_the_admin_token(client, monkeypatch, method, path):
+    monkeypatch.setattr(routes, "ADMIN_TOKEN", "s3cret")
+    assert getattr(client, method)(path).status_code == 401
+    assert getattr(client, method)(path, headers={"Authorization": "Bearer wrong"}).status_code == 401
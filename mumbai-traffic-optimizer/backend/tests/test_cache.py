@@ -0,0 +1,296 @@
+import asyncio
+import sys
+import threading
+import time
+
+import pytest
+
+from app.utils import cache as cache_module, redis_cache
+from app.utils.cache import LRUCache, TieredCache, cached
+from app.utils.redis_cache import MISSING, RedisBackend, dumps, loads
+
+
+class FakeRedis:
+    """In-memory stand-in for the redis-py calls RedisBackend makes, with a settable clock."""
+
+    def __init__(self):
+        self.data = {}
+        self.now = 0.0
+        self.pipelines = 0
+        self.down = False
+
+    def _check(self):
+        if self.down:
+            raise ConnectionError("redis is down")
+
+    def get(self, key):
+        self._check()
+        value, expires = self.data.get(key, (None, None))
+        if expires is not None and expires <= self.now:
+            del self.data[key]
+            return None
+        return value
+
+    def set(self, key, value, ex=None):
+        self._check()
+        if ex is not None and ex <= 0:
+            raise ValueError("invalid expire time")
+        self.data[key] = (value, self.now + ex if ex else None)
+
+    def delete(self, key):
+        self._check()
+        self.data.pop(key, None)
+
+    def ttl(self, key):
+        return self.data[key][1] - self.now
+
+    def pipeline(self, transaction=True):
+        self.pipelines += 1
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def get(self, key):
+        self.calls.append(("get", (key,), {}))
+
+    def set(self, key, value, ex=None):
+        self.calls.append(("set", (key, value), {"ex": ex}))
+
+    def execute(self):
+        self.client._check()
+        return [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+@pytest.fixture
+def fake():
+    return FakeRedis()
+
+
+@pytest.fixture
+def backend(fake):
+    return RedisBackend(fake, retry_after=30)
+
+
+def test_pipelined_get_and_set_use_one_round_trip_each(backend, fake):
+    backend.set_many({"a": 1, "b": [1, 2], ("c", 3): {"x": 1.5}})
+    assert fake.pipelines == 1
+    assert backend.get_many(["a", "b", ("c", 3), "missing"]) == [1, [1, 2], {"x": 1.5}, MISSING]
+    assert fake.pipelines == 2
+    assert backend.stats()["hits"] == 3 and backend.stats()["misses"] == 1
+
+
+def test_msgpack_round_trip():
+    value = {"route_id": "SV Road", "levels": [1.5, 2.0], "ok": True, "none": None}
+    raw = dumps(value)
+    assert raw[:1] == (b"m" if redis_cache.msgpack is not None else b"j")
+    assert loads(raw) == value
+
+
+def test_json_payloads_still_decode():
+    assert loads(b'j{"a":[1,2]}') == {"a": [1, 2]}
+    with pytest.raises(ValueError):
+        loads(b"?junk")
+
+
+def test_undecodable_value_is_a_miss(backend, fake):
+    fake.data[backend._key("k")] = (b"?junk", None)
+    assert backend.get_many(["k"]) == [MISSING]
+
+
+def test_ttl_is_passed_and_expires(backend, fake):
+    backend.set_many({"k": 1}, ttl=60)
+    assert fake.ttl(backend._key("k")) == 60
+    fake.now += 61
+    assert backend.get_many(["k"]) == [MISSING]
+
+
+def test_fractional_ttl_rounds_up_to_a_valid_expiry(backend, fake):
+    backend.set_many({"k": 1}, ttl=0.5)
+    assert fake.ttl(backend._key("k")) == 1
+    assert backend.get_many(["k"]) == [1]
+
+
+def test_no_ttl_never_expires(backend, fake):
+    backend.set_many({"k": 1})
+    fake.now += 10 ** 9
+    assert backend.get_many(["k"]) == [1]
+
+
+def test_connection_error_marks_tier_down(backend, fake):
+    fake.down = True
+    assert backend.get_many(["k"]) == [MISSING]
+    assert not backend.available
+    assert backend.stats()["errors"] == 1
+    fake.down = False
+    calls = fake.pipelines
+    backend.set_many({"k": 1})  # skipped while down, no round trip
+    assert fake.pipelines == calls
+
+
+def test_tiered_cache_falls_back_to_l1_when_redis_is_down(fake):
+    tiered = TieredCache(LRUCache(), RedisBackend(fake))
+    fake.down = True
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"v": 42}
+    assert tiered.get_or_compute("k", compute, ttl=60) == {"v": 42}
+    assert tiered.get_or_compute("k", compute, ttl=60) == {"v": 42}
+    assert len(calls) == 1
+    assert tiered.stats()["l2"]["available"] is False
+
+
+def test_tiered_cache_reads_other_workers_results_from_l2(fake):
+    writer = TieredCache(LRUCache(), RedisBackend(fake))
+    reader = TieredCache(LRUCache(), RedisBackend(fake))
+    writer.get_or_compute("k", lambda: [1, 2, 3], ttl=60)
+    assert reader.get_or_compute("k", lambda: pytest.fail("should come from L2"), ttl=60) == [1, 2, 3]
+
+
+def test_cached_decorator_memoizes_sync_and_async():
+    import asyncio
+    calls = []
+
+    @cached(ttl=60)
+    def square(x):
+        calls.append(x)
+        return x * x
+
+    @cached(ttl=60)
+    async def cube(x):
+        calls.append(x)
+        return x ** 3
+    assert square(3) == square(3) == 9
+    assert asyncio.run(cube(2)) == asyncio.run(cube(2)) == 8
+    assert calls == [3, 2]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    return clock
+
+
+def test_lru_evicts_least_recently_used_entry():
+    lru = LRUCache(max_entries=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1
+    lru.set("c", 3)
+    assert lru.get("b") is None
+    assert lru.get("a") == 1 and lru.get("c") == 3
+    assert lru.evictions == 1
+
+
+def test_lru_keeps_within_byte_budget():
+    value = b"x" * 400
+    lru = LRUCache(max_entries=100, max_bytes=3 * sys.getsizeof(value))
+    for key in "abcd":
+        lru.set(key, value)
+    assert len(lru) == 3 and lru.get("a") is None
+    assert lru.stats()["bytes"] <= lru.max_bytes
+    lru.set("huge", b"x" * lru.max_bytes)  # larger than the whole budget: not stored
+    assert lru.get("huge") is None and len(lru) == 3
+
+
+def test_lru_entries_expire_after_ttl(clock):
+    lru = LRUCache()
+    lru.set("k", 1, ttl=10)
+    clock.now += 9
+    assert lru.get("k") == 1
+    clock.now += 2
+    assert lru.get("k") is None
+    assert lru.expirations == 1
+
+
+def test_set_sweeps_expired_entries(clock):
+    lru = LRUCache(sweep_interval=30)
+    lru.set("old", 1, ttl=1)
+    lru.set("kept", 2)
+    clock.now += 31
+    lru.set("new", 3)
+    assert len(lru) == 2 and lru.expirations == 1
+
+
+def _race(lru, compute, callers=8):
+    results = []
+
+    def call():
+        try:
+            results.append(lru.get_or_compute("k", compute, ttl=60))
+        except ValueError as exc:
+            results.append(exc)
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for t in threads:
+        t.start()
+    return threads, results
+
+
+def test_get_or_compute_is_single_flight():
+    lru, release, calls = LRUCache(), threading.Event(), []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return "value"
+    threads, results = _race(lru, compute)
+    while lru.misses < 8:  # every caller has missed and is waiting on the one computation
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join()
+    assert calls == [1] and results == ["value"] * 8
+    assert lru.get("k") == "value"
+
+
+def test_get_or_compute_propagates_errors_to_every_waiter():
+    lru, release = LRUCache(), threading.Event()
+
+    def compute():
+        release.wait(5)
+        raise ValueError("boom")
+    threads, results = _race(lru, compute)
+    while lru.misses < 8:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(results) == 8 and all(isinstance(r, ValueError) for r in results)
+    assert lru.get("k") is None  # failures are not cached
+    assert lru.get_or_compute("k", lambda: "retry") == "retry"
+
+
+def test_aget_or_compute_is_single_flight_and_propagates_errors():
+    lru, calls = LRUCache(), []
+
+    async def compute(fail):
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        if fail:
+            raise ValueError("boom")
+        return "value"
+
+    async def main():
+        ok = await asyncio.gather(*[lru.aget_or_compute("ok", lambda: compute(False)) for _ in range(5)])
+        bad = await asyncio.gather(*[lru.aget_or_compute("bad", lambda: compute(True)) for _ in range(5)],
+                                   return_exceptions=True)
+        return ok, bad
+
+    ok, bad = asyncio.run(main())
+    assert ok == ["value"] * 5
+    assert all(isinstance(r, ValueError) for r in bad)
+    assert len(calls) == 2
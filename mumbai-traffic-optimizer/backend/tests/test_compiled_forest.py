@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from app.ml_models.compiled_forest import CURRENT_FILE, CompiledForest, compile_forest, current_version
+
+ATOL = 1e-9
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 10, (400, 6))
+    y = X[:, 0] * 2 + np.sin(X[:, 1]) + rng.normal(0, 0.1, 400)
+    model = RandomForestRegressor(n_estimators=12, max_depth=8, random_state=0).fit(X, y)
+    return model, compile_forest(model), rng.uniform(0, 10, (300, 6))
+
+
+def test_single_row_matches(fitted):
+    model, forest, X = fitted
+    np.testing.assert_allclose(forest.predict(X[:1]), model.predict(X[:1]), atol=ATOL)
+
+
+def test_batch_matches(fitted):
+    model, forest, X = fitted
+    np.testing.assert_allclose(forest.predict(X), model.predict(X), atol=ATOL)
+
+
+def test_thresholds_ties_match(fitted):
+    # rows sitting exactly on split thresholds exercise the <= comparison
+    model, forest, _ = fitted
+    X = np.tile(forest.threshold[forest.left != np.arange(len(forest.left))][:50, None], (1, 6))
+    np.testing.assert_allclose(forest.predict(X), model.predict(X), atol=ATOL)
+
+
+def test_artifact_round_trip_through_current(fitted, tmp_path):
+    model, forest, X = fitted
+    version = forest.save_artifact(tmp_path, {"trained_on": "test"})
+    assert (tmp_path / CURRENT_FILE).read_text(encoding="utf-8") == version
+    assert current_version(tmp_path) == version
+
+    loaded = CompiledForest.load_artifact(tmp_path / current_version(tmp_path))
+    assert isinstance(loaded.feature, np.memmap)
+    assert loaded.metadata["trained_on"] == "test"
+    np.testing.assert_allclose(loaded.predict(X), model.predict(X), atol=ATOL)
+
+
+def test_newer_artifact_moves_current(fitted, tmp_path):
+    _, forest, _ = fitted
+    first = forest.save_artifact(tmp_path, version="v1")
+    second = forest.save_artifact(tmp_path, version="v2")
+    assert (first, second) == ("v1", "v2")
+    assert current_version(tmp_path) == "v2"
+    assert (tmp_path / "v1").is_dir()
@@ -0,0 +1,27 @@
+from pathlib import Path
+
+import pytest
+
+from app import main
+
+SHALLOW_FILE = "/app/app/main.py"  # where the Docker image installs the package
+
+
+def _import_as(file: str) -> dict:
+    # run app/main.py as if it had been imported from ``file``
+    module = {"__name__": "app.main", "__package__": "app", "__file__": file}
+    exec(compile(Path(main.__file__).read_text(encoding="utf-8"), file, "exec"), module)
+    return module
+
+
+def test_imports_from_a_shallow_tree_without_the_mvp(monkeypatch):
+    monkeypatch.delenv("MVP_BACKEND_DIR", raising=False)
+    module = _import_as(SHALLOW_FILE)
+    assert module["MVP_DIR"] is None
+    assert all(getattr(r, "path", None) != main.MVP_PREFIX for r in module["app"].routes)
+
+
+@pytest.mark.parametrize("file", [SHALLOW_FILE, main.__file__])
+def test_mvp_backend_dir_overrides_the_default(monkeypatch, tmp_path, file):
+    monkeypatch.setenv("MVP_BACKEND_DIR", str(tmp_path))
+    assert _import_as(file)["MVP_DIR"] == tmp_path
@@ -0,0 +1,19 @@
+import pytest
+
+from app.utils.metrics import Counter, _Metric
+
+
+def test_a_metric_without_samples_cannot_be_created():
+    class Incomplete(_Metric):
+        type = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete("incomplete_total", "never sampled")
+
+
+def test_counter_samples_per_label_set():
+    counter = Counter("requests_total", "Requests", labels=("route",))
+    counter.inc("a")
+    counter.inc("a", amount=2)
+    counter.inc("b")
+    assert list(counter.samples()) == [("", {"route": "a"}, 3.0), ("", {"route": "b"}, 1.0)]
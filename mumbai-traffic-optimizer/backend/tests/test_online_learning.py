@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.ml_models.online_model import WEATHERS, OnlineModel
+from app.services import data_collector, forecast_store
+from app.services.forecast_store import ForecastTable
+from app.services.traffic_predictor import ONLINE_MIN_COUNT, ONLINE_MIN_TICKS, TrafficPredictorService
+from app.utils.leader import FileLock
+
+TARGET = datetime(2024, 3, 4, 8)
+
+
+def _service(tmp_path, name="online.npz"):
+    return TrafficPredictorService(artifacts_dir=tmp_path / "artifacts", watch_interval=0,
+                                   online_state_file=tmp_path / name)
+
+
+def _tick(service, day, level=9.0):
+    ts = (TARGET + timedelta(days=day, minutes=30)).isoformat()
+    return [{"route_id": r, "timestamp": ts, "congestion_level": level, "weather": w}
+            for r in service.routes for w in WEATHERS]
+
+
+@pytest.fixture
+def service(tmp_path):
+    # a constant level the forest does not predict, so the online statistics take over
+    service = _service(tmp_path)
+    for day in range(ONLINE_MIN_COUNT + ONLINE_MIN_TICKS):
+        service.observe(_tick(service, day))
+    assert service.online.active
+    return service
+
+
+def test_apply_online_matches_in_process_predictions(service):
+    forest = service.predict_many(service.routes, [TARGET], online=False)
+    full = service.predict_many(service.routes, [TARGET])
+    assert [r["congestion_level"] for r in full] == [9.0] * len(service.routes)
+    assert [r["congestion_level"] for r in forest] != [9.0] * len(service.routes)
+    assert service.apply_online(service.routes, [TARGET], forest) == full
+
+
+def test_alookup_overlays_online_rows_scored_by_a_stale_pool(service, tmp_path, monkeypatch):
+    stale = _service(tmp_path, "stale.npz")  # what a pool process knows: no online statistics
+
+    async def pool(func, *args):
+        with monkeypatch.context() as m:
+            m.setattr(forecast_store, "predictor_service", stale)
+            return func(*args)
+
+    monkeypatch.setattr(forecast_store, "predictor_service", service)
+    monkeypatch.setattr(forecast_store, "run_cpu", pool)
+    rows = asyncio.run(ForecastTable().alookup(service.routes, [TARGET]))
+    expected = service.predict_many(service.routes, [TARGET])
+    assert [(r["congestion_level"], r["confidence"]) for r in rows] == \
+        [(r["congestion_level"], r["confidence"]) for r in expected]
+
+
+def test_state_is_written_only_when_persisting(tmp_path):
+    service = _service(tmp_path)
+    service.observe(_tick(service, 0), persist=False)
+    assert not service.online_state_file.exists()
+    service.observe(_tick(service, 1))
+    saved = OnlineModel.load(service.online_state_file, service.routes)
+    assert saved.last_tick == service.online.last_tick
+    assert saved.count.sum() == 2 * len(service.routes) * len(WEATHERS)
+
+
+def test_only_the_scheduler_leader_persists(tmp_path, monkeypatch):
+    calls = []
+    rows = _tick(data_collector.predictor_service, 0)
+    lock = FileLock(tmp_path / "scheduler.lock")
+    monkeypatch.setattr(data_collector, "scheduler_lock", lock)
+    monkeypatch.setattr(data_collector, "get_current_status", lambda: rows)
+    monkeypatch.setattr(data_collector, "refresh_forecasts", lambda: None)
+    monkeypatch.setattr(data_collector.live_feed, "publish", lambda *args: None)
+    monkeypatch.setattr(data_collector.predictor_service, "observe", lambda rows, persist: calls.append(persist))
+
+    data_collector._status_changed()
+    other = FileLock(lock.path)
+    assert other.acquire()
+    data_collector._status_changed()  # another worker leads
+    other.release()
+    assert lock.acquire()
+    data_collector._status_changed()
+    lock.release()
+    assert calls == [False, False, True]
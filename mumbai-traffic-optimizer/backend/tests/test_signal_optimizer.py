@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from app.services import signal_optimizer
+from app.services.signal_optimizer import (APPROACHES, CYCLE_MAX, CYCLE_MIN, INTERSECTIONS_BY_ID, LOST_TIME, SAT_FLOW,
+                                           optimize_signal_timing, simulated_improvement, webster_batch)
+
+
+@pytest.fixture(autouse=True)
+def empty_simulation_caches():
+    signal_optimizer._improvements.clear()
+    signal_optimizer._comparisons.clear()
+
+
+def _simulated(flows):
+    plan = webster_batch(flows)
+    return simulated_improvement(flows, plan["cycle_time"], plan["green_splits"])
+
+
+def test_typical_flows_follow_webster():
+    flows = np.array([400.0, 350.0, 250.0, 200.0])
+    plan = webster_batch(flows)
+    Y = flows.sum() / SAT_FLOW
+    assert plan["cycle_time"] == pytest.approx((1.5 * LOST_TIME + 5) / (1 - Y))
+    assert plan["green_splits"].sum() == pytest.approx(plan["cycle_time"] - LOST_TIME)
+    assert not plan["saturated"]
+
+
+def test_zero_flow_gets_minimum_cycle_with_equal_greens():
+    plan = webster_batch(np.zeros((2, 3, 4)))
+    assert np.all(plan["cycle_time"] == CYCLE_MIN)
+    np.testing.assert_allclose(plan["green_splits"], (CYCLE_MIN - LOST_TIME) / 4)
+    assert not plan["saturated"].any()
+
+
+def test_light_flow_is_clamped_to_minimum_cycle():
+    plan = webster_batch([10.0, 0.0, 5.0, 0.0])
+    assert plan["cycle_time"] == CYCLE_MIN
+    assert plan["green_splits"][1] == 0 and plan["green_splits"][0] > plan["green_splits"][2] > 0
+
+
+@pytest.mark.parametrize("flows", [[450.0] * 4, [900.0, 900.0, 600.0, 600.0], [5000.0, 0.0, 0.0, 0.0]])
+def test_saturated_flow_is_flagged_and_capped(flows):
+    plan = webster_batch(flows)
+    assert plan["Y"] >= 1
+    assert plan["saturated"]
+    assert plan["cycle_time"] == CYCLE_MAX
+    assert np.all(np.isfinite(plan["green_splits"])) and np.all(plan["green_splits"] >= 0)
+    assert plan["green_splits"].sum() == pytest.approx(CYCLE_MAX - LOST_TIME)
+
+
+def test_rows_are_independent_in_a_batch():
+    flows = np.array([[[0.0] * 4, [400.0, 350.0, 250.0, 200.0], [2000.0] * 4]])
+    plan = webster_batch(flows)
+    for t in range(3):
+        single = webster_batch(flows[0, t])
+        assert plan["cycle_time"][0, t] == pytest.approx(single["cycle_time"])
+        np.testing.assert_allclose(plan["green_splits"][0, t], single["green_splits"])
+    assert plan["saturated"].tolist() == [[False, False, True]]
+
+
+def test_batch_and_single_endpoints_agree():
+    result = optimize_signal_timing(INTERSECTIONS_BY_ID["bandra_linking_road"])
+    flows = [result["simulation"]["arrival_flows_veh_per_hour"][a] for a in APPROACHES]
+    signal_optimizer._improvements.clear()
+    improvement = _simulated(np.array([[flows, [500.0, 400.0, 300.0, 200.0]]]))
+    assert round(improvement[0, 0] * 100, 1) == result["expected_flow_improvement_pct"]
+
+
+def test_simulated_rows_do_not_depend_on_the_batch():
+    flows = np.array([[400.0, 350.0, 250.0, 200.0], [900.0, 900.0, 600.0, 600.0], [0.0] * 4])
+    together = _simulated(flows)
+    signal_optimizer._improvements.clear()
+    alone = [_simulated(row) for row in flows]
+    np.testing.assert_array_equal(together, alone)
+    assert together[2] == 0
+
+
+def test_simulation_is_memoized_per_flows_and_plan(monkeypatch):
+    calls = []
+    simulate = signal_optimizer.simulate
+
+    def counting(*args, **kwargs):
+        calls.append(len(args[3]))
+        return simulate(*args, **kwargs)
+
+    monkeypatch.setattr(signal_optimizer, "simulate", counting)
+    flows = np.array([[400.0, 350.0, 250.0, 200.0], [400.0, 350.0, 250.0, 200.0], [300.0, 300.0, 300.0, 300.0]])
+    first = _simulated(flows)
+    assert calls == [2]
+    np.testing.assert_array_equal(_simulated(flows[::-1]), first[::-1])
+    assert calls == [2]
+
+
+def test_uncached_rows_are_simulated_in_bounded_chunks(monkeypatch):
+    flows = np.array([[400.0, 350.0, 250.0, 200.0], [900.0, 900.0, 600.0, 600.0], [300.0] * 4, [0.0] * 4,
+                      [500.0, 400.0, 300.0, 200.0]])
+    whole = _simulated(flows)
+    signal_optimizer._improvements.clear()
+    calls = []
+    simulate = signal_optimizer.simulate
+
+    def counting(*args, **kwargs):
+        calls.append(len(args[3]))
+        return simulate(*args, **kwargs)
+
+    monkeypatch.setattr(signal_optimizer, "simulate", counting)
+    monkeypatch.setattr(signal_optimizer, "SIMULATION_CHUNK_ROWS", 2)
+    np.testing.assert_array_equal(_simulated(flows), whole)
+    assert calls == [2, 2, 1]
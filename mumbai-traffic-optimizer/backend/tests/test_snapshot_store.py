@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import delete, select
+
+from app.models.db_models import RouteRollup, RouteSnapshot
+from app.services.snapshot_store import maintain_rollups, write_snapshots
+from app.utils.db import SessionLocal, init_db
+
+
+@pytest.fixture(autouse=True)
+def empty_db():
+    init_db()
+    with SessionLocal() as session:
+        session.execute(delete(RouteSnapshot))
+        session.execute(delete(RouteRollup))
+        session.commit()
+
+
+def _tick(ts, level, route_id="SV Road"):
+    write_snapshots([{"route_id": route_id, "timestamp": ts, "congestion_level": level, "weather": "Clear"}])
+
+
+def _rollup(resolution, bucket):
+    with SessionLocal() as session:
+        row = session.execute(select(RouteRollup.samples, RouteRollup.congestion_mean).where(
+            RouteRollup.resolution == resolution, RouteRollup.bucket_start == bucket)).one_or_none()
+    return tuple(row) if row else None
+
+
+def test_completed_buckets_are_rolled_up():
+    _tick("2026-10-01T08:00:00", 2.0)
+    _tick("2026-10-01T08:05:00", 4.0)
+    _tick("2026-10-01T08:15:00", 6.0)
+    maintain_rollups(now=datetime(2026, 10, 1, 8, 20))
+    assert _rollup("15m", datetime(2026, 10, 1, 8, 0)) == (2, 3.0)
+    assert _rollup("15m", datetime(2026, 10, 1, 8, 15)) is None  # still open
+
+
+def test_late_tick_in_a_rolled_bucket_is_included():
+    _tick("2026-10-01T08:00:00", 2.0)
+    _tick("2026-10-01T08:05:00", 4.0)
+    maintain_rollups(now=datetime(2026, 10, 1, 8, 20))
+    _tick("2026-10-01T08:10:00", 9.0)  # committed after its bucket was rolled up
+    _tick("2026-10-01T08:30:00", 1.0)
+    maintain_rollups(now=datetime(2026, 10, 1, 8, 35))
+    assert _rollup("15m", datetime(2026, 10, 1, 8, 0)) == (3, 5.0)
+    maintain_rollups(now=datetime(2026, 10, 1, 9, 5))
+    assert _rollup("1h", datetime(2026, 10, 1, 8, 0)) == (4, 4.0)
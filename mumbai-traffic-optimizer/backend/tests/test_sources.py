@@ -0,0 +1,123 @@
+import asyncio
+import json
+import time
+from datetime import datetime
+
+import httpx
+import pytest
+
+from app.services.sources import (AsyncCollector, CsvReplaySource, HttpSource, SimulatedSource, TrafficSource,
+                                  build_sources)
+
+NOW = datetime(2024, 1, 15, 9)
+ROUTES = ["SV Road", "LBS Marg", "Western Express Highway"]
+
+
+def _client(handler) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def _collect(sources, handler, routes=ROUTES, concurrency=8):
+    async def run():
+        async with _client(handler) as client:
+            return await AsyncCollector(sources, routes, concurrency=concurrency, client=client).collect(NOW)
+    return asyncio.run(run())
+
+
+def _route(request: httpx.Request) -> str:
+    return request.url.raw_path.decode().rsplit("/", 1)[-1]
+
+
+@pytest.fixture
+def replay_csv(tmp_path):
+    path = tmp_path / "replay.csv"
+    path.write_text("route_id,congestion_level,weather\nLBS Marg,7.5,Rain\n", encoding="utf-8")
+    return path
+
+
+def test_http_source_parses_a_reading():
+    def handler(request):
+        assert request.url.raw_path == b"/routes/SV%20Road"
+        return httpx.Response(200, json={"congestion_level": 6.2, "weather": "Rain", "average_speed": 22})
+    rows = _collect([HttpSource("http://feed")], handler, routes=["SV Road"])
+    assert rows == [{"route_id": "SV Road", "timestamp": NOW.isoformat(), "congestion_level": 6.2,
+                     "average_speed": 22.0, "delay_minutes": 15.5, "weather": "Rain"}]
+
+
+def test_falls_through_http_then_csv_then_simulated(replay_csv):
+    def handler(request):
+        if _route(request) == "SV%20Road":
+            return httpx.Response(200, json={"congestion_level": 3})
+        return httpx.Response(404)
+    sources = [HttpSource("http://feed"), CsvReplaySource(replay_csv), SimulatedSource()]
+    rows = {r["route_id"]: r for r in _collect(sources, handler)}
+    assert rows["SV Road"]["congestion_level"] == 3  # http
+    assert rows["LBS Marg"]["congestion_level"] == 7.5  # csv, http had no reading
+    assert 1 <= rows["Western Express Highway"]["congestion_level"] <= 10  # simulated, in neither
+
+
+def test_server_errors_fall_through():
+    rows = _collect([HttpSource("http://feed"), SimulatedSource()], lambda request: httpx.Response(503))
+    assert len(rows) == len(ROUTES)
+
+
+def test_timeout_falls_through_to_next_source():
+    async def handler(request):
+        await asyncio.sleep(1)
+        return httpx.Response(200, json={"congestion_level": 9})
+    started = time.monotonic()
+    rows = _collect([HttpSource("http://feed", timeout=0.05), SimulatedSource()], handler)
+    assert len(rows) == len(ROUTES)
+    assert all(r["congestion_level"] != 9 for r in rows)
+    assert time.monotonic() - started < 0.9
+
+
+def test_route_with_no_source_answering_is_dropped():
+    rows = _collect([HttpSource("http://feed", timeout=0.05)], lambda request: httpx.Response(404))
+    assert rows == []
+
+
+@pytest.mark.parametrize("response", [
+    httpx.Response(200, content=b"not json"),
+    httpx.Response(200, json=["congestion_level", 5]),
+    httpx.Response(200, json={"speed": 40}),
+    httpx.Response(200, json={"congestion_level": "heavy"}),
+    httpx.Response(200, content=json.dumps({"congestion_level": float("nan")}).encode()),
+])
+def test_malformed_payload_falls_through(response):
+    rows = _collect([HttpSource("http://feed"), SimulatedSource()], lambda request: response, routes=["SV Road"])
+    assert len(rows) == 1
+    assert 1 <= rows[0]["congestion_level"] <= 10
+
+
+def test_concurrency_is_bounded():
+    in_flight = peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200, json={"congestion_level": 5})
+    routes = [f"route_{i}" for i in range(20)]
+    rows = _collect([HttpSource("http://feed")], handler, routes=routes, concurrency=3)
+    assert len(rows) == 20
+    assert peak == 3
+
+
+def test_build_sources_validates_spec(replay_csv):
+    assert [s.name for s in build_sources("http,csv,simulated", http_url="http://feed", replay_file=str(replay_csv))] \
+        == ["http", "csv", "simulated"]
+    with pytest.raises(ValueError):
+        build_sources("http")
+    with pytest.raises(ValueError):
+        build_sources("carrier-pigeon")
+
+
+def test_a_source_without_fetch_cannot_be_created():
+    class Incomplete(TrafficSource):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
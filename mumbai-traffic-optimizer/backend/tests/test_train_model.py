@@ -0,0 +1,24 @@
+import pickle
+
+import pytest
+
+from app.ml_models import train_model
+
+
+@pytest.fixture
+def out_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(train_model, "OUT_PATH", tmp_path / "traffic_model.pkl")
+    monkeypatch.setattr(train_model, "ARTIFACTS_DIR", tmp_path / "artifacts")
+    return tmp_path
+
+
+def _trees(out_dir):
+    with open(out_dir / "traffic_model.pkl", "rb") as f:
+        return len(pickle.load(f).estimators_)
+
+
+@pytest.mark.parametrize("chunk_days, trees", [(1, 5), (1, 20), (3, 7), (None, 5)])
+def test_every_day_is_trained_on_the_requested_trees(out_dir, chunk_days, trees):
+    stats = train_model.train(n_days=14, n_estimators=trees, chunk_days=chunk_days)
+    assert stats["rows"] == 14 * 24 * len(train_model.ROUTES)
+    assert _trees(out_dir) == trees
@@ -1,10 +1,18 @@
 import React, { useEffect, useState } from "react";
 import { Card, CardContent, Typography, Grid } from "@mui/material";
-import { getTrafficHealthScore } from "../services/api";
+import { getTrafficHealthScore, subscribeLiveStatus } from "../services/api";
 const Dashboard: React.FC = () => {
   const [health, setHealth] = useState<number | null>(null);
   useEffect(() => {
     getTrafficHealthScore().then(setHealth);
+    return subscribeLiveStatus({
+      onSnapshot: (data) => setHealth(data.traffic_health_score),
+      onDiff: (data) => {
+        if (data.traffic_health_score !== undefined) {
+          setHealth(data.traffic_health_score);
+        }
+      },
+    });
   }, []);
   return (
     <Grid container spacing={2} sx={{ mb: 2 }}>
@@ -20,9 +20,63 @@ export const getSignalOptimization = async (intersectionId: string) => {
   );
   return res.data;
 };
+export interface SignalBatchRequest {
+  flows: number[][][]; // intersections x timesteps x approaches, veh/h
+  intersection_ids?: string[];
+  approaches?: string[];
+  start?: string;
+  interval_minutes?: number;
+  simulate?: boolean; // adds expected_flow_improvement_pct
+}
+export const getSignalOptimizationBatch = async (req: SignalBatchRequest) => {
+  const res = await axios.post(`${API_BASE}/signals/optimization/batch`, req);
+  return res.data;
+};
+export const getNearestIntersections = async (lat: number, lng: number, k = 5) => {
+  const res = await axios.get(`${API_BASE}/intersections/nearest`, {
+    params: { lat, lng, k },
+  });
+  return res.data.intersections;
+};
+export const getIntersectionsInView = async (bounds: {
+  min_lat: number;
+  min_lng: number;
+  max_lat: number;
+  max_lng: number;
+}) => {
+  const res = await axios.get(`${API_BASE}/intersections/bbox`, {
+    params: bounds,
+  });
+  return res.data;
+};
 export const calculateROI = async (params: Record<string, any>) => {
   const res = await axios.get(`${API_BASE}/infrastructure/roi-calculator`, {
     params,
   });
   return res.data;
 };
+export const analyzeScenarios = async (req: {
+  projects: Record<string, any>[];
+  samples?: number;
+  seed?: number;
+}) => {
+  const res = await axios.post(
+    `${API_BASE}/infrastructure/scenario-analysis`,
+    req
+  );
+  return res.data;
+};
+export interface LiveStatusHandlers {
+  onSnapshot: (data: any) => void;
+  onDiff: (data: any) => void;
+}
+export const subscribeLiveStatus = (handlers: LiveStatusHandlers) => {
+  const source = new EventSource(`${API_BASE}/traffic/live`);
+  source.addEventListener("snapshot", (e) =>
+    handlers.onSnapshot(JSON.parse((e as MessageEvent).data))
+  );
+  source.addEventListener("diff", (e) =>
+    handlers.onDiff(JSON.parse((e as MessageEvent).data))
+  );
+  return () => source.close();
+};
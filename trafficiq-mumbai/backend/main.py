@@ -1,7 +1,7 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional
-from models import predict_congestion, optimize_signal_timing, calculate_infrastructure_roi, ROIRequest
+from typing import List, Optional
+from models import predict_congestion, prediction_grid, optimize_signal_timing, calculate_infrastructure_roi, ROIRequest
 
 app = FastAPI(title="TrafficIQ Mumbai MVP", version="0.1.0")
 
@@ -13,17 +13,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Every handler is a microsecond table lookup or closed-form calculation, so they
+# run on the event loop rather than paying a threadpool hop per request.
+
 
 @app.get('/api/predict/{route_id}')
-def api_predict(route_id: str, hour: int, weather: str, day_type: Optional[str] = None):
+async def api_predict(route_id: str, hour: int = Query(..., ge=0, le=23), weather: str = Query(...),
+                      day_type: Optional[str] = Query(None, regex='^(weekday|weekend)$')):
     try:
         return predict_congestion(route_id, hour, weather, day_type)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
+@app.get('/api/predict-grid')
+async def api_predict_grid(route_ids: Optional[List[str]] = Query(None), weather: Optional[List[str]] = Query(None),
+                           day_type: Optional[str] = Query(None, regex='^(weekday|weekend)$')):
+    """Congestion for every route x hour x weather in one response (heatmaps, day profiles)."""
+    try:
+        return prediction_grid(route_ids, weather, day_type)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
 @app.get('/api/optimize/{intersection_id}')
-def api_optimize(intersection_id: str, north_flow: int, south_flow: int, east_flow: int, west_flow: int):
+async def api_optimize(intersection_id: str, north_flow: int, south_flow: int, east_flow: int, west_flow: int):
     flows = {"N": north_flow, "S": south_flow, "E": east_flow, "W": west_flow}
     try:
         return optimize_signal_timing(intersection_id, flows)
@@ -32,7 +46,7 @@ def api_optimize(intersection_id: str, north_flow: int, south_flow: int, east_fl
 
 
 @app.post('/api/calculate-roi')
-def api_calculate_roi(req: ROIRequest):
+async def api_calculate_roi(req: ROIRequest):
     try:
         return calculate_infrastructure_roi(req.project_type, req.location, req.project_cost)
     except ValueError as e:
@@ -40,10 +54,12 @@ def api_calculate_roi(req: ROIRequest):
 
 
 @app.get('/')
-def root():
-    return {"message": "TrafficIQ Mumbai MVP running", "endpoints": ["/api/predict/{route_id}", "/api/optimize/{intersection_id}", "/api/calculate-roi"]}
+async def root():
+    return {"message": "TrafficIQ Mumbai MVP running",
+            "endpoints": ["/api/predict/{route_id}", "/api/predict-grid", "/api/optimize/{intersection_id}",
+                          "/api/calculate-roi"]}
 
 
 @app.get('/api/health')
-def health():
+async def health():
     return {"status": "ok"}
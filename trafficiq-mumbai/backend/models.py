@@ -1,6 +1,7 @@
 from pydantic import BaseModel
-from typing import Dict
-import json, datetime
+from typing import Dict, List
+import json, time
+import numpy as np
 from pathlib import Path
 
 DATA_DIR = Path(__file__).parent / 'data'
@@ -19,35 +20,89 @@ class ROIRequest(BaseModel):
     project_cost: float
 
 
+def _weather_confidence(weather: str) -> float:
+    return 0.85 if weather == 'clear' else 0.7 if 'rain' in weather else 0.75
+
+
+def _build_prediction_tables():
+    """Precompute every prediction the rule-based model can make."""
+    base = np.array([r['base_congestion'] for r in ROUTES_DATA.values()], dtype=float)[:, None, None, None]
+    sensitivity = np.array([r['weather_sensitivity'] for r in ROUTES_DATA.values()], dtype=float)[:, None, None, None]
+    hourly = np.array([PATTERNS['hourly_patterns'][d] for d in DAY_TYPES], dtype=float)[None, :, :, None]
+    mult = np.array([PATTERNS['weather_impact'][w] for w in WEATHERS] + [1.0])[None, None, None, :]
+    raw = 0.4 * base + 0.4 * hourly + 0.2 * (hourly * (1 + sensitivity * (mult - 1)))
+    congestion = np.round(np.clip(raw * mult, 1, 10)).astype(np.int8)
+    confidence = np.array([_weather_confidence(w) for w in WEATHERS] + [0.75])
+    return congestion, confidence
+
+
+ROUTE_IDS = list(ROUTES_DATA)
+ROUTE_INDEX = {r: i for i, r in enumerate(ROUTE_IDS)}
+DAY_TYPES = list(PATTERNS['hourly_patterns'])
+DAY_INDEX = {d: i for i, d in enumerate(DAY_TYPES)}
+WEATHERS = list(PATTERNS['weather_impact'])
+WEATHER_INDEX = {w: i for i, w in enumerate(WEATHERS)}
+CONGESTION_TABLE, CONFIDENCE_TABLE = _build_prediction_tables()
+
+# contributing_factors text, split by what each line depends on
+_HOURLY_FACTORS = {d: [f"Hourly pattern value: {v}" for v in PATTERNS['hourly_patterns'][d]] for d in DAY_TYPES}
+_ROUTE_FACTORS = {r: (f"Route base: {route['base_congestion']}",
+                      f"Weather sensitivity applied: {route['weather_sensitivity']}")
+                  for r, route in ROUTES_DATA.items()}
+_WEATHER_FACTORS = {w: f"Weather multiplier: {m}" for w, m in PATTERNS['weather_impact'].items()}
+
+
+def current_day_type() -> str:
+    # days since the epoch; 1970-01-01 was a Thursday (weekday 3)
+    return 'weekday' if (int(time.time() // 86400) + 3) % 7 < 5 else 'weekend'
+
+
 def predict_congestion(route_id: str, hour: int, weather: str, day_type: str = None):
-    route = ROUTES_DATA.get(route_id)
-    if route is None:
+    r = ROUTE_INDEX.get(route_id)
+    if r is None:
         raise ValueError('Unknown route')
-    if day_type is None:
-        dow = datetime.datetime.utcnow().weekday()
-        day_type = 'weekday' if dow < 5 else 'weekend'
-    hourly = PATTERNS['hourly_patterns'][day_type][hour]
-    weather_mult = PATTERNS['weather_impact'].get(weather, 1.0)
-    base_congestion = route['base_congestion']
-    raw = 0.4 * base_congestion + 0.4 * hourly + 0.2 * (hourly * (1 + route['weather_sensitivity'] * (weather_mult - 1)))
-    final = min(10, max(1, raw * weather_mult))
-    confidence = 0.85 if weather == 'clear' else 0.7 if 'rain' in weather else 0.75
+    d = DAY_INDEX[day_type or current_day_type()]
+    w = WEATHER_INDEX.get(weather, len(WEATHERS))
+    route_base, route_sensitivity = _ROUTE_FACTORS[route_id]
     return {
         'route_id': route_id,
-        'route_name': route['name'],
+        'route_name': ROUTES_DATA[route_id]['name'],
         'hour': hour,
         'weather': weather,
-        'congestion_level': round(final),
-        'confidence': round(confidence, 2),
+        'congestion_level': int(CONGESTION_TABLE[r, d, hour, w]),
+        'confidence': float(CONFIDENCE_TABLE[w]) if w < len(WEATHERS) else _weather_confidence(weather),
         'contributing_factors': [
-            f"Hourly pattern value: {hourly}",
-            f"Route base: {base_congestion}",
-            f"Weather multiplier: {weather_mult}",
-            f"Weather sensitivity applied: {route['weather_sensitivity']}"
+            _HOURLY_FACTORS[DAY_TYPES[d]][hour],
+            route_base,
+            _WEATHER_FACTORS.get(weather, "Weather multiplier: 1.0"),
+            route_sensitivity,
         ]
     }
 
 
+def prediction_grid(route_ids: List[str] = None, weathers: List[str] = None, day_type: str = None):
+    """The route x hour x weather congestion grid for one day type, column-wise."""
+    route_ids = route_ids or ROUTE_IDS
+    weathers = weathers or WEATHERS
+    unknown = [r for r in route_ids if r not in ROUTE_INDEX] + [w for w in weathers if w not in WEATHER_INDEX]
+    if unknown:
+        raise ValueError(f"Unknown route or weather: {', '.join(unknown)}")
+    day_type = day_type or current_day_type()
+    r = [ROUTE_INDEX[x] for x in route_ids]
+    w = [WEATHER_INDEX[x] for x in weathers]
+    grid = CONGESTION_TABLE[np.ix_(r, [DAY_INDEX[day_type]], range(24), w)][:, 0]
+    return {
+        'day_type': day_type,
+        'dims': ['route', 'hour', 'weather'],
+        'route_ids': route_ids,
+        'route_names': [ROUTES_DATA[x]['name'] for x in route_ids],
+        'hours': list(range(24)),
+        'weather': weathers,
+        'congestion_level': grid.tolist(),
+        'confidence': CONFIDENCE_TABLE[w].tolist(),
+    }
+
+
 def optimize_signal_timing(intersection_id: str, flows: Dict[str, int]):
     inter = INTERSECTIONS.get(intersection_id)
     if inter is None:
@@ -41,13 +41,17 @@ export const calculateRoi = async (payload) => {
   const { data } = await api.post(`/api/calculate-roi`, payload);
   return data;
 };
+export const predictGrid = async ({ route_ids, weather, day_type } = {}) => {
+  const { data } = await api.get(`/api/predict-grid`, {
+    params: { route_ids, weather, day_type },
+    paramsSerializer: { indexes: null },
+  });
+  return data;
+};
 export const predictDayProfile = async (route_id, weather) => {
-  const hours = [...Array(24).keys()];
-  const results = await Promise.all(
-    hours.map((h) => predictCongestion(route_id, h, weather).catch(() => null))
-  );
-  return hours.map((h, i) => ({
+  const grid = await predictGrid({ route_ids: [route_id], weather: [weather] });
+  return grid.hours.map((h) => ({
     hour: h,
-    level: results[i]?.congestion_level ?? null,
+    level: grid.congestion_level[0][h][0],
   }));
 };